@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the client stack against the stand-in API server.
+
+Each ramp level runs N virtual stations at once. Every station is its own
+XiaomiUnlockClient, with its own API session and state directory, and
+unlocks M mock devices concurrently through the full unlock_device path,
+for a number of rounds. Devices come from a seeded MockFleet, so the same
+arguments replay the same workload. The stand-in server runs in a separate
+process so client CPU and memory figures are the client's own, or with
+--transport inprocess in this process, called directly with no sockets,
+which leaves the client's own overhead (and the server's CPU is counted
+as the client's).
+
+Simulated device work runs on a ScaledClock (--time-scale), so device
+steps shrink while requests, journal and history writes cost real time.
+Stage latencies are real time, taken from tracer spans.
+
+Examples:
+  python benchmarks/bench.py
+  python benchmarks/bench.py --stations 1,4,16,64 --devices 4 --rounds 3 --output bench.json
+  python benchmarks/bench.py --faults faults.json          # Client and 'server' fault rules
+  python benchmarks/bench.py --transport inprocess         # Skip the network stack
+  python benchmarks/bench.py --baseline bench.json         # Fail on regressions
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+CLIENT_DIR = Path(__file__).resolve().parent.parent
+STANDIN = CLIENT_DIR / 'benchmarks' / 'standin_server.py'
+
+sys.path.insert(0, str(CLIENT_DIR))
+
+from src.api.standin import StandInServer
+from src.api.transport import InProcessTransport, TRANSPORT_NAMES
+from src.core.client import XiaomiUnlockClient
+from src.devices.fleet import MockFleet, FleetSpec
+from src.ui.cli import CLI
+from src.utils.clock import ScaledClock
+from src.utils.config import Config
+from src.utils.faults import faults
+from src.utils.logger import setup_logger, shutdown_logging
+from src.utils.tracing import tracer
+
+# unlock_device only supports these modes
+UNLOCK_MODES = {'edl': 40, 'brom': 25, 'mi_assistant': 30}
+
+# The whole operation, then the scheduler stages in order
+STAGES = ('unlock_device', 'device_registration', 'auth_key_request', 'operation_start', 'device_unlock',
+          'status_update')
+
+HTTP_METHODS = ('GET ', 'POST ', 'PUT ', 'DELETE ')
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_standin(secret: str, faults_file: str = None, timeout: float = 15.0):
+    """Start the stand-in server in a child process and wait until it answers /health."""
+    port = free_port()
+    cmd = [sys.executable, str(STANDIN), '--port', str(port), '--hmac-secret', secret]
+    if faults_file:
+        cmd += ['--faults', faults_file]
+    process = subprocess.Popen(cmd, cwd=CLIENT_DIR, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Stand-in server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1):
+                return process, url
+        except OSError:
+            time.sleep(0.05)
+
+    process.kill()
+    raise RuntimeError(f"Stand-in server did not start within {timeout:.0f}s")
+
+
+def stop_standin(process) -> dict:
+    """Stop the server and return its CPU time and peak RSS where the platform reports them."""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+    try:
+        import resource
+    except ImportError:
+        return {}
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3),
+        'peak_rss_mb': round(_maxrss_bytes(usage.ru_maxrss) / 2 ** 20, 1)
+    }
+
+
+def _maxrss_bytes(maxrss: int) -> int:
+    # Linux reports kilobytes, macOS bytes
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, or None where unavailable."""
+    try:
+        import resource
+        return round(_maxrss_bytes(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) / 2 ** 20, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / 2 ** 20, 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=CLIENT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=CLIENT_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def span_stats(spans) -> dict:
+    """Latency percentiles (ms) and error rate per span name."""
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for span in spans:
+        durations[span.name].append(span.duration or 0.0)
+        if span.status == 'error' or span.attributes.get('success') is False:
+            errors[span.name] += 1
+
+    stats = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        stats[name] = {
+            'count': len(values),
+            'errors': errors[name],
+            'error_rate': round(errors[name] / len(values), 4),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2)
+        }
+    return stats
+
+
+def station_config(args, url: str, directory: Path) -> Config:
+    config = Config.load(args.config) if args.config else Config()
+    config.server.url = url
+    if args.transport != 'inprocess':
+        config.server.transport = args.transport
+    config.advanced.enable_mock_mode = True
+    config.advanced.checkpoint_dir = str(directory / 'checkpoints')
+    config.advanced.journal_dir = str(directory / 'journal')
+    config.advanced.history_db = str(directory / 'history.db')
+    # Budgets are read on the scaled clock; keep them the same in real seconds
+    config.device.operation_timeout = int(config.device.operation_timeout * args.time_scale)
+    return config
+
+
+async def run_station(client: XiaomiUnlockClient, batches: list) -> list:
+    """Unlock each batch of devices concurrently, one batch after another."""
+    results = []
+    for batch in batches:
+        results += await asyncio.gather(*(client.unlock_device(device) for device in batch), return_exceptions=True)
+    return results
+
+
+async def run_level(stations: int, args, url: str, devices, logger, workdir: Path, clock: ScaledClock,
+                    standin: StandInServer = None) -> dict:
+    clients = []
+    for index in range(stations):
+        directory = workdir / f"level{stations}" / f"station{index}"
+        client = XiaomiUnlockClient(station_config(args, url, directory), logger, CLI(no_color=True, quiet=True),
+                                    clock=clock)
+        if standin is not None:
+            client.api_client.transport = InProcessTransport(standin.handle)
+        clients.append(client)
+    work = [[[next(devices) for _ in range(args.devices)] for _ in range(args.rounds)] for _ in clients]
+
+    tracer.finished.clear()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    async with AsyncExitStack() as stack:
+        for client in clients:
+            await stack.enter_async_context(client.api_client)
+        outcomes = await asyncio.gather(*(run_station(client, batches) for client, batches in zip(clients, work)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    results = [result for station in outcomes for result in station]
+    succeeded = sum(1 for result in results if result is True)
+    return {
+        'stations': stations,
+        'devices_per_station': args.devices,
+        'rounds': args.rounds,
+        'concurrency': stations * args.devices,
+        'operations': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'error_rate': round((len(results) - succeeded) / len(results), 4) if results else 0.0,
+        'wall_seconds': round(wall, 3),
+        'throughput_per_second': round(len(results) / wall, 2) if wall else 0.0,
+        'cpu_seconds': round(cpu, 3),
+        'cpu_percent': round(cpu / wall * 100, 1) if wall else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': span_stats(list(tracer.finished))
+    }
+
+
+def print_level(level: dict):
+    print(f"\n{level['stations']} station(s) x {level['devices_per_station']} device(s) x {level['rounds']} round(s): "
+          f"{level['operations']} ops in {level['wall_seconds']:.2f}s = {level['throughput_per_second']:.1f} ops/s, "
+          f"errors {level['error_rate'] * 100:.1f}%, CPU {level['cpu_percent']:.0f}%, "
+          f"peak RSS {level['peak_rss_mb']} MB")
+    print(f"  {'Stage':<28} {'Count':>7} {'Err %':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Max ms':>9}")
+    stages = level['stages']
+    shown = [name for name in STAGES if name in stages]
+    shown += [name for name in stages if name.startswith(HTTP_METHODS)]
+    for name in shown:
+        row = stages[name]
+        print(f"  {name[:28]:<28} {row['count']:>7} {row['error_rate'] * 100:>6.1f} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """Throughput drops and unlock_device p95 increases beyond the allowed ratio, per matching level."""
+    before_levels = {level['stations']: level for level in baseline.get('levels', [])}
+    regressions = []
+    for level in results['levels']:
+        before = before_levels.get(level['stations'])
+        if before is None:
+            continue
+        if level['throughput_per_second'] < before['throughput_per_second'] * (1 - max_regression):
+            regressions.append(f"{level['stations']} station(s) throughput: {before['throughput_per_second']:.1f} -> "
+                               f"{level['throughput_per_second']:.1f} ops/s")
+        p95 = level['stages'].get('unlock_device', {}).get('p95_ms')
+        before_p95 = before['stages'].get('unlock_device', {}).get('p95_ms')
+        if p95 and before_p95 and p95 > before_p95 * (1 + max_regression):
+            regressions.append(f"{level['stations']} station(s) unlock_device p95: {before_p95:.1f} -> {p95:.1f} ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Load test unlock_device end to end against the stand-in server')
+    parser.add_argument('--stations', default='1,2,4,8',
+                        help='Comma-separated station counts to ramp through (default: 1,2,4,8)')
+    parser.add_argument('--devices', type=int, default=4, help='Devices each station unlocks at once (default: 4)')
+    parser.add_argument('--rounds', type=int, default=2, help='Batches of devices per station per level (default: 2)')
+    parser.add_argument('--seed', type=int, default=0, help='Mock fleet seed (default: 0)')
+    parser.add_argument('--time-scale', type=float, default=100.0,
+                        help='Speed-up applied to simulated device work (default: 100)')
+    parser.add_argument('--config', help='Client config file to start from (default: built-in defaults)')
+    parser.add_argument('--server-url', help='Use a running server instead of starting the stand-in')
+    parser.add_argument('--transport', choices=TRANSPORT_NAMES + ('inprocess',), default='auto',
+                        help='Client HTTP transport; inprocess serves the stand-in without sockets (default: auto)')
+    parser.add_argument('--faults', metavar='FILE', help='Fault file applied to the client and the stand-in server')
+    parser.add_argument('--log-level', default='CRITICAL', help='Client log level during the run (default: CRITICAL)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against a previous JSON result')
+    parser.add_argument('--max-regression', type=float, default=0.20,
+                        help='Allowed throughput drop or p95 increase versus baseline (default: 0.20 = 20%%)')
+    args = parser.parse_args()
+
+    try:
+        ramp = [int(value) for value in args.stations.split(',') if value.strip()]
+    except ValueError:
+        parser.error('--stations must be comma-separated integers')
+    if not ramp or min(ramp) < 1 or args.devices < 1 or args.rounds < 1:
+        parser.error('station counts, --devices and --rounds must be positive')
+    if args.transport == 'inprocess' and args.server_url:
+        parser.error('--transport inprocess cannot be combined with --server-url')
+
+    secret = (Config.load(args.config) if args.config else Config()).client.hmac_secret
+    if args.faults:
+        faults.load(args.faults)
+
+    logger = setup_logger(args.log_level, use_color=False)
+    tracer.enable_recording()
+    fleet = MockFleet(FleetSpec(seed=args.seed, modes=dict(UNLOCK_MODES)))
+    devices = fleet.devices(sum(ramp) * args.devices * args.rounds)
+
+    results = {
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'commit': git_commit(),
+        'parameters': {
+            'stations': ramp,
+            'devices': args.devices,
+            'rounds': args.rounds,
+            'seed': args.seed,
+            'time_scale': args.time_scale,
+            'faults': args.faults,
+            'transport': args.transport,
+            'server': args.server_url or 'standin'
+        },
+        'levels': []
+    }
+
+    process = None
+    standin = None
+    url = args.server_url
+    try:
+        if args.transport == 'inprocess':
+            standin = StandInServer(secret, faults=faults)
+            url = standin.url
+        elif not url:
+            process, url = start_standin(secret, args.faults)
+        with tempfile.TemporaryDirectory(prefix='bench-') as tmp:
+            clock = ScaledClock(args.time_scale)
+            for stations in ramp:
+                level = asyncio.run(run_level(stations, args, url, devices, logger, Path(tmp), clock, standin))
+                results['levels'].append(level)
+                print_level(level)
+    finally:
+        if process is not None:
+            results['server'] = stop_standin(process)
+        if standin is not None:
+            results['server'] = standin.summary()
+        shutdown_logging()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print("\nLoad test regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
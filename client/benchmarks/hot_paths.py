@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the small operations run on every request or device.
+
+Every case works on fixed inputs. The loop count is calibrated once per
+case by doubling, then timed over several repeats with GC
+disabled, and the best repeat is the headline figure. The median and
+spread show how noisy the machine was. Compare against a saved run with
+--baseline to prove an optimisation or catch a regression.
+
+Examples:
+  python benchmarks/hot_paths.py
+  python benchmarks/hot_paths.py --repeat 9 --output hot_paths.json
+  python benchmarks/hot_paths.py --only api_signature --only api_headers
+  python benchmarks/hot_paths.py --baseline hot_paths.json   # Fail on regressions
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.api.client import APIClient
+from src.devices.detector import DeviceDetector
+from src.devices.models import Device, DeviceMode, ChipsetType
+from src.utils.config import Config
+from src.utils.logger import ColoredFormatter
+
+ADB_DEVICES_OUTPUT = """List of devices attached
+5d3a1c7e               device usb:1-1 product:alioth model:M2012K11AG device:alioth transport_id:3
+a91f02bc               device usb:1-2 product:sweet model:M2101K6G device:sweet transport_id:4
+emulator-5554          offline transport_id:1
+0123456789ABCDEF       unauthorized usb:1-3 transport_id:5
+f00dcafe42             device usb:2-1 product:lisa model:2109119DG device:lisa transport_id:6
+b16b00b5               device usb:2-2 product:veux model:2201116PG device:veux transport_id:7
+c0ffee01               recovery usb:2-3 transport_id:8
+deadbeef77             device usb:2-4 product:spes model:2201117TG device:spes transport_id:9
+"""
+
+FASTBOOT_DEVICES_OUTPUT = "5d3a1c7e\tfastboot\na91f02bc\tfastboot\nf00dcafe42\tfastboot\n???????????\tno permissions\n"
+
+GETVAR_OUTPUT = "product: alioth\n"
+
+SERIAL_DESCRIPTIONS = {
+    'edl': 'Qualcomm HS-USB QDLoader 9008 (COM7)',
+    'brom': 'MediaTek USB Port (COM12)',
+    'miss': 'USB Serial Device (COM3)',
+}
+
+DEVICE_FIELDS = dict(
+    serial_number='5d3a1c7e',
+    mode=DeviceMode.EDL,
+    chipset=ChipsetType.QUALCOMM,
+    manufacturer='Xiaomi',
+    model='Mi 11',
+    android_version='13',
+    bootloader='V1.2.3',
+    usb_vid='05c6',
+    usb_pid='9008',
+    connection_path='USB:1-1'
+)
+
+SIGNED_BODY = json.dumps({
+    'deviceId': '9f86d081884c7d65', 'authKey': 'a' * 180, 'operationType': 'edl_bypass', 'metadata': {}
+}, separators=(',', ':'))
+
+
+def build_cases(workdir: Path) -> dict:
+    config_path = workdir / 'config.json'
+    Config().save(str(config_path))
+    config = Config.load(str(config_path))
+    api = APIClient(config, logging.getLogger('bench'))
+
+    device = Device(device_id='', **DEVICE_FIELDS)
+    device_dict = device.to_dict()
+
+    record = logging.LogRecord('xiaomi_unlock_client', logging.INFO, __file__, 1,
+                               'Found serial device: %s at index %s', ('COM7', 42), None)
+    record.created = 1700000000.0
+    device_record = logging.makeLogRecord(record.__dict__)
+    device_record.device_id = '9f86d081884c7d65'
+    plain = ColoredFormatter(use_color=False)
+    colored = ColoredFormatter(use_color=True)
+
+    return {
+        'empty_loop': lambda: None,
+        'device_init': lambda: Device(device_id='', **DEVICE_FIELDS),
+        'device_to_dict': device.to_dict,
+        'device_from_dict': lambda: Device.from_dict(device_dict),
+        'api_signature': lambda: api._generate_signature('POST', '/unlock/start', SIGNED_BODY, 1700000000),
+        'api_headers': lambda: api._get_headers('POST', '/unlock/start', SIGNED_BODY),
+        'formatter_plain': lambda: plain.format(record),
+        'formatter_device': lambda: plain.format(device_record),
+        'formatter_colored': lambda: colored.format(device_record),
+        'serial_patterns_edl': lambda: DeviceDetector.match_serial_mode(SERIAL_DESCRIPTIONS['edl']),
+        'serial_patterns_brom': lambda: DeviceDetector.match_serial_mode(SERIAL_DESCRIPTIONS['brom']),
+        'serial_patterns_miss': lambda: DeviceDetector.match_serial_mode(SERIAL_DESCRIPTIONS['miss']),
+        'parse_adb_devices': lambda: DeviceDetector.parse_adb_devices(ADB_DEVICES_OUTPUT),
+        'parse_fastboot_devices': lambda: DeviceDetector.parse_fastboot_devices(FASTBOOT_DEVICES_OUTPUT),
+        'parse_getvar': lambda: DeviceDetector.parse_getvar(GETVAR_OUTPUT),
+        'config_load': lambda: Config.load(str(config_path)),
+    }
+
+
+def measure(func, repeat: int, min_time: float) -> dict:
+    """Calibrate a loop count that runs for at least min_time, then time `repeat` runs of it."""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    samples = [t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number)]
+    best = min(samples)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min_ns': round(best, 1),
+        'median_ns': round(statistics.median(samples), 1),
+        'spread': round((max(samples) - best) / best, 3) if best else 0.0
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Microbenchmark client hot paths')
+    parser.add_argument('--repeat', type=int, default=7, help='Timed runs per case (default: 7)')
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='Minimum seconds per timed run; sets the loop count (default: 0.1)')
+    parser.add_argument('--only', action='append', help='Only run the named case (repeatable)')
+    parser.add_argument('--list', action='store_true', help='List case names and exit')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare best times against a previous JSON result')
+    parser.add_argument('--max-regression', type=float, default=0.20,
+                        help='Allowed slowdown versus baseline (default: 0.20 = 20%%)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='hot-paths-') as tmp:
+        cases = build_cases(Path(tmp))
+        if args.list:
+            print('\n'.join(cases))
+            return 0
+        unknown = set(args.only or []) - set(cases)
+        if unknown:
+            parser.error(f"unknown case(s) {', '.join(sorted(unknown))}; see --list")
+
+        results = {
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'cases': {}
+        }
+        for name, func in cases.items():
+            if args.only and name not in args.only and name != 'empty_loop':
+                continue
+            results['cases'][name] = measure(func, args.repeat, args.min_time)
+
+    baseline_ns = results['cases']['empty_loop']['min_ns']
+    print(f"{'Case':<24} {'Best ns':>10} {'Median ns':>10} {'Spread':>7} {'Over empty':>11}")
+    for name, row in results['cases'].items():
+        print(f"{name:<24} {row['min_ns']:>10.1f} {row['median_ns']:>10.1f} {row['spread'] * 100:>6.1f}% "
+              f"{row['min_ns'] - baseline_ns:>11.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['cases']
+
+        regressions = []
+        for name, row in results['cases'].items():
+            if name == 'empty_loop' or name not in baseline:
+                continue
+            before = baseline[name]['min_ns']
+            if row['min_ns'] > before * (1 + args.max_regression):
+                regressions.append(f"{name}: {before:.1f}ns -> {row['min_ns']:.1f}ns")
+
+        if regressions:
+            print("\nHot path regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the cost of disabled debug logging on hot paths.
+
+Runs with the logger at INFO so every debug call below is discarded, and
+reports nanoseconds per call for the old f-string style, plain %-style
+calls on a stdlib logger, LazyLogger, and OperationLogger.log_progress.
+
+Examples:
+  python benchmarks/logging_overhead.py
+  python benchmarks/logging_overhead.py --number 200000 --output logging.json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.logger import setup_logger, get_device_logger, LazyLogger, OperationLogger, shutdown_logging
+
+
+def legacy_log_progress(logger, operation_id, step, progress, total, message=None):
+    """log_progress as it was before the lazy facade, for comparison."""
+    percentage = (progress / total) * 100 if total > 0 else 0
+    msg = f"Operation {operation_id} - {step}: {progress}/{total} ({percentage:.1f}%)"
+    if message:
+        msg += f" - {message}"
+    logger.debug(msg)
+
+
+def build_cases():
+    logger = setup_logger('INFO', use_color=False)
+    device_logger = get_device_logger('0123456789abcdef', logger)
+    lazy = LazyLogger(device_logger)
+    operation = OperationLogger(device_logger, 'unlock_bench')
+    port = 'COM7 - Qualcomm HS-USB QDLoader 9008'
+
+    return {
+        'empty_loop': lambda: None,
+        'fstring_debug': lambda: device_logger.debug(f"Found serial device: {port} at index {42}"),
+        'stdlib_percent_debug': lambda: device_logger.debug("Found serial device: %s at index %s", port, 42),
+        'lazy_debug': lambda: lazy.debug("Found serial device: %s at index %s", port, 42),
+        'legacy_log_progress': lambda: legacy_log_progress(device_logger, 'unlock_bench', 'edl_unlock', 7, 18),
+        'log_progress': lambda: operation.log_progress('edl_unlock', 7, 18),
+    }
+
+
+def measure(func, number: int, repeat: int) -> float:
+    """Best-of-repeat nanoseconds per call."""
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    return min(timings) / number * 1e9
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Measure disabled debug logging overhead')
+    parser.add_argument('--number', type=int, default=100000, help='Calls per timing run (default: 100000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per case (default: 5)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    cases = build_cases()
+    results = {name: round(measure(func, args.number, args.repeat), 1) for name, func in cases.items()}
+    shutdown_logging()
+
+    baseline = results['empty_loop']
+    print(f"{'Case':<24} {'ns/call':>10} {'over empty':>11}")
+    for name, ns in results.items():
+        print(f"{name:<24} {ns:>10.1f} {ns - baseline:>11.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'ns_per_call': results}, f, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    logging.raiseExceptions = True
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Generate a seeded mock device fleet file for scale benchmarks.
+
+The same seed and spec always produce the same devices, so detection,
+registry and server-sync benchmarks can be rerun against identical input.
+
+Examples:
+  python benchmarks/mock_fleet.py --count 1000000 --seed 7 --output fleet.jsonl.gz
+  python benchmarks/mock_fleet.py --count 50000 --spec fleet_spec.json --output fleet.jsonl
+  python benchmarks/mock_fleet.py --summary fleet.jsonl.gz   # Distributions in an existing file
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.devices.fleet import MockFleet, FleetSpec, read_fleet
+
+
+def print_summary(records) -> int:
+    counts = {'mode': Counter(), 'chipset': Counter(), 'model': Counter(), 'failure profile': Counter()}
+    total = 0
+    for record in records:
+        device = record.device
+        counts['mode'][device.mode.value] += 1
+        counts['chipset'][device.chipset.value] += 1
+        counts['model'][f"{device.manufacturer} {device.model}"] += 1
+        counts['failure profile'][record.failure_profile] += 1
+        total += 1
+
+    print(f"{total} device(s)")
+    for name, counter in counts.items():
+        print(f"\n{name.capitalize():<28} {'Devices':>9} {'Share':>7}")
+        for value, count in counter.most_common(10):
+            print(f"{value[:28]:<28} {count:>9} {count / total * 100:>6.1f}%")
+    return total
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Generate a seeded mock device fleet')
+    parser.add_argument('--count', type=int, default=10000, help='Devices to generate (default: 10000)')
+    parser.add_argument('--seed', type=int, help='Random seed (default: the spec seed, else 0)')
+    parser.add_argument('--spec', help='JSON file with mode, chipset, model and failure profile weights')
+    parser.add_argument('--output', help='Fleet file to write; .gz paths are compressed')
+    parser.add_argument('--summary', metavar='FILE', help='Print the distributions in an existing fleet file')
+    args = parser.parse_args()
+
+    if args.summary:
+        print_summary(read_fleet(args.summary))
+        return 0
+
+    spec = FleetSpec.load(args.spec) if args.spec else FleetSpec()
+    if args.seed is not None:
+        spec.seed = args.seed
+    fleet = MockFleet(spec)
+
+    if not args.output:
+        print_summary(fleet.generate(args.count))
+        return 0
+
+    start = time.perf_counter()
+    written = fleet.write(args.output, args.count)
+    elapsed = time.perf_counter() - start
+    size = Path(args.output).stat().st_size
+    print(f"Wrote {written} device(s) to {args.output} in {elapsed:.2f}s "
+          f"({written / elapsed if elapsed else 0:,.0f}/s, {size / max(written, 1):.1f} bytes/device)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Run the in-memory stand-in API server for offline client testing.
+
+Point the client at it with --server-url; it checks signatures with the
+HMAC secret from the client config, so the same config works for both.
+
+Examples:
+  python benchmarks/standin_server.py --port 3000
+  python benchmarks/standin_server.py --port 3000 --faults server_faults.json
+  curl http://127.0.0.1:3000/health
+  python main.py --server-url http://127.0.0.1:3000 --mock --unlock
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.api.standin import StandInServer
+from src.utils.config import Config
+from src.utils.faults import FaultInjector
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Run the in-memory stand-in API server')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=3000, help='Port to listen on (default: 3000)')
+    parser.add_argument('--config', help='Client config whose HMAC secret requests are signed with (default: config.json)')
+    parser.add_argument('--hmac-secret', help='HMAC secret (default: the client config value)')
+    parser.add_argument('--faults', metavar='FILE', help="Fault file; rules with the 'server' target apply")
+    parser.add_argument('--auth-key-expiry', type=int, default=300, help='Auth key lifetime in seconds')
+    args = parser.parse_args()
+
+    secret = args.hmac_secret or Config.load(args.config or 'config.json').client.hmac_secret
+    faults = FaultInjector()
+    if args.faults:
+        faults.load(args.faults)
+
+    server = StandInServer(secret, host=args.host, port=args.port, faults=faults,
+                           auth_key_expiry=args.auth_key_expiry)
+    print(f"Stand-in API server listening on {server.url}")
+    try:
+        server.serve_forever()
+    finally:
+        print(f"Served: {server.summary()}")
+        if faults.enabled:
+            for rule in faults.summary():
+                print(f"  {rule['target']} {rule['match']} {rule['kind']}: fired {rule['fired']}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
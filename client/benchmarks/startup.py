@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark and import-time report for main.py subcommands.
+
+Each subcommand is run in a fresh interpreter so results include
+interpreter startup and every import the command pulls in.
+
+Examples:
+  python benchmarks/startup.py                          # Time every subcommand
+  python benchmarks/startup.py --runs 20 --output startup.json
+  python benchmarks/startup.py --baseline startup.json  # Fail on regressions
+  python benchmarks/startup.py --import-report detect   # Slowest imports for one command
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CLIENT_DIR = Path(__file__).resolve().parent.parent
+MAIN = CLIENT_DIR / 'main.py'
+
+
+def subcommands(workdir: Path) -> dict:
+    """Argument vectors that exercise each startup path without hardware or a server."""
+    empty_logs = workdir / 'empty_logs'
+    empty_logs.mkdir(exist_ok=True)
+
+    return {
+        'help': ['--help'],
+        'trace-summary': ['--trace-summary', '--log-dir', str(empty_logs)],
+        'remote-status': ['--remote', '--status', '--socket', str(workdir / 'no-daemon.sock')],
+        'detect': ['--detect', '--quiet', '--no-color', '--config', str(workdir / 'config.json')],
+    }
+
+
+def run_once(argv: list, workdir: Path, extra_flags: list = None) -> subprocess.CompletedProcess:
+    cmd = [sys.executable] + (extra_flags or []) + [str(MAIN)] + argv
+    return subprocess.run(cmd, cwd=workdir, capture_output=True, text=True)
+
+
+def time_command(argv: list, workdir: Path, runs: int, warmup: int) -> dict:
+    """Time a subcommand over several fresh processes."""
+    for _ in range(warmup):
+        run_once(argv, workdir)  # populate __pycache__ and the OS file cache
+
+    samples = []
+    exit_code = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = run_once(argv, workdir)
+        samples.append((time.perf_counter() - start) * 1000)
+        exit_code = result.returncode
+
+    return {
+        'runs': runs,
+        'exit_code': exit_code,
+        'min_ms': round(min(samples), 2),
+        'median_ms': round(statistics.median(samples), 2),
+        'mean_ms': round(statistics.mean(samples), 2),
+        'max_ms': round(max(samples), 2)
+    }
+
+
+def import_report(argv: list, workdir: Path, limit: int) -> list:
+    """Parse `python -X importtime` output into the slowest top-level imports."""
+    result = run_once(argv, workdir, ['-X', 'importtime'])
+    rows = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        name = name[1:].rstrip()  # drop the separator space, keep nesting indent
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append({
+            'module': name.strip(),
+            'depth': depth,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000
+        })
+
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:limit]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Measure main.py cold start per subcommand')
+    parser.add_argument('--runs', type=int, default=10, help='Timed runs per subcommand (default: 10)')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed warmup runs (default: 1)')
+    parser.add_argument('--only', action='append', help='Only run the named subcommand (repeatable)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare medians against a previous JSON result')
+    parser.add_argument('--max-regression', type=float, default=0.20,
+                        help='Allowed median slowdown versus baseline (default: 0.20 = 20%%)')
+    parser.add_argument('--import-report', metavar='SUBCOMMAND',
+                        help='Print the slowest imports for one subcommand and exit')
+    parser.add_argument('--limit', type=int, default=25, help='Rows in the import report (default: 25)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='startup-bench-') as tmp:
+        workdir = Path(tmp)
+        commands = subcommands(workdir)
+
+        if args.import_report:
+            if args.import_report not in commands:
+                parser.error(f"unknown subcommand {args.import_report!r}; choose from {', '.join(commands)}")
+
+            print(f"{'Cumulative ms':>14} {'Self ms':>9}  Module")
+            for row in import_report(commands[args.import_report], workdir, args.limit):
+                indent = '  ' * row['depth']
+                print(f"{row['cumulative_ms']:>14.2f} {row['self_ms']:>9.2f}  {indent}{row['module']}")
+            return 0
+
+        results = {
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'subcommands': {}
+        }
+
+        for name, argv in commands.items():
+            if args.only and name not in args.only:
+                continue
+            results['subcommands'][name] = time_command(argv, workdir, args.runs, args.warmup)
+
+    print(f"{'Subcommand':<16} {'Min ms':>8} {'Median ms':>10} {'Max ms':>8}  Exit")
+    for name, row in results['subcommands'].items():
+        print(f"{name:<16} {row['min_ms']:>8.1f} {row['median_ms']:>10.1f} {row['max_ms']:>8.1f}  {row['exit_code']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['subcommands']
+
+        regressions = []
+        for name, row in results['subcommands'].items():
+            if name not in baseline:
+                continue
+            before = baseline[name]['median_ms']
+            if row['median_ms'] > before * (1 + args.max_regression):
+                regressions.append(f"{name}: {before:.1f}ms -> {row['median_ms']:.1f}ms")
+
+        if regressions:
+            print("\nStartup regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,16 +7,19 @@ A comprehensive tool for unlocking Android devices via EDL, BROM, and Mi Assista
 import sys
 import os
 import argparse
+import atexit
 import asyncio
 from pathlib import Path
 
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from src.core.client import XiaomiUnlockClient
+# Keep module-level imports to the standard library and light local modules:
+# heavy dependencies load only once a command actually needs them.
 from src.utils.logger import setup_logger
-from src.utils.config import Config
-from src.ui.cli import CLI
+
+# Set by --profile; run_async() installs it on every event loop
+_profiler = None
 
 def main():
     """Main entry point for the Xiaomi Unlock Client."""
@@ -29,6 +32,13 @@ Examples:
   python main.py --unlock --mode edl         # Unlock device in EDL mode
   python main.py --config config.json       # Use custom config file
   python main.py --mock                     # Use mock device for testing
+  python main.py --mock --virtual-time      # Mock run without waiting out simulated work
+  python main.py --batch jobs.jsonl --parallel 4   # Process a queue of unlock jobs
+  python main.py --daemon                   # Keep a warm client running in the background
+  python main.py --remote --detect          # Ask the running daemon for devices
+  python main.py --unlock --log-format json  # Structured JSONL logs for log shipping
+  python main.py --unlock --record session.jsonl.gz   # Record API traffic for later replay
+  python main.py --unlock --replay session.jsonl.gz --replay-speed 0   # Rerun it offline
         """
     )
     
@@ -40,6 +50,10 @@ Examples:
                        help='API server URL',
                        default='http://localhost:3000')
     
+    parser.add_argument('--transport',
+                       choices=['auto', 'aiohttp', 'http2', 'requests'],
+                       help='HTTP transport for API requests (default: server.transport from config)')
+    
     parser.add_argument('--detect', '-d',
                        action='store_true',
                        help='Detect connected devices')
@@ -59,10 +73,140 @@ Examples:
     parser.add_argument('--serial',
                        help='Device serial number')
     
+    parser.add_argument('--batch',
+                       metavar='JOBS_FILE',
+                       help='Process unlock jobs from a JSONL file')
+    
+    parser.add_argument('--batch-output',
+                       metavar='RESULTS_FILE',
+                       default='batch_results.jsonl',
+                       help='JSONL file to append batch results to ("-" for stdout)')
+    
+    parser.add_argument('--parallel',
+                       type=int,
+                       default=1,
+                       help='Number of batch jobs to run concurrently (default: 1)')
+    
+    parser.add_argument('--wait-timeout',
+                       type=int,
+                       default=300,
+                       help='Seconds to wait for each batch device to appear (default: 300)')
+    
+    parser.add_argument('--resume',
+                       action='store_true',
+                       help='Resume operations interrupted by a crash')
+    
+    parser.add_argument('--status',
+                       action='store_true',
+                       help='Show daemon status (with --remote)')
+    
+    parser.add_argument('--history',
+                       action='store_true',
+                       help='Show operation history')
+    
+    parser.add_argument('--history-device',
+                       metavar='DEVICE',
+                       help='Only show history for this device ID or serial number')
+    
+    parser.add_argument('--history-status',
+                       choices=['started', 'in_progress', 'completed', 'failed'],
+                       help='Only show operations with this status')
+    
+    parser.add_argument('--history-type',
+                       choices=['frp_unlock', 'edl_bypass', 'bootloader_unlock', 'mi_unlock'],
+                       help='Only show operations of this type')
+    
+    parser.add_argument('--history-search',
+                       metavar='TEXT',
+                       help='Search operation IDs, devices, models and errors')
+    
+    parser.add_argument('--history-limit',
+                       type=int,
+                       default=50,
+                       help='Maximum operations to show (default: 50)')
+    
+    parser.add_argument('--history-stats',
+                       action='store_true',
+                       help='Show history statistics')
+    
+    parser.add_argument('--offline',
+                       action='store_true',
+                       help='Show history from the local store without syncing')
+    
+    parser.add_argument('--daemon',
+                       action='store_true',
+                       help='Run as a long-lived daemon serving requests on a local socket')
+    
+    parser.add_argument('--remote',
+                       action='store_true',
+                       help='Send --detect/--unlock/--status/--history to a running daemon')
+    
+    parser.add_argument('--stop-daemon',
+                       action='store_true',
+                       help='Ask a running daemon to shut down')
+    
+    parser.add_argument('--socket',
+                       help='Daemon socket path')
+    
+    parser.add_argument('--trace-summary',
+                       action='store_true',
+                       help='Show the slowest stages across saved operation logs')
+    
+    parser.add_argument('--trace-export',
+                       metavar='TRACE_FILE',
+                       help='Export saved operation logs as a Chrome trace-event file')
+    
+    parser.add_argument('--log-dir',
+                       default='logs',
+                       help='Directory containing saved operation logs (default: logs)')
+    
+    parser.add_argument('--metrics-port',
+                       type=int,
+                       help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics')
+    
+    parser.add_argument('--metrics-file',
+                       help='Write Prometheus metrics to this file on exit')
+    
+    parser.add_argument('--trace-file',
+                       help='Record spans for unlock stages and API calls and write them to this Chrome trace file on exit')
+    
+    parser.add_argument('--loop-lag-threshold',
+                       type=int,
+                       metavar='MS',
+                       help='Report event loop stalls longer than MS milliseconds with the blocking stack')
+    
+    parser.add_argument('--profile',
+                       nargs='?',
+                       const='profiles',
+                       metavar='DIR',
+                       help='Profile this run and write per-phase CPU profiles, sampled stacks and task timings to DIR (default: profiles)')
+    
+    parser.add_argument('--faults',
+                       metavar='FILE',
+                       help='Inject the API, command and device faults described in this JSON file')
+    
+    parser.add_argument('--record',
+                       metavar='FILE',
+                       help='Record every API request and response, with timing, to this cassette file (.gz to compress)')
+    
+    parser.add_argument('--replay',
+                       metavar='FILE',
+                       help='Answer API requests from a recorded cassette instead of the server')
+    
+    parser.add_argument('--replay-speed',
+                       type=float,
+                       default=1.0,
+                       metavar='X',
+                       help='Replay recorded response times X times faster; 0 replays as fast as possible (default: 1)')
+    
     parser.add_argument('--mock',
                        action='store_true',
                        help='Use mock device for testing')
     
+    parser.add_argument('--virtual-time',
+                       action='store_true',
+                       help='With --mock, run simulated device work on a virtual clock that skips idle waits')
+    
     parser.add_argument('--verbose', '-v',
                        action='count',
                        default=0,
@@ -76,17 +220,50 @@ Examples:
                        action='store_true',
                        help='Disable colored output')
     
+    parser.add_argument('--log-format',
+                       choices=['text', 'json'],
+                       default='text',
+                       help='Log output format; json writes one JSON object per line (default: text)')
+    
+    parser.add_argument('--json-backend',
+                       choices=['auto', 'orjson', 'json'],
+                       default='auto',
+                       help='Serializer for --log-format json (default: orjson if installed)')
+    
     args = parser.parse_args()
+    if args.virtual_time and not args.mock:
+        parser.error('--virtual-time requires --mock')
+    if args.record and args.replay:
+        parser.error('--record and --replay cannot be combined')
+    
+    profiler = start_profiler(args)
+    
+    # Offline log analysis needs neither config nor a client
+    if args.trace_summary or args.trace_export:
+        return run_trace_mode(args)
+    
+    # The daemon already holds a warm client; stay thin and just talk to it
+    if args.remote or args.stop_daemon:
+        return asyncio.run(run_remote_mode(args))
     
     # Setup logging
     log_level = 'ERROR' if args.quiet else ['INFO', 'DEBUG', 'TRACE'][min(args.verbose, 2)]
-    logger = setup_logger(log_level, not args.no_color)
+    logger = setup_logger(log_level, not args.no_color,
+                          log_format=args.log_format, json_backend=args.json_backend)
+    
+    from src.utils.config import Config
+    from src.ui.cli import CLI
+    from src.core.client import XiaomiUnlockClient
     
     # Load configuration
+    if profiler:
+        profiler.enter('config_load')
     try:
         config = Config.load(args.config)
         if args.server_url:
             config.server.url = args.server_url
+        if args.transport:
+            config.server.transport = args.transport
     except Exception as e:
         logger.error(f"Failed to load configuration: {e}")
         return 1
@@ -96,21 +273,46 @@ Examples:
     
     # Initialize client
     try:
-        client = XiaomiUnlockClient(config, logger, cli)
+        client = XiaomiUnlockClient(config, logger, cli, clock=make_clock(args))
     except Exception as e:
         logger.error(f"Failed to initialize client: {e}")
         return 1
     
+    start_metrics(config, args, logger)
+    start_tracing(config, args)
+    watchdog = start_watchdog(config, args, logger)
+    try:
+        start_faults(config, args, logger)
+    except Exception as e:
+        logger.error(f"Failed to load fault file: {e}")
+        return 1
+    try:
+        start_cassette(client, args, logger)
+    except Exception as e:
+        logger.error(f"Failed to open cassette: {e}")
+        return 1
+    
+    if profiler:
+        profiler.enter('run')
+    
     # Run the appropriate action
     try:
-        if args.mock:
-            return asyncio.run(run_mock_mode(client, args))
+        if args.daemon:
+            return run_async(run_daemon_mode(client, args), watchdog, api_client=client.api_client)
+        elif args.batch:
+            return run_async(run_batch_mode(client, args), watchdog, api_client=client.api_client)
+        elif args.resume:
+            return run_async(run_resume_mode(client, args), watchdog, api_client=client.api_client)
+        elif args.mock:
+            return run_async(run_mock_mode(client, args), watchdog, client.clock, client.api_client)
         elif args.detect:
-            return asyncio.run(run_detect_mode(client, args))
+            return run_async(run_detect_mode(client, args), watchdog, api_client=client.api_client)
         elif args.unlock:
-            return asyncio.run(run_unlock_mode(client, args))
+            return run_async(run_unlock_mode(client, args), watchdog, api_client=client.api_client)
+        elif args.history:
+            return run_async(run_history_mode(client, args), watchdog, api_client=client.api_client)
         else:
-            return asyncio.run(run_interactive_mode(client, args))
+            return run_async(run_interactive_mode(client, args), watchdog, api_client=client.api_client)
     except KeyboardInterrupt:
         logger.info("Operation cancelled by user")
         return 130
@@ -118,6 +320,25 @@ Examples:
         logger.error(f"Unexpected error: {e}")
         return 1
 
+def run_trace_mode(args):
+    """Summarize or export timing data from saved operation logs."""
+    from src.utils.timing import load_operation_logs, summarize_stages, format_stage_summary, write_chrome_trace
+    
+    logs = load_operation_logs(args.log_dir)
+    if not logs:
+        print(f"No operation logs with timing data found in {args.log_dir}")
+        return 1
+    
+    if args.trace_export:
+        write_chrome_trace(logs, args.trace_export)
+        print(f"Wrote {len(logs)} operation(s) to {args.trace_export}")
+    
+    if args.trace_summary:
+        print(f"Slowest stages across {len(logs)} operation(s):")
+        print(format_stage_summary(summarize_stages(logs)))
+    
+    return 0
+
 async def run_detect_mode(client, args):
     """Run device detection mode."""
     devices = await client.detect_devices()
@@ -146,6 +367,242 @@ async def run_unlock_mode(client, args):
     
     return 0 if success else 1
 
+def start_metrics(config, args, logger):
+    """Start the metrics endpoint and/or register the exit-time dump, if configured."""
+    port = args.metrics_port if args.metrics_port is not None else config.advanced.metrics_port
+    metrics_file = args.metrics_file or config.advanced.metrics_file
+    if port is None and not metrics_file:
+        return
+    
+    from src.utils.metrics import REGISTRY, MetricsServer
+    
+    if port is not None:
+        server = MetricsServer(REGISTRY, port=port)
+        try:
+            server.start()
+            logger.info(f"Serving metrics on http://{server.host}:{server.port}/metrics")
+        except OSError as e:
+            logger.warning(f"Could not start metrics server on port {port}: {e}")
+    
+    if metrics_file:
+        atexit.register(REGISTRY.dump, metrics_file)
+
+def start_tracing(config, args):
+    """Enable span recording and export the spans at exit, if configured."""
+    trace_file = args.trace_file or config.advanced.trace_file
+    if not trace_file:
+        return
+    
+    from src.utils.tracing import tracer
+    
+    tracer.configure(trace_file)
+    atexit.register(tracer.export)
+
+def start_faults(config, args, logger):
+    """Enable fault injection from a fault file, if configured, and report what fired at exit."""
+    fault_file = args.faults or config.advanced.fault_file
+    if not fault_file:
+        return
+    
+    from src.utils.faults import faults
+    
+    faults.load(fault_file)
+    logger.warning(f"Fault injection enabled from {fault_file} ({len(faults.rules)} rule(s))")
+    
+    def report():
+        for rule in faults.summary():
+            logger.info(f"Fault {rule['target']} {rule['match']} {rule['kind']}: fired {rule['fired']} time(s)")
+    
+    atexit.register(report)
+
+def start_cassette(client, args, logger):
+    """Record API traffic to, or replay it from, a cassette file if requested."""
+    if not args.record and not args.replay:
+        return
+    
+    from src.api.cassette import Cassette
+    
+    if args.record:
+        cassette = Cassette(args.record, 'record')
+        logger.info(f"Recording API traffic to {args.record}")
+    else:
+        cassette = Cassette(args.replay, 'replay', speed=args.replay_speed)
+        logger.warning(f"Replaying API traffic from {args.replay}; the server will not be contacted")
+    client.api_client.cassette = cassette
+    
+    def report():
+        cassette.close()
+        summary = cassette.summary()
+        logger.info("Cassette %s: %s", summary.pop('file'),
+                    ', '.join(f"{key} {value}" for key, value in summary.items()))
+    
+    atexit.register(report)
+
+def start_watchdog(config, args, logger):
+    """Create the event loop lag watchdog, if configured, and report its findings at exit."""
+    threshold_ms = args.loop_lag_threshold or config.advanced.loop_lag_threshold_ms
+    if not threshold_ms:
+        return None
+    
+    from src.utils.watchdog import LoopLagMonitor
+    
+    watchdog = LoopLagMonitor(threshold=threshold_ms / 1000, logger=logger)
+    atexit.register(lambda: logger.info(watchdog.format_report()))
+    return watchdog
+
+def start_profiler(args):
+    """Start whole-run profiling if requested; outputs are written at exit."""
+    global _profiler
+    if not args.profile:
+        return None
+    
+    from src.utils.profiling import Profiler
+    
+    profiler = Profiler(args.profile)
+    profiler.start()
+    
+    def finish():
+        profiler.stop()
+        print(f"Profile written to {profiler.output_dir}", file=sys.stderr)
+    
+    # Registered before anything else so it runs last, after logging and
+    # metrics have shut down
+    atexit.register(finish)
+    _profiler = profiler
+    return profiler
+
+def make_clock(args):
+    """The clock simulated device work runs on: virtual with --virtual-time, else real."""
+    from src.utils.clock import SYSTEM_CLOCK, VirtualClock
+    return VirtualClock() if args.virtual_time else SYSTEM_CLOCK
+
+def run_async(coro, watchdog=None, clock=None, api_client=None):
+    """asyncio.run() (on the clock's loop) inside the API client's session,
+    with the lag watchdog watching the loop when enabled."""
+    run = clock.run if clock is not None else asyncio.run
+    
+    async def monitored():
+        if _profiler is not None:
+            _profiler.install(asyncio.get_running_loop())
+        if watchdog is not None:
+            watchdog.start()
+        try:
+            if api_client is None:
+                return await coro
+            # Opens the configured transport for the whole run
+            async with api_client:
+                return await coro
+        finally:
+            if watchdog is not None:
+                watchdog.stop()
+    
+    return run(monitored())
+
+async def run_history_mode(client, args):
+    """Show operation history."""
+    await client.show_operation_history(
+        device=args.history_device,
+        status=args.history_status,
+        operation_type=args.history_type,
+        search=args.history_search,
+        limit=args.history_limit,
+        show_stats=args.history_stats,
+        offline=args.offline
+    )
+    return 0
+
+async def run_daemon_mode(client, args):
+    """Run the long-lived daemon."""
+    from src.core.daemon import UnlockDaemon, DEFAULT_SOCKET_PATH
+    
+    daemon = UnlockDaemon(client, socket_path=args.socket or DEFAULT_SOCKET_PATH)
+    await daemon.serve()
+    return 0
+
+async def run_remote_mode(args):
+    """Forward a command to a running daemon."""
+    from src.core.daemon import DaemonClient, RPCError, DEFAULT_SOCKET_PATH
+    
+    daemon = DaemonClient(args.socket or DEFAULT_SOCKET_PATH)
+    
+    try:
+        if args.stop_daemon:
+            await daemon.call('shutdown')
+            print("Daemon stopping")
+            return 0
+        
+        if args.detect:
+            result = await daemon.call('detect')
+            devices = result['devices']
+            if not devices:
+                print("No devices detected")
+                return 1
+            print(f"Found {len(devices)} device(s):")
+            for device in devices:
+                print(f"  - {device['model']} ({device['serialNumber']}) - {device['mode'].upper()} mode")
+            return 0
+        
+        if args.unlock:
+            params = {'serial': args.serial, 'device_id': args.device_id}
+            if args.mode != 'auto':
+                params['mode'] = args.mode
+            result = await daemon.call('unlock', **params)
+            device = result['device']
+            outcome = "unlocked" if result['success'] else "unlock failed"
+            print(f"{device['model']} ({device['serialNumber']}): {outcome} in {result['duration']:.1f}s")
+            return 0 if result['success'] else 1
+        
+        if args.history:
+            result = await daemon.call(
+                'history',
+                device=args.history_device,
+                status=args.history_status,
+                operation_type=args.history_type,
+                search=args.history_search,
+                limit=args.history_limit,
+                offline=args.offline
+            )
+            for op in result.get('operations', []):
+                print(f"  - Operation {op['id']}: {op['operationType']} - {op['status'].upper()} ({op['startedAt']})")
+            return 0
+        
+        status = await daemon.call('status')
+        for key, value in status.items():
+            print(f"{key}: {value}")
+        return 0
+    
+    except RPCError as e:
+        print(f"Daemon error: {e}", file=sys.stderr)
+        return 1
+
+async def run_batch_mode(client, args):
+    """Run unlock jobs from a JSONL file."""
+    from src.core.batch import BatchRunner, BatchResultWriter, load_jobs
+    
+    try:
+        jobs = load_jobs(args.batch)
+    except (OSError, ValueError) as e:
+        client.cli.error(f"Failed to load batch jobs: {e}")
+        return 1
+    
+    if not jobs:
+        client.cli.warning("No jobs found in batch file")
+        return 0
+    
+    runner = BatchRunner(client, parallel=args.parallel, wait_timeout=args.wait_timeout)
+    
+    with BatchResultWriter(args.batch_output) as writer:
+        summary = await runner.run(jobs, writer)
+    
+    client.cli.info(f"Batch finished: {summary['succeeded']}/{summary['total']} succeeded, "
+                    f"{summary['failed']} failed")
+    return 0 if summary['failed'] == 0 else 1
+
+async def run_resume_mode(client, args):
+    """Resume checkpointed operations."""
+    success = await client.resume_interrupted()
+    return 0 if success else 1
+
 async def run_mock_mode(client, args):
     """Run with mock device for testing."""
     client.cli.info("Running in mock mode...")
@@ -182,4 +639,7 @@ async def run_interactive_mode(client, args):
     return 0
 
 if __name__ == '__main__':
-    sys.exit(main())
+    exit_code = main()
+    if _profiler is not None:
+        _profiler.enter('shutdown')
+    sys.exit(exit_code)
@@ -0,0 +1,179 @@
+"""Record APIClient traffic with its timing to a cassette file, and replay it without a server.
+
+A cassette is a header line followed by one compact JSON row per request
+attempt. Timeouts and connection errors are recorded too, so a failing
+session replays its retries. Paths ending in .gz are gzip-compressed.
+
+Replay matches attempts by method and endpoint (query included), first
+recorded first served, and never touches the network. Each replayed
+attempt takes its recorded time divided by ``speed``; speed 0 replays as
+fast as possible.
+"""
+
+import asyncio
+import gzip
+import json
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Tuple
+
+from .transport import Transport, TransportResponse
+
+CASSETTE_VERSION = 1
+
+# status is the HTTP status, or 'timeout'/'error' for attempts that got no response
+COLUMNS = ('offset', 'method', 'endpoint', 'request', 'status', 'elapsed', 'response')
+
+MODES = ('record', 'replay')
+
+
+class CassetteMismatch(Exception):
+    """Replay was asked for a request the cassette has no (more) recordings of."""
+
+
+class Cassette:
+    """One cassette file, open for recording or replay."""
+
+    def __init__(self, file_path: str, mode: str = 'record', speed: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of {', '.join(MODES)})")
+        if speed < 0:
+            raise ValueError("Replay speed cannot be negative")
+
+        self.path = Path(file_path)
+        self.mode = mode
+        self.speed = speed
+        self.recorded = 0
+        self.replayed = 0
+        self.mismatches = 0
+        self._file = None
+        self._origin = time.perf_counter()
+        self._exchanges: Dict[Tuple[str, str], deque] = defaultdict(deque)
+
+        if mode == 'replay':
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    # Recording
+
+    def add(self, method: str, endpoint: str, request: Any, status, elapsed: float, response: Any):
+        """Append one attempt to the cassette."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = _open(self.path, 'wt')
+            self._file.write(json.dumps({
+                'cassette': CASSETTE_VERSION,
+                'recordedAt': datetime.now(timezone.utc).isoformat(),
+                'columns': COLUMNS
+            }) + '\n')
+
+        offset = time.perf_counter() - self._origin - elapsed
+        row = [round(offset, 4), method, endpoint, request, status, round(elapsed, 4), response]
+        self._file.write(json.dumps(row, separators=(',', ':'), ensure_ascii=False, default=str) + '\n')
+        # Keep what was recorded so far if the session crashes
+        self._file.flush()
+        self.recorded += 1
+
+    def wrap(self, transport: Transport, base_url: str) -> Transport:
+        """Transport that records what goes through ``transport``, or replays without it.
+
+        Rows are keyed by the URL below ``base_url``, so a cassette replays
+        against any server address.
+        """
+        if self.replaying:
+            return _ReplayTransport(self, base_url)
+        return _RecordingTransport(self, transport, base_url)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Replay
+
+    def _load(self):
+        with _open(self.path, 'rt') as f:
+            header = json.loads(f.readline())
+            if header.get('cassette') != CASSETTE_VERSION or list(header.get('columns', [])) != list(COLUMNS):
+                raise ValueError(f"{self.path} is not a version {CASSETTE_VERSION} cassette")
+            for line in f:
+                if line.strip():
+                    row = dict(zip(COLUMNS, json.loads(line)))
+                    self._exchanges[(row['method'], row['endpoint'])].append(row)
+
+    def _next(self, method: str, endpoint: str) -> Dict[str, Any]:
+        queue = self._exchanges.get((method, endpoint))
+        if not queue:
+            self.mismatches += 1
+            raise CassetteMismatch(f"No recorded {method} {endpoint} left in {self.path}")
+        self.replayed += 1
+        return queue.popleft()
+
+    def summary(self) -> Dict[str, Any]:
+        if self.recording:
+            return {'mode': self.mode, 'file': str(self.path), 'recorded': self.recorded}
+        return {
+            'mode': self.mode,
+            'file': str(self.path),
+            'replayed': self.replayed,
+            'unused': sum(len(queue) for queue in self._exchanges.values()),
+            'mismatches': self.mismatches
+        }
+
+
+class _RecordingTransport(Transport):
+    name = 'record'
+
+    def __init__(self, cassette: Cassette, inner: Transport, base_url: str):
+        self._cassette = cassette
+        self._inner = inner
+        self._base_url = base_url
+
+    async def request(self, method, url, headers, body, timeout):
+        exchange = (method, url[len(self._base_url):], json.loads(body) if body else None)
+        start = time.perf_counter()
+        try:
+            response = await self._inner.request(method, url, headers, body, timeout)
+        except Exception as e:
+            self._cassette.add(*exchange, _failure(e), time.perf_counter() - start, None)
+            raise
+        self._cassette.add(*exchange, response.status, time.perf_counter() - start, response.body)
+        return response
+
+
+class _ReplayTransport(Transport):
+    name = 'replay'
+
+    def __init__(self, cassette: Cassette, base_url: str):
+        self._cassette = cassette
+        self._base_url = base_url
+
+    async def request(self, method, url, headers, body, timeout):
+        endpoint = url[len(self._base_url):]
+        row = self._cassette._next(method, endpoint)
+        if self._cassette.speed:
+            await asyncio.sleep(row['elapsed'] / self._cassette.speed)
+        if row['status'] == 'timeout':
+            raise asyncio.TimeoutError(f"Recorded timeout on {method} {endpoint}")
+        if row['status'] == 'error':
+            raise ConnectionError(f"Recorded connection error on {method} {endpoint}")
+        return TransportResponse(row['status'], row['response'])
+
+
+def _failure(error: BaseException) -> str:
+    return 'timeout' if isinstance(error, asyncio.TimeoutError) else 'error'
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == '.gz':
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
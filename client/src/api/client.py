@@ -1,40 +1,97 @@
 """API client for communicating with the Xiaomi Unlock Server."""
 
 import asyncio
+import contextvars
+import copy
+import functools
 import hashlib
 import hmac
 import json
 import time
-from typing import Dict, Any, Optional, List
-from urllib.parse import urljoin
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+from urllib.parse import urljoin, urlencode
 
-import aiohttp
-import requests
+# aiohttp and requests are imported by the transports when used: together
+# they are most of the client's import time and many commands never touch
+# the network.
 
+from .transport import Transport, TransportResponse, RequestsTransport, create_transport
 from ..utils.config import Config
+from ..utils.deadline import DeadlineExceeded, clamp_timeout, within_deadline
+from ..utils.faults import faults
+from ..utils.logger import LazyLogger
+from ..utils.metrics import API_REQUESTS, API_REQUEST_SECONDS, API_RETRIES, API_COALESCED
+from ..utils.tracing import tracer
+
+
+# Idempotent methods: concurrent identical calls share one in-flight request
+COALESCED_METHODS = ('GET',)
+
+
+def _route(endpoint: str) -> str:
+    """Endpoint with query and id segments removed, for low-cardinality metric labels."""
+    segments = endpoint.split('?', 1)[0].split('/')
+    return '/'.join(':id' if segment.isdigit() or len(segment) >= 16 else segment for segment in segments)
 
 
 class APIClient:
     """Client for API communication with the server."""
     
-    def __init__(self, config: Config, logger):
+    def __init__(self, config: Config, logger, transport: Optional[Transport] = None, keepalive: bool = True):
         self.config = config
-        self.logger = logger
+        self.logger = LazyLogger.wrap(logger)
         self.base_url = config.get_api_base_url()
-        self.session = None
+        # Used as given when set; otherwise built from config.server.transport on entry
+        self.transport = transport
+        self.keepalive = keepalive
+        self._owns_transport = False
+        self._opened = False
+        self._depth = 0
+        self._fallback = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Set to a Cassette to record traffic, or to replay it instead of calling the server
+        self.cassette = None
         
     async def __aenter__(self):
-        """Async context manager entry."""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.config.server.timeout),
-            headers={'User-Agent': self.config.client.user_agent}
-        )
+        """Async context manager entry; nested entries share the outermost one's transport.
+
+        The transport (and its HTTP library) is opened on the first request,
+        so runs that never contact the server don't pay for it.
+        """
+        self._depth += 1
+        if self._depth > 1:
+            return self
+        if self.transport is None:
+            self.transport = create_transport(self.config.server.transport, self.config, self.keepalive)
+            self._owns_transport = True
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self.session:
-            await self.session.close()
+        self._depth -= 1
+        if self._depth > 0 or self.transport is None:
+            return
+        if self._opened:
+            await self.transport.close()
+            self._opened = False
+        if self._owns_transport:
+            self.transport = None
+            self._owns_transport = False
+    
+    async def _active_transport(self) -> Transport:
+        """The client's transport, or blocking requests when used outside `async with`."""
+        if self.transport is not None:
+            if not self._opened:
+                # open() is idempotent, so concurrent first requests may both call it
+                await self.transport.open()
+                self._opened = True
+            return self.transport
+        if self._fallback is None:
+            self.logger.warning(
+                "API client used outside 'async with'; server.transport '%s' is ignored and "
+                "blocking requests will stall the event loop", self.config.server.transport)
+            self._fallback = RequestsTransport(self.config.client.user_agent)
+        return self._fallback
     
     def _generate_signature(self, method: str, path: str, body: str, timestamp: int) -> str:
         """Generate HMAC signature for request."""
@@ -46,6 +103,17 @@ class APIClient:
         ).hexdigest()
         return signature
     
+    @staticmethod
+    def _encode_body(method: str, data: Optional[Dict]) -> str:
+        """Request body as the server's HMAC check re-serializes it.
+
+        The server signs JSON.stringify() of the parsed body: compact, with
+        non-ASCII kept as is, and "{}" when a non-GET request has none.
+        """
+        if method == 'GET':
+            return ""
+        return json.dumps(data or {}, separators=(',', ':'), ensure_ascii=False)
+    
     def _get_headers(self, method: str, path: str, body: str = "") -> Dict[str, str]:
         """Get headers with HMAC signature."""
         timestamp = int(time.time())
@@ -59,104 +127,155 @@ class APIClient:
             'User-Agent': self.config.client.user_agent
         }
     
+    async def _coalesced(self, method: str, endpoint: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Singleflight: run call() once for every concurrent caller of the same method and endpoint.
+
+        The request runs as its own task in a fresh context, so it carries no
+        caller's deadline or trace span and cancelling one waiter doesn't
+        cancel it for the rest. Each waiter gives up at its own deadline.
+        Later callers get a copy of the result so none of them can change
+        what the others see.
+        """
+        key = f"{method} {endpoint}"
+        task = self._inflight.get(key)
+        if task is not None:
+            API_COALESCED.labels(method, _route(endpoint)).inc()
+            return copy.deepcopy(await within_deadline(asyncio.shield(task)))
+        
+        task = contextvars.Context().run(asyncio.ensure_future, call())
+        self._inflight[key] = task
+        task.add_done_callback(functools.partial(self._inflight_done, key))
+        return await within_deadline(asyncio.shield(task))
+    
+    def _inflight_done(self, key: str, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        # Retrieve the outcome so it isn't reported as never retrieved when every waiter gave up
+        if not task.cancelled():
+            task.exception()
+    
     async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Optional[Dict]:
-        """Make an HTTP request with retries."""
-        url = urljoin(self.base_url, endpoint)
-        path = f"/api{endpoint}"
-        body = json.dumps(data) if data else ""
+        """Make an HTTP request with retries, sharing identical idempotent requests already in flight."""
+        if method in COALESCED_METHODS and data is None:
+            return await self._coalesced(method, endpoint, lambda: self._traced_request(method, endpoint, data))
+        return await self._traced_request(method, endpoint, data)
+    
+    async def _traced_request(self, method: str, endpoint: str, data: Optional[Dict]) -> Optional[Dict]:
+        route = _route(endpoint)
+        start = time.perf_counter()
+        with tracer.span(f"{method} {route}", **{'http.method': method, 'http.route': route}) as span:
+            try:
+                result = await self._request_with_retries(method, endpoint, route, data, span)
+                span.set_attribute('success', result is not None)
+                return result
+            finally:
+                API_REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - start)
+    
+    async def _request_with_retries(self, method: str, endpoint: str, route: str, data: Optional[Dict], span) -> Optional[Dict]:
+        # Concatenate: urljoin would drop base_url's /api prefix for an absolute endpoint
+        url = self.base_url + endpoint
+        # The server verifies the path below /api, without the query string
+        path = endpoint.split('?', 1)[0]
+        body = self._encode_body(method, data)
         headers = self._get_headers(method, path, body)
+        # Send exactly the bytes that were signed
+        payload = body.encode('utf-8') if data else None
+        # Lets the server's request log be joined to this span
+        headers.update(tracer.headers())
+        
+        transport = await self._active_transport()
+        if self.cassette is not None:
+            transport = self.cassette.wrap(transport, self.base_url)
         
         for attempt in range(self.config.server.retry_attempts):
+            span.set_attribute('attempts', attempt + 1)
             try:
-                if not self.session:
-                    # Fallback to synchronous requests
-                    return self._make_sync_request(method, url, headers, data)
+                # Never let a single attempt outlive the caller's deadline
+                timeout = clamp_timeout(self.config.server.timeout)
+                
+                injected = None
+                if faults.enabled:
+                    injection = await faults.inject('api', f"{method} {route}", timeout)
+                    timeout -= injection.delay
+                    injected = injection.fault
+                    if injected is not None and injected.kind == 'error':
+                        raise ConnectionError(f"Injected connection error on {method} {route}")
+                
+                if injected is not None:
+                    response = TransportResponse(injected.status, injected.response_body())
+                else:
+                    response = await transport.request(method, url, headers, payload, timeout)
+                
+                API_REQUESTS.labels(method, route, response.status).inc()
+                span.set_attribute('http.status_code', response.status)
+                # Error responses may come without a JSON body
+                error_data = response.body if isinstance(response.body, dict) else {}
                 
-                async with self.session.request(
-                    method,
-                    url,
-                    headers=headers,
-                    json=data if data else None
-                ) as response:
+                if 200 <= response.status < 300:
+                    self.logger.debug("API request successful: %s %s", method, endpoint)
+                    return response.body
+                elif response.status == 401:
+                    self.logger.error(f"Authentication failed: {error_data.get('error', 'Unknown error')}")
+                    return None
+                elif response.status == 429:
+                    self.logger.warning("Rate limit exceeded, waiting...")
+                    API_RETRIES.labels(route, 'rate_limited').inc()
+                    await asyncio.sleep(clamp_timeout(self.config.server.retry_delay * (attempt + 1)))
+                    continue
+                else:
+                    self.logger.error(f"API request failed: {response.status} - {error_data.get('error', 'Unknown error')}")
                     
-                    if response.status == 200:
-                        result = await response.json()
-                        self.logger.debug(f"API request successful: {method} {endpoint}")
-                        return result
-                    elif response.status == 401:
-                        error_data = await response.json()
-                        self.logger.error(f"Authentication failed: {error_data.get('error', 'Unknown error')}")
-                        return None
-                    elif response.status == 429:
-                        self.logger.warning("Rate limit exceeded, waiting...")
-                        await asyncio.sleep(self.config.server.retry_delay * (attempt + 1))
+                    if attempt < self.config.server.retry_attempts - 1:
+                        API_RETRIES.labels(route, 'http_error').inc()
+                        await asyncio.sleep(clamp_timeout(self.config.server.retry_delay))
                         continue
-                    else:
-                        error_data = await response.json()
-                        self.logger.error(f"API request failed: {response.status} - {error_data.get('error', 'Unknown error')}")
-                        
-                        if attempt < self.config.server.retry_attempts - 1:
-                            await asyncio.sleep(self.config.server.retry_delay)
-                            continue
-                        return None
-                        
+                    return None
+                    
+            except DeadlineExceeded:
+                raise
             except asyncio.TimeoutError:
-                self.logger.warning(f"Request timeout (attempt {attempt + 1})")
+                self.logger.warning("Request timeout (attempt %s)", attempt + 1)
+                API_REQUESTS.labels(method, route, 'timeout').inc()
                 if attempt < self.config.server.retry_attempts - 1:
-                    await asyncio.sleep(self.config.server.retry_delay)
+                    API_RETRIES.labels(route, 'timeout').inc()
+                    await asyncio.sleep(clamp_timeout(self.config.server.retry_delay))
                     continue
                 self.logger.error("Request failed after all retry attempts")
                 return None
             except Exception as e:
                 self.logger.error(f"Request error: {e}")
+                API_REQUESTS.labels(method, route, 'error').inc()
                 if attempt < self.config.server.retry_attempts - 1:
-                    await asyncio.sleep(self.config.server.retry_delay)
+                    API_RETRIES.labels(route, 'error').inc()
+                    await asyncio.sleep(clamp_timeout(self.config.server.retry_delay))
                     continue
                 return None
         
         return None
     
-    def _make_sync_request(self, method: str, url: str, headers: Dict[str, str], data: Optional[Dict] = None) -> Optional[Dict]:
-        """Make synchronous HTTP request as fallback."""
-        try:
-            response = requests.request(
-                method,
-                url,
-                headers=headers,
-                json=data,
-                timeout=self.config.server.timeout
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                self.logger.error(f"Sync request failed: {response.status_code} - {response.text}")
-                return None
-                
-        except Exception as e:
-            self.logger.error(f"Sync request error: {e}")
-            return None
-    
     async def health_check(self) -> bool:
         """Check server health."""
+        if self.cassette is not None and self.cassette.replaying:
+            # Replay never talks to a server
+            return True
+        
+        return await self._coalesced('GET', '/health', self._check_health)
+    
+    async def _check_health(self) -> bool:
         try:
             # Health endpoint doesn't require HMAC
             url = urljoin(self.config.server.url, '/health')
+            headers = {'User-Agent': self.config.client.user_agent}
+            transport = await self._active_transport()
+            response = await transport.request('GET', url, headers, None, 5)
+            return response.status == 200
             
-            if self.session:
-                async with self.session.get(url) as response:
-                    return response.status == 200
-            else:
-                response = requests.get(url, timeout=5)
-                return response.status_code == 200
-                
         except Exception as e:
             self.logger.error(f"Health check failed: {e}")
             return False
     
     async def request_auth_key(self, device_info: Dict[str, Any]) -> Optional[Dict]:
         """Request authentication key for device."""
-        self.logger.info(f"Requesting auth key for device {device_info.get('serialNumber', 'unknown')}")
+        self.logger.info("Requesting auth key for device %s", device_info.get('serialNumber', 'unknown'))
         
         data = {
             'deviceInfo': device_info
@@ -200,7 +319,7 @@ class APIClient:
     
     async def register_device(self, device_info: Dict[str, Any]) -> bool:
         """Register device with server."""
-        self.logger.info(f"Registering device {device_info.get('serialNumber', 'unknown')}")
+        self.logger.info("Registering device %s", device_info.get('serialNumber', 'unknown'))
         
         result = await self._make_request('POST', '/device/register', device_info)
         
@@ -226,7 +345,7 @@ class APIClient:
     
     async def start_unlock_operation(self, device_id: str, auth_key: str, operation_type: str, metadata: Optional[Dict] = None) -> Optional[Dict]:
         """Start unlock operation."""
-        self.logger.info(f"Starting {operation_type} operation for device {device_id}")
+        self.logger.info("Starting %s operation for device %s", operation_type, device_id)
         
         data = {
             'deviceId': device_id,
@@ -238,7 +357,7 @@ class APIClient:
         result = await self._make_request('POST', '/unlock/start', data)
         
         if result and result.get('success'):
-            self.logger.info(f"Unlock operation started: {result.get('operation', {}).get('id')}")
+            self.logger.info("Unlock operation started: %s", result.get('operation', {}).get('id'))
             return result
         else:
             self.logger.error("Failed to start unlock operation")
@@ -259,7 +378,7 @@ class APIClient:
         result = await self._make_request('PUT', f'/unlock/{operation_id}/status', data)
         
         if result and result.get('success'):
-            self.logger.debug(f"Operation {operation_id} status updated to {status}")
+            self.logger.debug("Operation %s status updated to %s", operation_id, status)
             return True
         return False
     
@@ -287,6 +406,15 @@ class APIClient:
             return result
         return None
     
+    async def get_operations_since(self, since: str, since_id: int = 0, limit: int = 100) -> Optional[Dict]:
+        """Get operations created or updated after a sync cursor, oldest first."""
+        params = urlencode({'since': since, 'sinceId': since_id, 'limit': limit})
+        result = await self._make_request('GET', f'/unlock?{params}')
+        
+        if result and result.get('success'):
+            return result
+        return None
+    
     async def get_operation_stats(self, timeframe: str = '24 hours') -> Optional[Dict]:
         """Get operation statistics."""
         result = await self._make_request('GET', f'/unlock/stats/summary?timeframe={timeframe}')
@@ -0,0 +1,741 @@
+"""In-memory stand-in for the unlock server, for offline end-to-end and load testing.
+
+Implements the endpoints APIClient calls with the same HMAC check,
+validation rules and response shapes as the Node server in ``server/``,
+but keeps devices and operations in memory, so the whole client stack can
+be exercised on one machine with no database. Latency and error profiles
+are fault rules with the ``server`` target, keyed "METHOD /route" on the
+route as registered, e.g.:
+
+  {"target": "server", "kind": "latency", "latency": {"distribution": "lognormal", "median": 0.05, "sigma": 0.5}}
+  {"target": "server", "match": "POST /api/unlock/*", "kind": "status", "status": 503, "probability": 0.01}
+"""
+
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from aiohttp import web
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from ..utils.faults import FaultInjector
+
+VALID_CHIPSETS = ('qualcomm', 'mediatek', 'xiaomi')
+VALID_MODES = ('edl', 'brom', 'mi_assistant')
+VALID_OPERATION_TYPES = ('frp_unlock', 'edl_bypass', 'bootloader_unlock', 'mi_unlock')
+VALID_STATUSES = ('in_progress', 'completed', 'failed')
+
+# Same replay window as the server's HMAC validator
+TIMESTAMP_WINDOW = 300
+
+_TIMEFRAME_PATTERN = re.compile(r'^\s*(\d+)\s*(second|minute|hour|day|week)s?\s*$')
+_TIMEFRAME_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400, 'week': 604800}
+
+
+def _iso(micros: Optional[int]) -> Optional[str]:
+    """UTC ISO 8601 with microseconds, as the server renders sync cursors."""
+    if micros is None:
+        return None
+    seconds, micro = divmod(micros, 1_000_000)
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.') + f"{micro:06d}Z"
+
+
+def _parse_iso(value: str) -> int:
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp()) * 1_000_000 + moment.microsecond
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64url_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class _HTTPError(Exception):
+    """An error response, rendered like the server's error handler."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class _LocalRequest(dict):
+    """The parts of web.Request that routing, the middlewares and the handlers use."""
+
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: Optional[bytes]):
+        super().__init__()
+        self.method = method
+        self.rel_url = URL(path)
+        self.path = self.rel_url.path
+        self.query = self.rel_url.query
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.match_info = None
+        self._body = body or b''
+
+    @property
+    def body_exists(self) -> bool:
+        return bool(self._body)
+
+    async def text(self) -> str:
+        return self._body.decode('utf-8')
+
+
+class StandInServer:
+    """aiohttp application that behaves like the unlock server.
+
+    Run it on the current loop with ``start()``/``stop()`` (or ``async
+    with``), or on a background thread with ``start_thread()`` when the
+    client under test makes blocking requests. ``url`` is the server URL
+    to put in the client config. Without any sockets, pass ``handle`` to
+    an InProcessTransport instead.
+    """
+
+    def __init__(self, hmac_secret: str, host: str = '127.0.0.1', port: int = 0,
+                 faults: Optional[FaultInjector] = None, auth_key_expiry: int = 300,
+                 client_ids: Optional[List[str]] = None):
+        self.hmac_secret = hmac_secret.encode()
+        self.host = host
+        self.port = port
+        self.faults = faults or FaultInjector()
+        self.auth_key_expiry = auth_key_expiry
+        # None accepts any client id that signs with the shared secret
+        self.client_ids = set(client_ids) if client_ids is not None else None
+        self._jwt_secret = os.urandom(32)
+
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self.devices_by_serial: Dict[str, str] = {}
+        self.operations: Dict[int, Dict[str, Any]] = {}
+        self._next_device_id = 1
+        self._next_operation_id = 1
+        self._last_micros = 0
+        self.requests = 0
+        self.rejected = 0
+
+        self.app = self._build_app()
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # Lifecycle
+
+    async def start(self) -> 'StandInServer':
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Port 0 picks a free port; report the one actually bound
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def start_thread(self) -> 'StandInServer':
+        """Serve from a daemon thread with its own event loop; returns once listening."""
+        started = threading.Event()
+        errors = []
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            self._thread_loop = loop
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self.stop())
+                loop.close()
+
+        self._thread = threading.Thread(target=serve, name='standin-server', daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop_thread(self):
+        if self._thread and self._thread_loop:
+            self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+            self._thread.join()
+            self._thread = None
+            self._thread_loop = None
+
+    def serve_forever(self):
+        """Block serving requests until interrupted."""
+        web.run_app(self.app, host=self.host, port=self.port, access_log=None, print=None)
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str],
+                     body: Optional[bytes]) -> Tuple[int, Any]:
+        """Serve one request in process: same routes and middlewares, no HTTP.
+
+        Returns the status and decoded JSON body, as InProcessTransport expects.
+        """
+        request = _LocalRequest(method, path, headers, body)
+        request.match_info = await self.app.router.resolve(request)
+        handler = request.match_info.handler
+        for middleware in reversed(self._middlewares):
+            handler = functools.partial(middleware, handler=handler)
+        response = await handler(request)
+        return response.status, json.loads(response.body) if response.body else None
+
+    # Application
+
+    def _build_app(self) -> web.Application:
+        self._middlewares = (self._error_middleware, self._fault_middleware, self._hmac_middleware)
+        app = web.Application(middlewares=list(self._middlewares))
+        # Static routes before parameterised ones, as the server's routers declare them
+        app.router.add_get('/health', self.health)
+        app.router.add_post('/api/auth/request-key', self.request_key)
+        app.router.add_post('/api/auth/verify-key', self.verify_key)
+        app.router.add_post('/api/auth/refresh-key', self.refresh_key)
+        app.router.add_post('/api/device/register', self.register_device)
+        app.router.add_get('/api/device/stats/summary', self.device_stats)
+        app.router.add_get('/api/device/serial/{serialNumber}', self.get_device_by_serial)
+        app.router.add_get('/api/device', self.list_devices)
+        app.router.add_get('/api/device/', self.list_devices)
+        app.router.add_get('/api/device/{deviceId}', self.get_device)
+        app.router.add_put('/api/device/{deviceId}/ping', self.ping_device)
+        app.router.add_post('/api/unlock/start', self.start_operation)
+        app.router.add_get('/api/unlock/stats/summary', self.operation_stats)
+        app.router.add_get('/api/unlock/device/{deviceId}', self.device_operations)
+        app.router.add_get('/api/unlock', self.list_operations)
+        app.router.add_get('/api/unlock/', self.list_operations)
+        app.router.add_put('/api/unlock/{operationId}/status', self.update_status)
+        app.router.add_get('/api/unlock/{operationId}', self.get_operation)
+        return app
+
+    @web.middleware
+    async def _error_middleware(self, request: web.Request, handler):
+        self.requests += 1
+        try:
+            return await handler(request)
+        except _HTTPError as e:
+            self.rejected += 1
+            return self._error(request, str(e), e.status)
+        except web.HTTPException as e:
+            self.rejected += 1
+            return self._error(request, e.reason, e.status)
+
+    @web.middleware
+    async def _fault_middleware(self, request: web.Request, handler):
+        if self.faults.enabled:
+            resource = request.match_info.route.resource
+            route = resource.canonical if resource is not None else request.path
+            injection = await self.faults.inject('server', f"{request.method} {route}")
+            if injection.fault is not None:
+                raise _HTTPError(f"Injected {injection.fault.status} fault", injection.fault.status)
+        return await handler(request)
+
+    @web.middleware
+    async def _hmac_middleware(self, request: web.Request, handler):
+        """Same check as server/src/middleware/hmacValidator.js."""
+        body: Any = {}
+        if request.body_exists:
+            text = await request.text()
+            if text:
+                try:
+                    body = json.loads(text)
+                except ValueError:
+                    raise _HTTPError('Invalid JSON', 400)
+        if not isinstance(body, dict):
+            raise _HTTPError('Validation failed', 400)
+        request['body'] = body
+
+        if request.path == '/health':
+            return await handler(request)
+
+        signature = request.headers.get('X-Signature')
+        timestamp = request.headers.get('X-Timestamp')
+        client_id = request.headers.get('X-Client-ID')
+        if not signature or not timestamp or not client_id:
+            raise _HTTPError('Missing required authentication headers', 401)
+
+        try:
+            request_time = int(timestamp)
+        except ValueError:
+            raise _HTTPError('Request timestamp outside valid window', 401)
+        if abs(int(time.time()) - request_time) > TIMESTAMP_WINDOW:
+            raise _HTTPError('Request timestamp outside valid window', 401)
+
+        # Express sees the path below the /api mount and re-serializes the parsed body
+        path = request.path[len('/api'):] if request.path.startswith('/api/') else request.path
+        signed_body = '' if request.method == 'GET' else json.dumps(body, separators=(',', ':'), ensure_ascii=False)
+        data_to_sign = f"{request.method}{path}{signed_body}{timestamp}{client_id}"
+        expected = hmac.new(self.hmac_secret, data_to_sign.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            raise _HTTPError('Invalid request signature', 401)
+        if self.client_ids is not None and client_id not in self.client_ids:
+            raise _HTTPError('Invalid request signature', 401)
+
+        request['client_id'] = client_id
+        return await handler(request)
+
+    @staticmethod
+    def _error(request: web.Request, message: str, status: int) -> web.Response:
+        return web.json_response({
+            'error': message,
+            'timestamp': _iso(time.time_ns() // 1000),
+            'path': request.path
+        }, status=status)
+
+    def _now(self) -> int:
+        """Current time in microseconds, strictly increasing so updates always move sync cursors."""
+        self._last_micros = max(time.time_ns() // 1000, self._last_micros + 1)
+        return self._last_micros
+
+    # Auth keys: HS256 JWTs like the server's, signed with a per-instance secret
+
+    def _issue_auth_key(self, device_info: Dict[str, Any]) -> str:
+        now = int(time.time())
+        payload = {
+            'deviceId': device_info.get('deviceId'),
+            'serialNumber': device_info.get('serialNumber'),
+            'chipset': device_info.get('chipset'),
+            'mode': device_info.get('mode'),
+            'timestamp': now * 1000,
+            'nonce': os.urandom(16).hex(),
+            'iat': now,
+            'exp': now + self.auth_key_expiry,
+            'iss': 'xiaomi-unlock-server',
+            'aud': 'xiaomi-unlock-client'
+        }
+        header = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+        claims = _b64url(json.dumps(payload, separators=(',', ':')).encode())
+        signature = hmac.new(self._jwt_secret, f"{header}.{claims}".encode(), hashlib.sha256).digest()
+        return f"{header}.{claims}.{_b64url(signature)}"
+
+    def _verify_auth_key(self, auth_key: str) -> Dict[str, Any]:
+        try:
+            header, claims, signature = auth_key.split('.')
+            expected = hmac.new(self._jwt_secret, f"{header}.{claims}".encode(), hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64url_decode(signature)):
+                raise ValueError('bad signature')
+            payload = json.loads(_b64url_decode(claims))
+        except (ValueError, TypeError):
+            raise ValueError('Invalid or expired auth key')
+        if payload.get('exp', 0) <= time.time():
+            raise ValueError('Invalid or expired auth key')
+        return payload
+
+    def _bypass_tokens(self, device_info: Dict[str, Any]) -> Dict[str, Any]:
+        now = int(time.time())
+        mode, chipset = device_info['mode'], device_info['chipset']
+        if mode == 'brom' and chipset == 'mediatek':
+            return {
+                'auth_token': os.urandom(32).hex(),
+                'device_key': hashlib.md5(device_info['serialNumber'].encode()).hexdigest(),
+                'timestamp': now,
+                'nonce': os.urandom(12).hex(),
+                'expires': now + self.auth_key_expiry
+            }
+        if mode == 'mi_assistant' or (mode == 'edl' and chipset == 'qualcomm'):
+            payload = {'sn': device_info['serialNumber'], 'hwid': device_info.get('hwid', ''),
+                       'timestamp': now, 'nonce': os.urandom(8).hex(), 'mode': 'edl_bypass'}
+            return {
+                'token': base64.b64encode(json.dumps(payload).encode()).decode(),
+                'signature': hmac.new(b'xiaomi-edl-secret', json.dumps(payload).encode(), hashlib.sha256).hexdigest(),
+                'expires': now + self.auth_key_expiry
+            }
+        return {}
+
+    # Validation
+
+    @staticmethod
+    def _require(condition: bool):
+        if not condition:
+            raise _HTTPError('Validation failed', 400)
+
+    @staticmethod
+    def _non_empty(value: Any) -> bool:
+        return isinstance(value, str) and len(value) > 0
+
+    @staticmethod
+    def _query_int(request: web.Request, name: str, default: int, low: int, high: Optional[int] = None) -> int:
+        raw = request.query.get(name)
+        if raw is None:
+            return default
+        try:
+            value = int(raw)
+        except ValueError:
+            raise _HTTPError('Validation failed', 400)
+        if value < low or (high is not None and value > high):
+            raise _HTTPError('Validation failed', 400)
+        return value or default
+
+    def _owned_device(self, request: web.Request, device_id: str) -> Dict[str, Any]:
+        device = self.devices.get(device_id)
+        if device is None or device['client_id'] != request['client_id']:
+            raise _HTTPError('Device not found', 404)
+        return device
+
+    def _owned_operation(self, request: web.Request) -> Dict[str, Any]:
+        try:
+            operation = self.operations.get(int(request.match_info['operationId']))
+        except ValueError:
+            operation = None
+        if operation is None or operation['client_id'] != request['client_id']:
+            raise _HTTPError('Operation not found', 404)
+        return operation
+
+    # Handlers
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({'status': 'OK', 'timestamp': _iso(self._now()), 'version': 'v1'})
+
+    async def request_key(self, request: web.Request) -> web.Response:
+        device_info = request['body'].get('deviceInfo')
+        self._require(isinstance(device_info, dict))
+        self._require(self._non_empty(device_info.get('serialNumber')))
+        self._require(device_info.get('chipset') in VALID_CHIPSETS)
+        self._require(device_info.get('mode') in VALID_MODES)
+
+        device_info = dict(device_info)
+        if not device_info.get('deviceId'):
+            device_info['deviceId'] = os.urandom(16).hex()
+        device_info['clientId'] = request['client_id']
+
+        return web.json_response({
+            'success': True,
+            'authKey': self._issue_auth_key(device_info),
+            'deviceId': device_info['deviceId'],
+            'bypassTokens': self._bypass_tokens(device_info),
+            'expiresIn': self.auth_key_expiry,
+            'timestamp': _iso(self._now())
+        })
+
+    async def verify_key(self, request: web.Request) -> web.Response:
+        body = request['body']
+        self._require(self._non_empty(body.get('authKey')) and self._non_empty(body.get('deviceId')))
+        try:
+            decoded = self._verify_auth_key(body['authKey'])
+            if decoded['deviceId'] != body['deviceId']:
+                raise ValueError('Device ID mismatch')
+        except ValueError as e:
+            return web.json_response({'success': True, 'valid': False, 'reason': str(e)})
+
+        return web.json_response({
+            'success': True,
+            'valid': True,
+            'deviceInfo': {key: decoded.get(key) for key in ('deviceId', 'serialNumber', 'chipset', 'mode')},
+            'expiresAt': _iso(decoded['exp'] * 1_000_000)
+        })
+
+    async def refresh_key(self, request: web.Request) -> web.Response:
+        body = request['body']
+        self._require(self._non_empty(body.get('authKey')) and self._non_empty(body.get('deviceId')))
+        try:
+            decoded = self._verify_auth_key(body['authKey'])
+            if decoded['deviceId'] != body['deviceId']:
+                raise ValueError('Device ID mismatch')
+        except ValueError:
+            raise _HTTPError('Failed to refresh authentication key', 401)
+
+        return web.json_response({
+            'success': True,
+            'authKey': self._issue_auth_key(decoded),
+            'expiresIn': self.auth_key_expiry,
+            'timestamp': _iso(self._now())
+        })
+
+    async def register_device(self, request: web.Request) -> web.Response:
+        body = request['body']
+        self._require(self._non_empty(body.get('deviceId')))
+        self._require(self._non_empty(body.get('serialNumber')))
+        self._require(body.get('chipset') in VALID_CHIPSETS)
+        self._require(body.get('mode') in VALID_MODES)
+
+        now = self._now()
+        existing = self.devices.get(body['deviceId'])
+        if existing is not None and existing['client_id'] == request['client_id']:
+            existing['last_seen'] = existing['updated_at'] = now
+            return web.json_response({'success': True, 'device': self._device_view(existing),
+                                      'message': 'Device already registered'})
+
+        device = {
+            'id': self._next_device_id,
+            'device_id': body['deviceId'],
+            'serial_number': body['serialNumber'],
+            'chipset': body['chipset'],
+            'mode': body['mode'],
+            'manufacturer': body.get('manufacturer'),
+            'model': body.get('model'),
+            'android_version': body.get('androidVersion'),
+            'bootloader': body.get('bootloader'),
+            'client_id': request['client_id'],
+            'created_at': now,
+            'updated_at': now,
+            'last_seen': now
+        }
+        self._next_device_id += 1
+        self.devices[device['device_id']] = device
+        self.devices_by_serial[device['serial_number']] = device['device_id']
+        return web.json_response({'success': True, 'device': self._device_view(device),
+                                  'message': 'Device registered successfully'}, status=201)
+
+    @staticmethod
+    def _device_view(device: Dict[str, Any]) -> Dict[str, Any]:
+        view = dict(device)
+        for key in ('created_at', 'updated_at', 'last_seen'):
+            view[key] = _iso(device[key])
+        return view
+
+    async def get_device(self, request: web.Request) -> web.Response:
+        device = self._owned_device(request, request.match_info['deviceId'])
+        return web.json_response({'success': True, 'device': self._device_view(device)})
+
+    async def get_device_by_serial(self, request: web.Request) -> web.Response:
+        device_id = self.devices_by_serial.get(request.match_info['serialNumber'], '')
+        device = self._owned_device(request, device_id)
+        return web.json_response({'success': True, 'device': self._device_view(device)})
+
+    async def list_devices(self, request: web.Request) -> web.Response:
+        limit = self._query_int(request, 'limit', 50, 1, 100)
+        offset = self._query_int(request, 'offset', 0, 0)
+        owned = [device for device in self.devices.values() if device['client_id'] == request['client_id']]
+        owned.sort(key=lambda device: device['last_seen'], reverse=True)
+        page = owned[offset:offset + limit]
+        return web.json_response({
+            'success': True,
+            'devices': [self._device_view(device) for device in page],
+            'pagination': {'limit': limit, 'offset': offset, 'count': len(page)}
+        })
+
+    async def ping_device(self, request: web.Request) -> web.Response:
+        device = self._owned_device(request, request.match_info['deviceId'])
+        device['last_seen'] = device['updated_at'] = self._now()
+        return web.json_response({'success': True, 'device': self._device_view(device),
+                                  'message': 'Device ping updated'})
+
+    async def device_stats(self, request: web.Request) -> web.Response:
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for device in self.devices.values():
+            groups.setdefault((device['mode'], device['chipset']), []).append(device)
+        stats = [{
+            'total_devices': len(devices),
+            'unique_clients': len({device['client_id'] for device in devices}),
+            'mode': mode,
+            'chipset': chipset,
+            'count': len(devices)
+        } for (mode, chipset), devices in groups.items()]
+        stats.sort(key=lambda row: row['count'], reverse=True)
+        return web.json_response({'success': True, 'stats': stats})
+
+    async def start_operation(self, request: web.Request) -> web.Response:
+        body = request['body']
+        self._require(self._non_empty(body.get('deviceId')) and self._non_empty(body.get('authKey')))
+        self._require(body.get('operationType') in VALID_OPERATION_TYPES)
+        self._require(isinstance(body.get('metadata', {}), dict))
+
+        try:
+            decoded = self._verify_auth_key(body['authKey'])
+        except ValueError:
+            raise _HTTPError('Invalid or expired authentication key', 401)
+        if decoded['deviceId'] != body['deviceId']:
+            raise _HTTPError('Device ID mismatch', 401)
+        device = self._owned_device(request, body['deviceId'])
+
+        now = self._now()
+        operation = {
+            'id': self._next_operation_id,
+            'device_id': body['deviceId'],
+            'operation_type': body['operationType'],
+            'status': 'started',
+            'auth_key_hash': hmac.new(self.hmac_secret, body['authKey'].encode(), hashlib.sha256).hexdigest(),
+            'client_id': request['client_id'],
+            'metadata': body.get('metadata') or {},
+            'error_message': None,
+            'started_at': now,
+            'completed_at': None,
+            'updated_at': now
+        }
+        self._next_operation_id += 1
+        self.operations[operation['id']] = operation
+        device['last_seen'] = now
+
+        return web.json_response({
+            'success': True,
+            'operation': {
+                'id': operation['id'],
+                'deviceId': operation['device_id'],
+                'operationType': operation['operation_type'],
+                'status': operation['status'],
+                'startedAt': _iso(operation['started_at'])
+            },
+            'message': 'Unlock operation started'
+        }, status=201)
+
+    async def update_status(self, request: web.Request) -> web.Response:
+        body = request['body']
+        self._require(body.get('status') in VALID_STATUSES)
+        self._require(isinstance(body.get('errorMessage', ''), str))
+        progress = body.get('progress', 0)
+        self._require(isinstance(progress, int) and not isinstance(progress, bool) and 0 <= progress <= 100)
+        self._require(isinstance(body.get('metadata', {}), dict))
+
+        operation = self._owned_operation(request)
+        now = self._now()
+        operation['status'] = body['status']
+        operation['error_message'] = body.get('errorMessage')
+        operation['completed_at'] = now if body['status'] in ('completed', 'failed') else None
+        operation['updated_at'] = now
+
+        return web.json_response({
+            'success': True,
+            'operation': {
+                'id': operation['id'],
+                'deviceId': operation['device_id'],
+                'operationType': operation['operation_type'],
+                'status': operation['status'],
+                'startedAt': _iso(operation['started_at']),
+                'completedAt': _iso(operation['completed_at']),
+                'errorMessage': operation['error_message']
+            },
+            'message': 'Operation status updated'
+        })
+
+    def _operation_view(self, operation: Dict[str, Any]) -> Dict[str, Any]:
+        device = self.devices.get(operation['device_id'], {})
+        return {
+            'id': operation['id'],
+            'deviceId': operation['device_id'],
+            'operationType': operation['operation_type'],
+            'status': operation['status'],
+            'startedAt': _iso(operation['started_at']),
+            'completedAt': _iso(operation['completed_at']),
+            'updatedAt': _iso(operation['updated_at']),
+            'errorMessage': operation['error_message'],
+            'device': {
+                'serialNumber': device.get('serial_number'),
+                'model': device.get('model'),
+                'manufacturer': device.get('manufacturer')
+            }
+        }
+
+    async def get_operation(self, request: web.Request) -> web.Response:
+        operation = self._owned_operation(request)
+        view = self._operation_view(operation)
+        del view['updatedAt']
+        view['metadata'] = operation['metadata']
+        return web.json_response({'success': True, 'operation': view})
+
+    async def device_operations(self, request: web.Request) -> web.Response:
+        limit = self._query_int(request, 'limit', 10, 1, 50)
+        device_id = request.match_info['deviceId']
+        self._owned_device(request, device_id)
+        operations = [operation for operation in self.operations.values() if operation['device_id'] == device_id]
+        operations.sort(key=lambda operation: operation['started_at'], reverse=True)
+        return web.json_response({
+            'success': True,
+            'operations': [{
+                'id': operation['id'],
+                'operationType': operation['operation_type'],
+                'status': operation['status'],
+                'startedAt': _iso(operation['started_at']),
+                'completedAt': _iso(operation['completed_at']),
+                'errorMessage': operation['error_message']
+            } for operation in operations[:limit]]
+        })
+
+    async def list_operations(self, request: web.Request) -> web.Response:
+        limit = self._query_int(request, 'limit', 50, 1, 100)
+        offset = self._query_int(request, 'offset', 0, 0)
+        since_id = self._query_int(request, 'sinceId', 0, 0)
+        since = request.query.get('since')
+        incremental = since is not None
+        since_micros = None
+        if since:
+            try:
+                since_micros = _parse_iso(since)
+            except ValueError:
+                raise _HTTPError('Validation failed', 400)
+
+        owned = [operation for operation in self.operations.values() if operation['client_id'] == request['client_id']]
+        if incremental:
+            # Keyset order on (updated_at, id), like getOperationsUpdatedSince
+            if since_micros is not None:
+                owned = [operation for operation in owned
+                         if (operation['updated_at'], operation['id']) > (since_micros, since_id)]
+            owned.sort(key=lambda operation: (operation['updated_at'], operation['id']))
+            page = owned[:limit]
+        else:
+            owned.sort(key=lambda operation: operation['started_at'], reverse=True)
+            page = owned[offset:offset + limit]
+
+        response = {
+            'success': True,
+            'operations': [self._operation_view(operation) for operation in page],
+            'pagination': {'limit': limit, 'offset': offset, 'count': len(page)}
+        }
+        if incremental:
+            last = page[-1] if page else None
+            response['cursor'] = ({'since': _iso(last['updated_at']), 'sinceId': last['id']} if last
+                                  else {'since': since, 'sinceId': since_id})
+        return web.json_response(response)
+
+    async def operation_stats(self, request: web.Request) -> web.Response:
+        timeframe = request.query.get('timeframe', '24 hours')
+        match = _TIMEFRAME_PATTERN.match(timeframe)
+        if not match:
+            raise _HTTPError('Validation failed', 400)
+        cutoff = self._now() - int(match.group(1)) * _TIMEFRAME_SECONDS[match.group(2)] * 1_000_000
+
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for operation in self.operations.values():
+            if operation['started_at'] >= cutoff:
+                groups.setdefault(operation['operation_type'], []).append(operation)
+
+        stats = []
+        for operation_type, operations in groups.items():
+            durations = [(operation['completed_at'] - operation['started_at']) / 1e6
+                         for operation in operations if operation['completed_at'] is not None]
+            stats.append({
+                'total_operations': len(operations),
+                'successful': sum(1 for operation in operations if operation['status'] == 'completed'),
+                'failed': sum(1 for operation in operations if operation['status'] == 'failed'),
+                'in_progress': sum(1 for operation in operations if operation['status'] in ('started', 'in_progress')),
+                'operation_type': operation_type,
+                'avg_duration_seconds': sum(durations) / len(durations) if durations else None
+            })
+        stats.sort(key=lambda row: row['total_operations'], reverse=True)
+        return web.json_response({'success': True, 'stats': stats, 'timeframe': timeframe})
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'devices': len(self.devices),
+            'operations': len(self.operations)
+        }
@@ -0,0 +1,198 @@
+"""HTTP transports that carry APIClient's signed requests.
+
+A transport sends one request and returns the status and decoded JSON
+body. Timeouts raise asyncio.TimeoutError; connection failures raise any
+other exception. Retries, signing, metrics and fault injection stay in
+APIClient, so every transport behaves the same to its callers.
+"""
+
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+from urllib.parse import urlsplit
+
+# Names accepted by config.server.transport; 'auto' means aiohttp
+TRANSPORT_NAMES = ('auto', 'aiohttp', 'http2', 'requests')
+
+
+class TransportResponse:
+    """Status code and JSON body (None if the body was empty or not JSON)."""
+
+    __slots__ = ('status', 'body')
+
+    def __init__(self, status: int, body: Any = None):
+        self.status = status
+        self.body = body
+
+
+class Transport:
+    """Base class: open() before use, close() when done."""
+
+    name = 'base'
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def request(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes],
+                      timeout: float) -> TransportResponse:
+        raise NotImplementedError
+
+
+class AiohttpTransport(Transport):
+    """Pooled keep-alive connections through one aiohttp session."""
+
+    name = 'aiohttp'
+
+    def __init__(self, timeout: float, user_agent: str, pool_size: int = 100, keepalive: bool = True):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.session = None
+
+    async def open(self):
+        import aiohttp
+
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keepalive),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': self.user_agent}
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def request(self, method, url, headers, body, timeout):
+        import aiohttp
+
+        async with self.session.request(method, url, headers=headers, data=body,
+                                        timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            try:
+                data = await response.json(content_type=None)
+            except ValueError:
+                data = None
+            return TransportResponse(response.status, data)
+
+
+class RequestsTransport(Transport):
+    """Blocking requests session; the event loop waits while each request runs."""
+
+    name = 'requests'
+
+    def __init__(self, user_agent: str):
+        self.user_agent = user_agent
+        self.session = None
+
+    async def open(self):
+        import requests
+
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers['User-Agent'] = self.user_agent
+
+    async def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    async def request(self, method, url, headers, body, timeout):
+        import requests
+
+        if self.session is None:
+            await self.open()
+        try:
+            response = self.session.request(method, url, headers=headers, data=body, timeout=timeout)
+        except requests.Timeout as e:
+            raise asyncio.TimeoutError(str(e))
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return TransportResponse(response.status_code, data)
+
+
+class HTTP2Transport(Transport):
+    """One multiplexed HTTP/2 connection per host via httpx (optional dependency)."""
+
+    name = 'http2'
+
+    def __init__(self, timeout: float, user_agent: str, pool_size: int = 100, keepalive: bool = True):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.client = None
+
+    async def open(self):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("The http2 transport needs httpx with HTTP/2 support: pip install 'httpx[http2]'")
+
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size,
+                                    max_keepalive_connections=None if self.keepalive else 0),
+                headers={'User-Agent': self.user_agent}
+            )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def request(self, method, url, headers, body, timeout):
+        import httpx
+
+        try:
+            response = await self.client.request(method, url, headers=headers, content=body, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e))
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return TransportResponse(response.status_code, data)
+
+
+# handler(method, path_and_query, headers, body) -> (status, decoded JSON body)
+Handler = Callable[[str, str, Dict[str, str], Optional[bytes]], Awaitable[Tuple[int, Any]]]
+
+
+class InProcessTransport(Transport):
+    """Calls a Python handler directly, with no sockets or HTTP parsing.
+
+    The handler sees the path and query below the server URL, so the same
+    app serves both this transport and a real listener (see
+    StandInServer.handle).
+    """
+
+    name = 'inprocess'
+
+    def __init__(self, handler: Handler):
+        self.handler = handler
+
+    async def request(self, method, url, headers, body, timeout):
+        parts = urlsplit(url)
+        path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        status, data = await asyncio.wait_for(self.handler(method, path, dict(headers), body), timeout)
+        return TransportResponse(status, data)
+
+
+def create_transport(name: str, config, keepalive: bool = True) -> Transport:
+    """Build a configured transport by name ('auto' means aiohttp)."""
+    server = config.server
+    if name in ('auto', 'aiohttp'):
+        return AiohttpTransport(server.timeout, config.client.user_agent, server.pool_size, keepalive)
+    if name == 'http2':
+        return HTTP2Transport(server.timeout, config.client.user_agent, server.pool_size, keepalive)
+    if name == 'requests':
+        return RequestsTransport(config.client.user_agent)
+    raise ValueError(f"Unknown transport '{name}' (expected one of {', '.join(TRANSPORT_NAMES)})")
@@ -0,0 +1,261 @@
+"""Batch job processing for unattended multi-device unlock runs."""
+
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Dict, Any, TextIO
+
+from ..devices.models import Device
+
+
+@dataclass
+class BatchJob:
+    """A single unlock job read from a JSONL job file."""
+    index: int
+    serial: Optional[str] = None
+    device_id: Optional[str] = None
+    mode: Optional[str] = None
+    wait_timeout: Optional[int] = None
+    label: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, index: int, data: Dict[str, Any]) -> 'BatchJob':
+        """Create job from a decoded JSONL line."""
+        job = cls(
+            index=index,
+            serial=data.get('serial') or data.get('serialNumber'),
+            device_id=data.get('device_id') or data.get('deviceId'),
+            mode=data.get('mode'),
+            wait_timeout=data.get('wait_timeout'),
+            label=data.get('label'),
+            metadata=data.get('metadata') or {}
+        )
+
+        if not job.serial and not job.device_id:
+            raise ValueError(f"Job {index} needs a 'serial' or 'device_id'")
+
+        return job
+
+    def matches(self, device: Device) -> bool:
+        """Check if a detected device satisfies this job."""
+        if self.device_id and device.device_id != self.device_id:
+            return False
+        if self.serial and device.serial_number != self.serial:
+            return False
+        if self.mode and device.mode.value != self.mode:
+            return False
+        return True
+
+    def describe(self) -> str:
+        """Short human readable job description."""
+        target = self.serial or self.device_id
+        return f"job {self.index} ({self.label or target})"
+
+
+def load_jobs(path: str) -> List[BatchJob]:
+    """Load jobs from a JSONL file, skipping blank and comment lines."""
+    jobs = []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON: {e}")
+
+            if isinstance(data, str):
+                data = {'serial': data}
+            elif not isinstance(data, dict):
+                raise ValueError(f"{path}:{line_no}: expected a job object or serial string, "
+                                 f"got {type(data).__name__}")
+
+            try:
+                jobs.append(BatchJob.from_dict(len(jobs), data))
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_no}: {e}")
+
+    return jobs
+
+
+class BatchResultWriter:
+    """Writes one JSONL result line per finished job and flushes immediately."""
+
+    def __init__(self, output: Optional[str] = None):
+        self.path = output
+        self._stream: Optional[TextIO] = None
+
+    def open(self):
+        if self.path and self.path != '-':
+            out_path = Path(self.path)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            self._stream = open(out_path, 'a', encoding='utf-8')
+        else:
+            self._stream = sys.stdout
+        return self
+
+    def write(self, result: Dict[str, Any]):
+        """Write a result record as a single line."""
+        self._stream.write(json.dumps(result, ensure_ascii=False, default=str) + '\n')
+        self._stream.flush()
+
+    def close(self):
+        if self._stream and self._stream is not sys.stdout:
+            self._stream.close()
+        self._stream = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class BatchRunner:
+    """Runs a queue of unlock jobs with bounded parallelism.
+
+    One dispatch loop scans for devices and hands each one to the first
+    pending job it satisfies, so a job whose device is absent never holds
+    up jobs whose devices are already connected. A job's wait timeout
+    starts once a free slot reaches it in queue order, and it only gives
+    up while no matching device is connected.
+    """
+
+    def __init__(self, client, parallel: int = 1, wait_timeout: int = 300, poll_interval: float = 2.0):
+        self.client = client
+        self.logger = client.logger
+        self.parallel = max(1, parallel)
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+        self._last_scan: List[Device] = []
+        self._last_scan_time = 0.0
+        self._claimed = set()
+
+    async def run(self, jobs: List[BatchJob], writer: BatchResultWriter) -> Dict[str, int]:
+        """Process all jobs and stream results to the writer."""
+        summary = {'total': len(jobs), 'succeeded': 0, 'failed': 0}
+        pending = list(jobs)
+        waiting_since: Dict[int, float] = {}
+        running: Dict[asyncio.Future, BatchJob] = {}
+
+        def finish(result: Dict[str, Any]):
+            writer.write(result)
+            if result['success']:
+                summary['succeeded'] += 1
+            else:
+                summary['failed'] += 1
+
+        self.logger.info(f"Running {len(jobs)} batch jobs with parallelism {self.parallel}")
+
+        try:
+            while pending or running:
+                free = self.parallel - len(running)
+                now = time.monotonic()
+                for job in pending[:free]:
+                    waiting_since.setdefault(job.index, now)
+
+                devices = await self._scan() if pending and free > 0 else self._last_scan
+                for job in list(pending):
+                    if len(running) >= self.parallel:
+                        break
+                    device = self._match(job, devices)
+                    if device is not None:
+                        self._claimed.add(device.device_id)
+                        pending.remove(job)
+                        running[asyncio.ensure_future(self.run_job(job, device))] = job
+
+                now = time.monotonic()
+                for job in list(pending):
+                    started = waiting_since.get(job.index)
+                    timeout = self._wait_timeout(job)
+                    if started is not None and now - started >= timeout and self._match(job, devices) is None:
+                        self.logger.warning(f"Batch {job.describe()}: device not found within {timeout}s")
+                        pending.remove(job)
+                        result = self._new_result(job)
+                        result['status'] = 'not_found'
+                        result['error'] = f"Device did not appear within {timeout}s"
+                        result['finished_at'] = result['started_at']
+                        result['duration'] = 0.0
+                        finish(result)
+
+                if running:
+                    done, _ = await asyncio.wait(list(running), timeout=self.poll_interval,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        running.pop(task)
+                        finish(task.result())
+                elif pending:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            for task in running:
+                task.cancel()
+
+        return summary
+
+    async def run_job(self, job: BatchJob, device: Device) -> Dict[str, Any]:
+        """Unlock the device claimed for a job."""
+        started = time.monotonic()
+        result = self._new_result(job)
+        result['serial'] = device.serial_number
+        result['device_id'] = device.device_id
+        result['mode'] = device.mode.value
+        result['model'] = device.model
+
+        try:
+            success = await self.client.unlock_device(device)
+
+            result['success'] = success
+            result['status'] = 'completed' if success else 'failed'
+            if not success:
+                result['error'] = "Device unlock operation failed"
+
+        except Exception as e:
+            self.logger.error(f"Batch {job.describe()} error: {e}", exc_info=True)
+            result['status'] = 'error'
+            result['error'] = str(e)
+        finally:
+            self._claimed.discard(device.device_id)
+            result['finished_at'] = datetime.now().isoformat()
+            result['duration'] = round(time.monotonic() - started, 3)
+
+        return result
+
+    def _new_result(self, job: BatchJob) -> Dict[str, Any]:
+        return {
+            'job': job.index,
+            'label': job.label,
+            'serial': job.serial,
+            'device_id': job.device_id,
+            'started_at': datetime.now().isoformat(),
+            'success': False,
+            'status': 'failed',
+            'error': None
+        }
+
+    def _wait_timeout(self, job: BatchJob) -> float:
+        # An explicit 0 means "only if already connected"
+        return self.wait_timeout if job.wait_timeout is None else job.wait_timeout
+
+    def _match(self, job: BatchJob, devices: List[Device]) -> Optional[Device]:
+        """First detected, unclaimed device that satisfies the job."""
+        for device in devices:
+            if device.device_id not in self._claimed and job.matches(device):
+                return device
+        return None
+
+    async def _scan(self) -> List[Device]:
+        """Return detected devices, reusing a scan younger than the poll interval."""
+        if time.monotonic() - self._last_scan_time >= self.poll_interval:
+            self._last_scan = await self.client.device_detector.detect_all()
+            self._last_scan_time = time.monotonic()
+            self.client.detected_devices = self._last_scan
+        return self._last_scan
@@ -0,0 +1,157 @@
+"""Write-ahead checkpoint journal for resumable unlock operations."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+def _open_private(path: Path, flags: int):
+    """Open a checkpoint file for writing, readable only by its owner.
+
+    Checkpoints hold the auth key and bypass tokens a resume needs.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | flags, 0o600)
+    return open(fd, 'w' if flags & os.O_TRUNC else 'a', encoding='utf-8')
+
+
+class OperationCheckpoint:
+    """Durable record of the completed stages of one device operation.
+
+    Every stage is appended as a JSON line and fsynced before the caller
+    moves on, so after a crash the file holds exactly the stages whose
+    side effects may already have happened.
+    """
+
+    def __init__(self, path: Path, device_id: str):
+        self.path = path
+        self.device_id = device_id
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+
+    @classmethod
+    def load(cls, path: Path, device_id: str) -> 'OperationCheckpoint':
+        """Load a checkpoint, ignoring a torn trailing line."""
+        checkpoint = cls(path, device_id)
+
+        if path.exists():
+            good_bytes = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        # Partial write from a crash; everything after it is untrusted
+                        break
+                    checkpoint._apply(record)
+                    good_bytes += len(line)
+
+            # Cut the torn tail so the next append starts on a clean line
+            if good_bytes < path.stat().st_size:
+                with open(path, 'r+b') as f:
+                    f.truncate(good_bytes)
+
+        return checkpoint
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.order)
+
+    @property
+    def last_stage(self) -> Optional[str]:
+        return self.order[-1] if self.order else None
+
+    def is_done(self, stage: str) -> bool:
+        """Check if a stage was durably recorded."""
+        return stage in self.stages
+
+    def get(self, stage: str) -> Optional[Dict[str, Any]]:
+        """Get the outputs recorded for a stage."""
+        record = self.stages.get(stage)
+        return record['outputs'] if record else None
+
+    def record(self, stage: str, outputs: Optional[Dict[str, Any]] = None):
+        """Append a completed stage and flush it to disk."""
+        record = {
+            'stage': stage,
+            'outputs': outputs or {},
+            'timestamp': time.time()
+        }
+
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with _open_private(self.path, os.O_APPEND) as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._apply(record)
+
+    def rollback_to(self, stage: str):
+        """Drop every stage recorded after the given one."""
+        if stage not in self.stages:
+            keep = []
+        else:
+            keep = self.order[:self.order.index(stage) + 1]
+
+        records = [self.stages[name] for name in keep]
+        tmp_path = self.path.with_suffix('.tmp')
+
+        with _open_private(tmp_path, os.O_TRUNC) as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
+
+        self.stages = {}
+        self.order = []
+        for record in records:
+            self._apply(record)
+
+    def complete(self):
+        """Remove the checkpoint once the operation has a final status."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.stages = {}
+        self.order = []
+
+    def _apply(self, record: Dict[str, Any]):
+        stage = record['stage']
+        if stage not in self.stages:
+            self.order.append(stage)
+        self.stages[stage] = record
+
+
+class CheckpointStore:
+    """Directory of per-device operation checkpoints."""
+
+    SUFFIX = '.ckpt.jsonl'
+
+    def __init__(self, directory: str = "logs/checkpoints"):
+        self.directory = Path(directory)
+
+    def open(self, device_id: str) -> OperationCheckpoint:
+        """Open the checkpoint for a device, loading any interrupted state."""
+        return OperationCheckpoint.load(self._path(device_id), device_id)
+
+    def pending(self) -> List[OperationCheckpoint]:
+        """List checkpoints left behind by interrupted operations."""
+        if not self.directory.exists():
+            return []
+
+        checkpoints = []
+        for path in sorted(self.directory.glob(f"*{self.SUFFIX}")):
+            device_id = path.name[:-len(self.SUFFIX)]
+            checkpoint = OperationCheckpoint.load(path, device_id)
+            if checkpoint.exists:
+                checkpoints.append(checkpoint)
+
+        return checkpoints
+
+    def _path(self, device_id: str) -> Path:
+        safe_id = ''.join(c for c in device_id if c.isalnum() or c in '-_')
+        return self.directory / f"{safe_id}{self.SUFFIX}"
@@ -1,31 +1,54 @@
 """Main client class for Xiaomi Device Unlock operations."""
 
 import asyncio
-import time
+import uuid
 from typing import List, Optional, Dict, Any
-from pathlib import Path
 
 from ..api.client import APIClient
 from ..devices.detector import DeviceDetector
 from ..devices.manager import DeviceManager
 from ..devices.models import Device, DeviceMode
+from ..utils.clock import Clock, SYSTEM_CLOCK
 from ..utils.config import Config
 from ..utils.logger import OperationLogger, get_device_logger
 from ..ui.cli import CLI
+from ..utils.deadline import DeadlineScheduler, DeadlineExceeded, clamp_timeout
+from ..utils.faults import faults
+from ..utils.journal import OperationJournal
+from ..utils.stats import StatsAggregator
+from ..utils.metrics import OPERATIONS, OPERATIONS_IN_PROGRESS
+from ..utils.tracing import tracer
+from .checkpoint import CheckpointStore, OperationCheckpoint
+from .history import HistoryStore
 
 
 class XiaomiUnlockClient:
     """Main client for device unlock operations."""
     
-    def __init__(self, config: Config, logger, cli: CLI):
+    # Seconds allowed for the final status update after a deadline expires
+    TIMEOUT_REPORT_GRACE = 10
+    
+    def __init__(self, config: Config, logger, cli: CLI, clock: Optional[Clock] = None):
         self.config = config
         self.logger = logger
         self.cli = cli
+        # Simulated work, deadlines and operation timings all read this clock
+        self.clock = clock or SYSTEM_CLOCK
         
         # Initialize components
-        self.api_client = APIClient(config, logger)
+        # Idle keep-alive sockets count as real work on a virtual-time loop and stop it skipping ahead
+        self.api_client = APIClient(config, logger, keepalive=not self.clock.virtual)
         self.device_detector = DeviceDetector(config, logger)
-        self.device_manager = DeviceManager(config, logger, self.api_client)
+        self.device_manager = DeviceManager(config, logger, self.api_client, clock=self.clock)
+        self.checkpoints = CheckpointStore(config.advanced.checkpoint_dir)
+        self.journal = OperationJournal(
+            config.advanced.journal_dir,
+            max_segment_bytes=config.get_journal_segment_bytes(),
+            max_segment_age=config.advanced.journal_segment_age,
+            compress=config.advanced.journal_compress
+        )
+        self.history = HistoryStore(config.advanced.history_db)
+        self.stats = StatsAggregator(clock=self.clock.time)
         
         # State
         self.detected_devices = []
@@ -61,91 +84,270 @@ class XiaomiUnlockClient:
             return []
     
     async def unlock_device(self, device: Device) -> bool:
-        """Unlock a specific device."""
+        """Unlock a specific device, resuming an interrupted operation if one is checkpointed."""
+        with tracer.span("unlock_device", device_id=device.device_id, serial=device.serial_number,
+                         mode=device.mode.value, model=device.model) as span:
+            success = await self._unlock_device(device)
+            span.set_attribute('success', success)
+            return success
+    
+    async def _unlock_device(self, device: Device) -> bool:
         device_logger = get_device_logger(device.device_id, self.logger)
-        operation_logger = OperationLogger(device_logger, f"unlock_{int(time.time())}")
+        checkpoint = self._open_checkpoint(device)
+        
+        saved = checkpoint.get("initialization") if checkpoint else None
+        # Unique even for operations started in the same second; it keys the journal
+        operation_name = saved['operation_name'] if saved else f"unlock_{int(self.clock.time())}_{uuid.uuid4().hex[:8]}"
+        
+        operation_logger = OperationLogger(device_logger, operation_name, clock=self.clock)
+        scheduler = DeadlineScheduler(self.config.device.operation_timeout, clock=self.clock)
+        operation_id = None
         
         self.current_operation = operation_logger
+        OPERATIONS_IN_PROGRESS.inc()
         
         try:
             self.cli.info(f"Starting unlock operation for {device.model}")
-            operation_logger.log_step("initialization", "started")
             
-            # Register device with server
-            self.cli.info("Registering device with server...")
-            success = await self.device_manager.register_device(device)
-            if not success:
-                operation_logger.log_step("device_registration", "failed")
-                self.cli.error("Failed to register device with server")
-                return False
+            if checkpoint and checkpoint.exists:
+                self.cli.info(f"Resuming interrupted operation after stage '{checkpoint.last_stage}'")
+                operation_logger.log_step("initialization", "resumed", f"Last durable stage: {checkpoint.last_stage}")
+                await self._discard_expired_auth(checkpoint, operation_logger)
+            else:
+                operation_logger.log_step("initialization", "started")
+                if checkpoint:
+                    checkpoint.record("initialization", {
+                        'operation_name': operation_name,
+                        'device': device.to_dict()
+                    })
+                operation_logger.log_step("initialization", "completed")
             
-            operation_logger.log_step("device_registration", "completed")
+            # Register device with server
+            if checkpoint and checkpoint.is_done("device_registration"):
+                self.device_manager.track_device(device)
+                operation_logger.log_step("device_registration", "skipped", "Restored from checkpoint")
+            else:
+                self.cli.info("Registering device with server...")
+                operation_logger.log_step("device_registration", "started")
+                success = await scheduler.run("device_registration", self.device_manager.register_device(device))
+                if not success:
+                    operation_logger.log_step("device_registration", "failed")
+                    self.cli.error("Failed to register device with server")
+                    if checkpoint:
+                        checkpoint.complete()
+                    self._finish_operation(operation_id, device, "failed", "Failed to register device with server", operation_logger)
+                    return False
+                
+                operation_logger.log_step("device_registration", "completed")
+                if checkpoint:
+                    checkpoint.record("device_registration")
             
             # Request auth key
-            self.cli.info("Requesting authentication key...")
-            auth_response = await self.api_client.request_auth_key(device.to_dict())
-            if not auth_response:
-                operation_logger.log_step("auth_key_request", "failed")
-                self.cli.error("Failed to get authentication key")
-                return False
-            
-            operation_logger.log_step("auth_key_request", "completed")
+            if checkpoint and checkpoint.is_done("auth_key_request"):
+                auth_response = checkpoint.get("auth_key_request")["response"]
+                operation_logger.log_step("auth_key_request", "skipped", "Restored from checkpoint")
+            else:
+                self.cli.info("Requesting authentication key...")
+                operation_logger.log_step("auth_key_request", "started")
+                auth_response = await scheduler.run("auth_key_request", self.api_client.request_auth_key(device.to_dict()))
+                if not auth_response:
+                    operation_logger.log_step("auth_key_request", "failed")
+                    self.cli.error("Failed to get authentication key")
+                    if checkpoint:
+                        checkpoint.complete()
+                    self._finish_operation(operation_id, device, "failed", "Failed to get authentication key", operation_logger)
+                    return False
+                
+                operation_logger.log_step("auth_key_request", "completed")
+                if checkpoint:
+                    checkpoint.record("auth_key_request", {
+                        'response': auth_response,
+                        'expires_at': self.clock.time() + auth_response.get('expiresIn', 300)
+                    })
             
             # Start unlock operation on server
-            self.cli.info("Starting unlock operation...")
-            operation_response = await self.api_client.start_unlock_operation(
-                device.device_id,
-                auth_response['authKey'],
-                self._get_operation_type(device)
-            )
-            
-            if not operation_response:
-                operation_logger.log_step("operation_start", "failed")
-                self.cli.error("Failed to start unlock operation")
-                return False
-            
-            operation_id = operation_response['operation']['id']
-            operation_logger.log_step("operation_start", "completed", f"Operation ID: {operation_id}")
+            if checkpoint and checkpoint.is_done("operation_start"):
+                operation_id = checkpoint.get("operation_start")["operation_id"]
+                operation_logger.server_operation_id = operation_id
+                operation_logger.log_step("operation_start", "skipped", f"Operation ID: {operation_id}")
+            else:
+                self.cli.info("Starting unlock operation...")
+                operation_logger.log_step("operation_start", "started")
+                operation_response = await scheduler.run("operation_start", self.api_client.start_unlock_operation(
+                    device.device_id,
+                    auth_response['authKey'],
+                    self._get_operation_type(device)
+                ))
+                
+                if not operation_response:
+                    operation_logger.log_step("operation_start", "failed")
+                    self.cli.error("Failed to start unlock operation")
+                    if checkpoint:
+                        checkpoint.complete()
+                    self._finish_operation(operation_id, device, "failed", "Failed to start unlock operation", operation_logger)
+                    return False
+                
+                operation_id = operation_response['operation']['id']
+                operation_logger.server_operation_id = operation_id
+                operation_logger.log_step("operation_start", "completed", f"Operation ID: {operation_id}")
+                if checkpoint:
+                    checkpoint.record("operation_start", {'operation_id': operation_id})
             
             # Perform device-specific unlock
             self.cli.info("Performing device unlock...")
-            unlock_success = await self._perform_device_unlock(
+            unlock_success = await scheduler.run("device_unlock", self._perform_device_unlock(
                 device, 
                 auth_response, 
-                operation_logger
-            )
+                operation_logger,
+                checkpoint
+            ))
             
             # Update operation status
             status = "completed" if unlock_success else "failed"
             error_message = None if unlock_success else "Device unlock operation failed"
             
-            await self.api_client.update_operation_status(
+            operation_logger.log_step("status_update", "started")
+            await scheduler.run("status_update", self.api_client.update_operation_status(
                 operation_id,
                 status,
                 error_message
-            )
+            ))
+            operation_logger.log_step("status_update", "completed")
             
-            operation_logger.log_completion(unlock_success, error_message)
+            # The server has the final status; nothing left to resume
+            if checkpoint:
+                checkpoint.complete()
+            
+            self._finish_operation(operation_id, device, status, error_message, operation_logger)
             
             if unlock_success:
                 self.cli.success("Device unlocked successfully!")
             else:
                 self.cli.error("Device unlock failed")
             
-            # Save operation log
-            if self.config.advanced.save_operation_logs:
-                log_file = Path("logs") / f"operation_{operation_id}.json"
-                operation_logger.save_operation_log(str(log_file))
-            
             return unlock_success
             
+        except DeadlineExceeded as e:
+            self.cli.error(f"Unlock operation timed out during {e.stage}")
+            operation_logger.log_step(e.stage, "failed", str(e))
+            await self._report_timeout(operation_id, e, checkpoint)
+            self._finish_operation(operation_id, device, "failed", str(e), operation_logger)
+            return False
         except Exception as e:
             self.cli.error(f"Unlock operation failed: {e}")
             self.logger.error(f"Unlock operation error: {e}", exc_info=True)
-            operation_logger.log_completion(False, str(e))
+            self._finish_operation(operation_id, device, "failed", str(e), operation_logger)
             return False
         finally:
             self.current_operation = None
+            OPERATIONS_IN_PROGRESS.dec()
+    
+    async def resume_interrupted(self) -> bool:
+        """Resume every checkpointed operation whose device is connected."""
+        if not self.config.advanced.enable_checkpoints:
+            self.cli.error("Checkpoints are disabled in configuration")
+            return False
+        
+        pending = self.checkpoints.pending()
+        if not pending:
+            self.cli.info("No interrupted operations found")
+            return True
+        
+        self.cli.info(f"Found {len(pending)} interrupted operation(s)")
+        devices = await self.detect_devices()
+        all_success = True
+        
+        for checkpoint in pending:
+            device = next((d for d in devices if d.device_id == checkpoint.device_id), None)
+            
+            if not device:
+                saved = checkpoint.get("initialization") or {}
+                device_info = saved.get('device', {})
+                self.cli.warning(f"Device {device_info.get('serialNumber', checkpoint.device_id)} "
+                                 f"is not connected, skipping")
+                all_success = False
+                continue
+            
+            if not await self.unlock_device(device):
+                all_success = False
+        
+        return all_success
+    
+    async def _report_timeout(self, operation_id, error: DeadlineExceeded, checkpoint: Optional[OperationCheckpoint]):
+        """Send the final failed status for an operation that ran out of time."""
+        if operation_id is None:
+            return
+        
+        # The operation budget is spent; give the final update its own short one
+        grace = min(self.config.server.timeout, self.TIMEOUT_REPORT_GRACE)
+        try:
+            await asyncio.wait_for(
+                self.api_client.update_operation_status(operation_id, "failed", str(error)),
+                timeout=grace
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not report timeout for operation {operation_id}: {e}")
+            return
+        
+        if checkpoint:
+            checkpoint.complete()
+    
+    def _finish_operation(self, operation_id, device: Device, status: str, error_message: Optional[str],
+                          operation_logger: OperationLogger):
+        """Close the operation log, journal it and record the outcome, however the operation ended."""
+        operation_logger.log_completion(status == "completed", error_message)
+        
+        if self.config.advanced.save_operation_logs:
+            try:
+                self.journal.append(operation_logger.get_operation_log())
+            except Exception as e:
+                self.logger.warning(f"Could not journal operation {operation_logger.operation_id}: {e}")
+        
+        self._record_outcome(operation_id, device, status, error_message, operation_logger)
+    
+    def _record_outcome(self, operation_id, device: Device, status: str, error_message: Optional[str],
+                        operation_logger: OperationLogger):
+        """Add a finished operation to the rolling statistics and local history store."""
+        operation_type = self._get_operation_type(device)
+        OPERATIONS.labels(device.mode.value, status).inc()
+        self.stats.record_operation(device, operation_type, status == "completed", operation_logger.duration)
+        
+        if operation_id is None:
+            return
+        
+        try:
+            self.history.record_operation(
+                operation_id, device, operation_type, status,
+                started_at=operation_logger.get_operation_log()['started_at'],
+                error_message=error_message,
+                duration=operation_logger.duration
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not record operation {operation_id} in history: {e}")
+    
+    def _open_checkpoint(self, device: Device) -> Optional[OperationCheckpoint]:
+        """Open the device's checkpoint if checkpointing is enabled."""
+        if not self.config.advanced.enable_checkpoints:
+            return None
+        return self.checkpoints.open(device.device_id)
+    
+    async def _discard_expired_auth(self, checkpoint: OperationCheckpoint, operation_logger: OperationLogger):
+        """Roll a checkpoint back to registration if its auth key can no longer be used."""
+        auth_stage = checkpoint.get("auth_key_request")
+        if not auth_stage or auth_stage.get('expires_at', 0) > self.clock.time():
+            return
+        
+        operation_logger.log_step("auth_key_request", "expired", "Checkpointed auth key expired, requesting a new one")
+        
+        operation_stage = checkpoint.get("operation_start")
+        if operation_stage:
+            await self.api_client.update_operation_status(
+                operation_stage['operation_id'],
+                "failed",
+                "Interrupted; superseded by resumed operation"
+            )
+        
+        checkpoint.rollback_to("device_registration")
     
     async def unlock_device_by_id(self, device_id: str) -> bool:
         """Unlock device by device ID."""
@@ -216,18 +418,56 @@ class XiaomiUnlockClient:
         
         return await self.unlock_device(mock_device)
     
-    async def show_operation_history(self):
-        """Show operation history."""
-        self.cli.info("Fetching operation history...")
+    async def sync_history(self) -> int:
+        """Pull operations changed on the server since the last sync into the local store."""
+        page_size = self.config.advanced.history_sync_page_size
+        synced = 0
+        
+        while True:
+            cursor = self.history.get_cursor()
+            page = await self.api_client.get_operations_since(cursor['since'], cursor['sinceId'], page_size)
+            if page is None:
+                raise ConnectionError("Failed to fetch operation history")
+            
+            operations = page.get('operations', [])
+            synced += self.history.merge_server_operations(operations, page.get('cursor'))
+            
+            # A server without cursor support just returns its latest page
+            if len(operations) < page_size or not page.get('cursor'):
+                return synced
+    
+    async def show_operation_history(self, device: Optional[str] = None, status: Optional[str] = None,
+                                     operation_type: Optional[str] = None, search: Optional[str] = None,
+                                     limit: int = 50, show_stats: bool = False, offline: bool = False):
+        """Show operation history from the local store, syncing it from the server first."""
+        if not offline:
+            self.cli.info("Syncing operation history...")
+            try:
+                synced = await self.sync_history()
+                self.logger.debug(f"Synced {synced} operations from server")
+            except Exception as e:
+                self.cli.warning(f"Could not sync with server, showing local history: {e}")
         
         try:
-            history = await self.api_client.get_operation_history()
+            operations = self.history.query(
+                device=device, status=status, operation_type=operation_type,
+                search=search, limit=limit
+            )
             
-            if not history or not history.get('operations'):
+            if show_stats:
+                stats = self.history.stats(device=device, operation_type=operation_type)
+                self.cli.info(f"Total operations: {stats['total']}")
+                for name, count in sorted(stats['by_status'].items()):
+                    self.cli.info(f"  {name}: {count}")
+                if stats['success_rate'] is not None:
+                    self.cli.info(f"Success rate: {stats['success_rate'] * 100:.1f}%")
+                if stats['mean_duration'] is not None:
+                    self.cli.info(f"Mean duration: {stats['mean_duration']:.1f}s")
+            
+            if not operations:
                 self.cli.info("No operation history found")
                 return
             
-            operations = history['operations']
             self.cli.success(f"Found {len(operations)} operations:")
             
             for op in operations:
@@ -235,8 +475,8 @@ class XiaomiUnlockClient:
                 self.cli.info(f"  • Operation {op['id']}: {op['operationType']} - ", end="")
                 self.cli.colored_text(op['status'].upper(), status_color)
                 
-                if op.get('device'):
-                    self.cli.info(f"    Device: {op['device'].get('model', 'Unknown')} ({op['device'].get('serialNumber', 'Unknown')})")
+                if op['device'].get('model') or op['device'].get('serialNumber'):
+                    self.cli.info(f"    Device: {op['device'].get('model') or 'Unknown'} ({op['device'].get('serialNumber') or 'Unknown'})")
                 
                 self.cli.info(f"    Started: {op['startedAt']}")
                 if op.get('completedAt'):
@@ -256,27 +496,40 @@ class XiaomiUnlockClient:
         self.cli.info(f"  Auto-detect Modes: {', '.join(self.config.device.auto_detect_modes)}")
         self.cli.info(f"  Log Level: {self.config.logging.level}")
         self.cli.info(f"  Mock Mode: {'Enabled' if self.config.advanced.enable_mock_mode else 'Disabled'}")
+        
+        summary = self.stats.summary()
+        if summary['totals']['count']:
+            self.cli.info("Session Statistics:")
+            for window, stats in summary['windows'].items():
+                rate = f"{stats['success_rate'] * 100:.0f}%" if stats['success_rate'] is not None else "n/a"
+                p90 = f"{stats['latency']['p90']:.1f}s" if stats['latency']['p90'] is not None else "n/a"
+                self.cli.info(f"  Last {window}: {stats['count']} operations, {rate} success, p90 {p90}")
     
-    async def _perform_device_unlock(self, device: Device, auth_response: dict, operation_logger: OperationLogger) -> bool:
+    async def _perform_device_unlock(self, device: Device, auth_response: dict, operation_logger: OperationLogger,
+                                     checkpoint: Optional[OperationCheckpoint] = None) -> bool:
         """Perform the actual device unlock operation."""
         operation_logger.log_step("device_unlock", "started")
         
         try:
             if device.mode == DeviceMode.EDL:
-                return await self._unlock_edl_device(device, auth_response, operation_logger)
+                success = await self._unlock_edl_device(device, auth_response, operation_logger, checkpoint)
             elif device.mode == DeviceMode.BROM:
-                return await self._unlock_brom_device(device, auth_response, operation_logger)
+                success = await self._unlock_brom_device(device, auth_response, operation_logger, checkpoint)
             elif device.mode == DeviceMode.MI_ASSISTANT:
-                return await self._unlock_mi_assistant_device(device, auth_response, operation_logger)
+                success = await self._unlock_mi_assistant_device(device, auth_response, operation_logger, checkpoint)
             else:
                 operation_logger.log_step("device_unlock", "failed", f"Unsupported mode: {device.mode}")
                 return False
+            
+            operation_logger.log_step("device_unlock", "completed" if success else "failed")
+            return success
                 
         except Exception as e:
             operation_logger.log_step("device_unlock", "failed", str(e))
             raise
     
-    async def _unlock_edl_device(self, device: Device, auth_response: dict, operation_logger: OperationLogger) -> bool:
+    async def _unlock_edl_device(self, device: Device, auth_response: dict, operation_logger: OperationLogger,
+                                  checkpoint: Optional[OperationCheckpoint] = None) -> bool:
         """Unlock device in EDL mode."""
         operation_logger.log_step("edl_unlock", "started")
         
@@ -294,29 +547,21 @@ class XiaomiUnlockClient:
                 ("Verifying unlock status", 2)
             ]
             
-            total_steps = sum(duration for _, duration in steps)
-            progress = 0
-            
-            for step_name, duration in steps:
-                operation_logger.log_step(step_name.lower().replace(' ', '_'), "started")
-                self.cli.info(f"  {step_name}...")
-                
-                # Simulate work with progress
-                for i in range(duration):
-                    await asyncio.sleep(0.5)  # Simulate work
-                    progress += 1
-                    operation_logger.log_progress("edl_unlock", progress, total_steps)
-                
-                operation_logger.log_step(step_name.lower().replace(' ', '_'), "completed")
+            await self._run_unlock_steps("edl_unlock", steps, operation_logger, checkpoint)
             
             operation_logger.log_step("edl_unlock", "completed")
             return True
             
+        except DeadlineExceeded as e:
+            # A step timeout fails the whole operation, not just this stage
+            operation_logger.log_step("edl_unlock", "failed", str(e))
+            raise
         except Exception as e:
             operation_logger.log_step("edl_unlock", "failed", str(e))
             return False
     
-    async def _unlock_brom_device(self, device: Device, auth_response: dict, operation_logger: OperationLogger) -> bool:
+    async def _unlock_brom_device(self, device: Device, auth_response: dict, operation_logger: OperationLogger,
+                                  checkpoint: Optional[OperationCheckpoint] = None) -> bool:
         """Unlock device in BROM mode."""
         operation_logger.log_step("brom_unlock", "started")
         
@@ -334,29 +579,21 @@ class XiaomiUnlockClient:
                 ("Bypassing FRP protection", 4)
             ]
             
-            total_steps = sum(duration for _, duration in steps)
-            progress = 0
-            
-            for step_name, duration in steps:
-                operation_logger.log_step(step_name.lower().replace(' ', '_'), "started")
-                self.cli.info(f"  {step_name}...")
-                
-                # Simulate work with progress
-                for i in range(duration):
-                    await asyncio.sleep(0.5)  # Simulate work
-                    progress += 1
-                    operation_logger.log_progress("brom_unlock", progress, total_steps)
-                
-                operation_logger.log_step(step_name.lower().replace(' ', '_'), "completed")
+            await self._run_unlock_steps("brom_unlock", steps, operation_logger, checkpoint)
             
             operation_logger.log_step("brom_unlock", "completed")
             return True
             
+        except DeadlineExceeded as e:
+            # A step timeout fails the whole operation, not just this stage
+            operation_logger.log_step("brom_unlock", "failed", str(e))
+            raise
         except Exception as e:
             operation_logger.log_step("brom_unlock", "failed", str(e))
             return False
     
-    async def _unlock_mi_assistant_device(self, device: Device, auth_response: dict, operation_logger: OperationLogger) -> bool:
+    async def _unlock_mi_assistant_device(self, device: Device, auth_response: dict, operation_logger: OperationLogger,
+                                  checkpoint: Optional[OperationCheckpoint] = None) -> bool:
         """Unlock device in Mi Assistant mode."""
         operation_logger.log_step("mi_assistant_unlock", "started")
         
@@ -373,28 +610,73 @@ class XiaomiUnlockClient:
                 ("Verifying unlock status", 2)
             ]
             
-            total_steps = sum(duration for _, duration in steps)
-            progress = 0
-            
-            for step_name, duration in steps:
-                operation_logger.log_step(step_name.lower().replace(' ', '_'), "started")
-                self.cli.info(f"  {step_name}...")
-                
-                # Simulate work with progress
-                for i in range(duration):
-                    await asyncio.sleep(0.5)  # Simulate work
-                    progress += 1
-                    operation_logger.log_progress("mi_assistant_unlock", progress, total_steps)
-                
-                operation_logger.log_step(step_name.lower().replace(' ', '_'), "completed")
+            await self._run_unlock_steps("mi_assistant_unlock", steps, operation_logger, checkpoint)
             
             operation_logger.log_step("mi_assistant_unlock", "completed")
             return True
             
+        except DeadlineExceeded as e:
+            # A step timeout fails the whole operation, not just this stage
+            operation_logger.log_step("mi_assistant_unlock", "failed", str(e))
+            raise
         except Exception as e:
             operation_logger.log_step("mi_assistant_unlock", "failed", str(e))
             return False
     
+    async def _run_unlock_steps(self, unlock_name: str, steps: list, operation_logger: OperationLogger,
+                                checkpoint: Optional[OperationCheckpoint] = None):
+        """Run device unlock steps, skipping checkpointed ones and bounding each by the connection timeout."""
+        total_steps = sum(duration for _, duration in steps)
+        progress = 0
+        
+        for step_name, duration in steps:
+            step_key = step_name.lower().replace(' ', '_')
+            
+            if checkpoint and checkpoint.is_done(f"{unlock_name}.{step_key}"):
+                progress += duration
+                operation_logger.log_step(step_key, "skipped", "Restored from checkpoint")
+                continue
+            
+            operation_logger.log_step(step_key, "started")
+            self.cli.info(f"  {step_name}...")
+            
+            # A single hung step must not hold the device for the whole budget
+            # Steps are simulated on self.clock, so their budget is clock time
+            step_timeout = clamp_timeout(self.clock.to_real(self.config.device.connection_timeout))
+            try:
+                with tracer.span(f"{unlock_name}.{step_key}"):
+                    await asyncio.wait_for(
+                        self._simulate_step_work(unlock_name, step_key, duration, progress, total_steps, operation_logger),
+                        timeout=step_timeout
+                    )
+            except asyncio.TimeoutError:
+                operation_logger.log_step(step_key, "failed", f"Timed out after {step_timeout:.1f}s")
+                raise DeadlineExceeded(f"{unlock_name}.{step_key}", step_timeout)
+            
+            progress += duration
+            operation_logger.log_step(step_key, "completed")
+            if checkpoint:
+                checkpoint.record(f"{unlock_name}.{step_key}")
+    
+    async def _simulate_step_work(self, unlock_name: str, step_key: str, duration: int, progress: int,
+                                  total_steps: int, operation_logger: OperationLogger):
+        """Simulate work with progress."""
+        # Device faults strike partway through the step, after some work is done
+        fault_at = duration // 2
+        
+        for i in range(duration):
+            if faults.enabled and i == fault_at:
+                # Injected latency counts against the step timeout like slow device I/O would
+                fault = (await faults.inject('device', f"{unlock_name}.{step_key}")).fault
+                if fault is not None and fault.kind == 'disconnect':
+                    raise RuntimeError(f"Device disconnected during {step_key}")
+                if fault is not None:
+                    raise RuntimeError(f"Step {step_key} failed")
+            
+            await self.clock.sleep(0.5)  # Simulate work
+            progress += 1
+            operation_logger.log_progress(unlock_name, progress, total_steps)
+    
     def _get_operation_type(self, device: Device) -> str:
         """Get operation type based on device mode."""
         if device.mode == DeviceMode.EDL:
@@ -0,0 +1,303 @@
+"""Long-running client daemon with a local Unix socket RPC interface."""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'xiaomi-unlock-client.sock')
+
+# Histories and device lists can exceed asyncio's 64KB default line limit
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class RPCError(Exception):
+    """Error returned by the daemon for a failed RPC call."""
+
+
+class UnlockDaemon:
+    """Keeps a client warm and serves detect/unlock/status/history over RPC.
+
+    The API session, device registry and detection results live for the
+    lifetime of the process, and a background watcher keeps the registry
+    current so detect calls answer from memory.
+    """
+
+    def __init__(self, client, socket_path: str = DEFAULT_SOCKET_PATH, watch_interval: float = 2.0):
+        self.client = client
+        self.logger = client.logger
+        self.socket_path = socket_path
+        self.watch_interval = watch_interval
+
+        self.devices: Dict[str, Any] = {}       # serial -> Device
+        self.last_seen: Dict[str, float] = {}   # serial -> time.time()
+        self.last_scan: Optional[float] = None
+        self.active: Dict[str, asyncio.Task] = {}  # serial -> unlock task
+        self.started_at = time.time()
+
+        self._server = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._methods: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+            'ping': self.rpc_ping,
+            'detect': self.rpc_detect,
+            'unlock': self.rpc_unlock,
+            'status': self.rpc_status,
+            'history': self.rpc_history,
+            'shutdown': self.rpc_shutdown,
+        }
+
+    async def serve(self):
+        """Run until shutdown is requested or a termination signal arrives."""
+        if not hasattr(asyncio, 'start_unix_server'):
+            raise RuntimeError("Daemon mode requires Unix domain socket support")
+
+        self._stopping = asyncio.Event()
+        self._clear_stale_socket()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        async with self.client.api_client:
+            # Owner-only from the moment it is bound; a chmod afterwards leaves a window
+            old_umask = os.umask(0o177)
+            try:
+                self._server = await asyncio.start_unix_server(
+                    self._handle_connection, path=self.socket_path, limit=STREAM_LIMIT
+                )
+            finally:
+                os.umask(old_umask)
+
+            watcher = asyncio.create_task(self._watch_devices())
+            self.logger.info(f"Daemon listening on {self.socket_path}")
+
+            try:
+                await self._stopping.wait()
+            finally:
+                watcher.cancel()
+                self._server.close()
+                await self._server.wait_closed()
+                for task in self.active.values():
+                    task.cancel()
+                await asyncio.gather(watcher, *self.active.values(), return_exceptions=True)
+                self._remove_socket()
+                self.logger.info("Daemon stopped")
+
+    async def _watch_devices(self):
+        """Poll detection in the background and keep the registry warm."""
+        while True:
+            try:
+                await self._refresh_devices()
+            except Exception as e:
+                self.logger.warning(f"Device watcher error: {e}")
+            await asyncio.sleep(self.watch_interval)
+
+    async def _refresh_devices(self):
+        devices = await self.client.device_detector.detect_all()
+        now = time.time()
+        current = {device.serial_number: device for device in devices}
+
+        for serial in current.keys() - self.devices.keys():
+            self.logger.info(f"Device connected: {current[serial]}")
+        for serial in self.devices.keys() - current.keys():
+            self.logger.info(f"Device disconnected: {self.devices[serial]}")
+
+        self.devices = current
+        for serial in current:
+            self.last_seen[serial] = now
+        self.last_scan = now
+        self.client.detected_devices = devices
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve newline-delimited JSON requests on one connection."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                response = await self._dispatch(line)
+                writer.write(json.dumps(response, default=str).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, line: bytes) -> Dict[str, Any]:
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            method = self._methods.get(request.get('method'))
+            if method is None:
+                raise RPCError(f"Unknown method: {request.get('method')}")
+
+            result = await method(request.get('params') or {})
+            return {'id': request_id, 'result': result}
+
+        except Exception as e:
+            self.logger.debug(f"RPC error: {e}")
+            return {'id': request_id, 'error': str(e)}
+
+    async def rpc_ping(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {'pong': True, 'pid': os.getpid()}
+
+    async def rpc_detect(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return registry contents, scanning first if asked or never scanned."""
+        if params.get('refresh') or self.last_scan is None:
+            await self._refresh_devices()
+
+        return {
+            'devices': [device.to_dict() for device in self.devices.values()],
+            'scanned_at': self.last_scan
+        }
+
+    async def rpc_unlock(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Unlock a device by serial, device id or mode and wait for the result."""
+        if self.last_scan is None:
+            await self._refresh_devices()
+
+        device = self._find_device(params)
+        if device is None:
+            await self._refresh_devices()
+            device = self._find_device(params)
+        if device is None:
+            raise RPCError("No matching device connected")
+
+        if device.serial_number in self.active:
+            raise RPCError(f"Device {device.serial_number} already has an operation in progress")
+
+        task = asyncio.create_task(self.client.unlock_device(device))
+        self.active[device.serial_number] = task
+        started = time.monotonic()
+
+        try:
+            success = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self.active.pop(device.serial_number, None)
+            else:
+                # The caller went away; let the operation finish on its own
+                task.add_done_callback(lambda _: self.active.pop(device.serial_number, None))
+
+        return {
+            'success': success,
+            'device': device.to_dict(),
+            'duration': round(time.monotonic() - started, 3)
+        }
+
+    async def rpc_status(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at, 1),
+            'devices': len(self.devices),
+            'last_scan': self.last_scan,
+            'active_operations': sorted(self.active),
+            'server_url': self.client.config.server.url,
+            'operations': self.client.stats.summary(),
+            'operations_by_mode': self.client.stats.breakdown('1h', 'mode')
+        }
+
+    async def rpc_history(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Query the local history store, syncing it from the server first."""
+        synced = None
+        if not params.get('offline'):
+            try:
+                synced = await self.client.sync_history()
+            except Exception as e:
+                self.logger.warning(f"History sync failed, answering from local store: {e}")
+
+        operations = self.client.history.query(
+            device=params.get('device'),
+            status=params.get('status'),
+            operation_type=params.get('operation_type'),
+            search=params.get('search'),
+            limit=int(params.get('limit', 50)),
+            offset=int(params.get('offset', 0))
+        )
+        return {'operations': operations, 'synced': synced}
+
+    async def rpc_shutdown(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._stopping.set()
+        return {'stopping': True}
+
+    def _find_device(self, params: Dict[str, Any]):
+        """First matching idle device, else a matching busy one so the caller can say it is busy."""
+        busy = None
+        for device in self.devices.values():
+            if params.get('serial') and device.serial_number != params['serial']:
+                continue
+            if params.get('device_id') and device.device_id != params['device_id']:
+                continue
+            if params.get('mode') and device.mode.value != params['mode']:
+                continue
+            if device.serial_number in self.active:
+                busy = busy or device
+                continue
+            return device
+        return busy
+
+    def _clear_stale_socket(self):
+        """Remove a socket left behind by a dead daemon; refuse to take over a live one."""
+        if not os.path.exists(self.socket_path):
+            return
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except ConnectionRefusedError:
+            self._remove_socket()
+            return
+        except FileNotFoundError:
+            return
+        finally:
+            probe.close()
+
+        raise RuntimeError(f"Another daemon is already listening on {self.socket_path}")
+
+    def _remove_socket(self):
+        try:
+            Path(self.socket_path).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class DaemonClient:
+    """Thin RPC client for a running daemon; imports only the standard library."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+        self._next_id = 0
+
+    async def call(self, method: str, **params) -> Any:
+        """Send one request and wait for its response."""
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=STREAM_LIMIT)
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise RPCError(f"No daemon running at {self.socket_path}")
+
+        try:
+            self._next_id += 1
+            request = {'id': self._next_id, 'method': method, 'params': params}
+            writer.write(json.dumps(request).encode() + b'\n')
+            await writer.drain()
+
+            line = await reader.readline()
+            if not line:
+                raise RPCError("Daemon closed the connection")
+        finally:
+            writer.close()
+
+        response = json.loads(line)
+        if 'error' in response:
+            raise RPCError(response['error'])
+        return response['result']
@@ -0,0 +1,269 @@
+"""Local SQLite store of operation history, synced incrementally from the server."""
+
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# Cursor that makes the server return every operation on first sync
+INITIAL_CURSOR = {'since': '1970-01-01T00:00:00Z', 'sinceId': 0}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id TEXT PRIMARY KEY,
+    device_id TEXT,
+    serial_number TEXT,
+    model TEXT,
+    manufacturer TEXT,
+    operation_type TEXT,
+    status TEXT,
+    started_at REAL,
+    completed_at REAL,
+    error_message TEXT,
+    duration REAL,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_operations_device_id ON operations(device_id);
+CREATE INDEX IF NOT EXISTS idx_operations_status ON operations(status);
+CREATE INDEX IF NOT EXISTS idx_operations_operation_type ON operations(operation_type);
+CREATE INDEX IF NOT EXISTS idx_operations_started_at ON operations(started_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+COLUMNS = ('id', 'device_id', 'serial_number', 'model', 'manufacturer', 'operation_type',
+           'status', 'started_at', 'completed_at', 'error_message', 'duration', 'source')
+
+
+def _to_epoch(value) -> Optional[float]:
+    """Convert a server timestamp (ISO 8601 string) or epoch number to epoch seconds."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _to_iso(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+
+class HistoryStore:
+    """Operation history kept on disk so queries work offline.
+
+    Rows come from two places: operations this client ran (recorded as
+    they finish) and the server's history (pulled with a since-cursor).
+    Both are keyed by the server operation id, so a synced row fills in
+    whatever the local record lacked and vice versa.
+    """
+
+    def __init__(self, path: str = "logs/history.db"):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path))
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # Writing
+
+    def record_operation(self, operation_id, device, operation_type: str, status: str,
+                         started_at: float, error_message: Optional[str] = None,
+                         duration: Optional[float] = None):
+        """Record an operation this client ran."""
+        with self.conn:
+            self._upsert({
+                'id': str(operation_id),
+                'device_id': device.device_id,
+                'serial_number': device.serial_number,
+                'model': device.model,
+                'manufacturer': device.manufacturer,
+                'operation_type': operation_type,
+                'status': status,
+                'started_at': started_at,
+                'completed_at': time.time() if status in ('completed', 'failed') else None,
+                'error_message': error_message,
+                'duration': duration,
+                'source': 'local'
+            })
+
+    def merge_server_operations(self, operations: List[Dict[str, Any]], cursor: Optional[Dict[str, Any]] = None) -> int:
+        """Upsert one page of server operations and advance the sync cursor atomically."""
+        with self.conn:
+            for op in operations:
+                device = op.get('device') or {}
+                self._upsert({
+                    'id': str(op['id']),
+                    'device_id': op.get('deviceId'),
+                    'serial_number': device.get('serialNumber'),
+                    'model': device.get('model'),
+                    'manufacturer': device.get('manufacturer'),
+                    'operation_type': op.get('operationType'),
+                    'status': op.get('status'),
+                    'started_at': _to_epoch(op.get('startedAt')),
+                    'completed_at': _to_epoch(op.get('completedAt')),
+                    'error_message': op.get('errorMessage'),
+                    'duration': None,
+                    'source': 'server'
+                })
+
+            if cursor:
+                self._set_state('cursor_since', cursor['since'])
+                self._set_state('cursor_since_id', str(cursor['sinceId']))
+                self._set_state('synced_at', str(time.time()))
+
+        return len(operations)
+
+    def _upsert(self, row: Dict[str, Any]):
+        # The server is authoritative for status; local rows keep the
+        # fields only the client knows (duration) and fill any gaps.
+        self.conn.execute(f"""
+            INSERT INTO operations ({', '.join(COLUMNS)})
+            VALUES ({', '.join('?' for _ in COLUMNS)})
+            ON CONFLICT(id) DO UPDATE SET
+                device_id = COALESCE(excluded.device_id, device_id),
+                serial_number = COALESCE(excluded.serial_number, serial_number),
+                model = COALESCE(excluded.model, model),
+                manufacturer = COALESCE(excluded.manufacturer, manufacturer),
+                operation_type = COALESCE(excluded.operation_type, operation_type),
+                status = CASE WHEN excluded.source = 'server' OR source = 'local'
+                              THEN COALESCE(excluded.status, status) ELSE status END,
+                started_at = COALESCE(excluded.started_at, started_at),
+                completed_at = COALESCE(excluded.completed_at, completed_at),
+                error_message = COALESCE(excluded.error_message, error_message),
+                duration = COALESCE(excluded.duration, duration),
+                source = CASE WHEN source = excluded.source THEN source ELSE 'both' END
+        """, [row.get(column) for column in COLUMNS])
+
+    # Sync state
+
+    def get_cursor(self) -> Dict[str, Any]:
+        since = self._get_state('cursor_since')
+        if since is None:
+            return dict(INITIAL_CURSOR)
+        return {'since': since, 'sinceId': int(self._get_state('cursor_since_id') or 0)}
+
+    def last_synced(self) -> Optional[float]:
+        value = self._get_state('synced_at')
+        return float(value) if value else None
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_state(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    # Queries
+
+    def query(self, device: Optional[str] = None, status: Optional[str] = None,
+              operation_type: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, search: Optional[str] = None,
+              limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Filter operations, newest first, in the server's response shape.
+
+        ``device`` matches a device id or serial number; ``search`` matches
+        a substring of the id, device, model or error message.
+        """
+        where, params = self._filters(device, status, operation_type, since, until, search)
+        rows = self.conn.execute(
+            f"SELECT * FROM operations {where} ORDER BY started_at DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [self._to_api(row) for row in rows]
+
+    def stats(self, device: Optional[str] = None, operation_type: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, Any]:
+        """Counts by status and type, success rate and mean local duration."""
+        where, params = self._filters(device, None, operation_type, since, until, None)
+
+        by_status = dict(self.conn.execute(
+            f"SELECT status, COUNT(*) FROM operations {where} GROUP BY status", params
+        ).fetchall())
+        by_type = dict(self.conn.execute(
+            f"SELECT operation_type, COUNT(*) FROM operations {where} GROUP BY operation_type", params
+        ).fetchall())
+        mean_duration = self.conn.execute(
+            f"SELECT AVG(duration) FROM operations {where}", params
+        ).fetchone()[0]
+
+        total = sum(by_status.values())
+        finished = by_status.get('completed', 0) + by_status.get('failed', 0)
+        return {
+            'total': total,
+            'by_status': by_status,
+            'by_type': by_type,
+            'success_rate': by_status.get('completed', 0) / finished if finished else None,
+            'mean_duration': mean_duration,
+            'last_synced': self.last_synced()
+        }
+
+    @staticmethod
+    def _filters(device, status, operation_type, since, until, search):
+        clauses = []
+        params: List[Any] = []
+
+        if device:
+            clauses.append("(device_id = ? OR serial_number = ?)")
+            params += [device, device]
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if operation_type:
+            clauses.append("operation_type = ?")
+            params.append(operation_type)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(until)
+        if search:
+            clauses.append("(id LIKE ? OR device_id LIKE ? OR serial_number LIKE ? OR model LIKE ? OR error_message LIKE ?)")
+            params += [f"%{search}%"] * 5
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    @staticmethod
+    def _to_api(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'id': row['id'],
+            'deviceId': row['device_id'],
+            'operationType': row['operation_type'],
+            'status': row['status'],
+            'startedAt': _to_iso(row['started_at']),
+            'completedAt': _to_iso(row['completed_at']),
+            'errorMessage': row['error_message'],
+            'duration': row['duration'],
+            'source': row['source'],
+            'device': {
+                'serialNumber': row['serial_number'],
+                'model': row['model'],
+                'manufacturer': row['manufacturer']
+            }
+        }
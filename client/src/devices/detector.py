@@ -5,16 +5,34 @@ import re
 import subprocess
 import time
 from typing import List, Optional, Dict, Any
-try:
-    import usb.core
-    import usb.util
-    USB_AVAILABLE = True
-except ImportError:
-    USB_AVAILABLE = False
-import serial.tools.list_ports
 
 from .models import Device, DeviceMode, ChipsetType
 from ..utils.config import Config
+from ..utils.deadline import DeadlineExceeded, clamp_timeout
+from ..utils.faults import faults
+from ..utils.logger import LazyLogger, LazyMessage
+from ..utils.metrics import DETECTION_SECONDS, DEVICES_DETECTED, COMMANDS, COMMAND_SECONDS
+from ..utils.tracing import tracer
+
+
+# pyusb and pyserial are imported on first scan rather than at startup
+USB_AVAILABLE = None
+usb = None
+
+
+def _load_usb() -> bool:
+    """Import pyusb on first use."""
+    global USB_AVAILABLE, usb
+    
+    if USB_AVAILABLE is None:
+        try:
+            import usb.core
+            import usb.util
+            USB_AVAILABLE = True
+        except ImportError:
+            USB_AVAILABLE = False
+    
+    return USB_AVAILABLE
 
 
 class DeviceDetector:
@@ -61,28 +79,31 @@ class DeviceDetector:
     
     def __init__(self, config: Config, logger):
         self.config = config
-        self.logger = logger
+        self.logger = LazyLogger.wrap(logger)
         self.timeout = config.device.detection_timeout
     
     async def detect_all(self) -> List[Device]:
         """Detect all connected devices in supported modes."""
         devices = []
         
+        start = time.perf_counter()
+        
         # Run detection methods in parallel
         detection_tasks = [
-            self.detect_usb_devices(),
-            self.detect_serial_devices(),
-            self.detect_adb_devices(),
-            self.detect_fastboot_devices()
+            self._timed_detection('usb', self.detect_usb_devices()),
+            self._timed_detection('serial', self.detect_serial_devices()),
+            self._timed_detection('adb', self.detect_adb_devices()),
+            self._timed_detection('fastboot', self.detect_fastboot_devices())
         ]
         
-        results = await asyncio.gather(*detection_tasks, return_exceptions=True)
+        with tracer.span('detection'):
+            results = await asyncio.gather(*detection_tasks, return_exceptions=True)
         
         # Combine results and filter duplicates
         seen_serials = set()
         for result in results:
             if isinstance(result, Exception):
-                self.logger.warning(f"Detection method failed: {result}")
+                self.logger.warning("Detection method failed: %s", result)
                 continue
             
             for device in result:
@@ -90,14 +111,25 @@ class DeviceDetector:
                     devices.append(device)
                     seen_serials.add(device.serial_number)
         
-        self.logger.info(f"Detected {len(devices)} unique devices")
+        self.logger.info("Detected %s unique devices", len(devices))
+        DETECTION_SECONDS.labels('all').observe(time.perf_counter() - start)
+        DEVICES_DETECTED.labels('all').set(len(devices))
+        return devices
+    
+    async def _timed_detection(self, method: str, detection) -> List[Device]:
+        start = time.perf_counter()
+        try:
+            devices = await detection
+        finally:
+            DETECTION_SECONDS.labels(method).observe(time.perf_counter() - start)
+        DEVICES_DETECTED.labels(method).set(len(devices))
         return devices
     
     async def detect_usb_devices(self) -> List[Device]:
         """Detect devices via USB enumeration."""
         devices = []
         
-        if not USB_AVAILABLE:
+        if not _load_usb():
             self.logger.debug("USB support not available, skipping USB detection")
             return devices
         
@@ -127,7 +159,7 @@ class DeviceDetector:
                     )
                     
                     devices.append(device)
-                    self.logger.debug(f"Found USB device: {device}")
+                    self.logger.debug("Found USB device: %s", device)
         
         except Exception as e:
             self.logger.error(f"USB detection error: {e}")
@@ -139,30 +171,32 @@ class DeviceDetector:
         devices = []
         
         try:
+            import serial.tools.list_ports
+            
             ports = serial.tools.list_ports.comports()
             
             for port in ports:
-                for mode, patterns in self.SERIAL_PATTERNS.items():
-                    for pattern in patterns:
-                        if re.search(pattern, port.description, re.IGNORECASE):
-                            # Determine chipset from mode
-                            chipset = ChipsetType.QUALCOMM if mode == DeviceMode.EDL else ChipsetType.MEDIATEK
-                            
-                            device = Device(
-                                device_id="",  # Will be generated
-                                serial_number=port.serial_number or f"COM_{port.device}",
-                                mode=mode,
-                                chipset=chipset,
-                                manufacturer="Unknown",
-                                model=port.description,
-                                connection_path=port.device,
-                                usb_vid=f"{port.vid:04x}" if port.vid else None,
-                                usb_pid=f"{port.pid:04x}" if port.pid else None
-                            )
-                            
-                            devices.append(device)
-                            self.logger.debug(f"Found serial device: {device}")
-                            break
+                mode = self.match_serial_mode(port.description)
+                if mode is None:
+                    continue
+                
+                # Determine chipset from mode
+                chipset = ChipsetType.QUALCOMM if mode == DeviceMode.EDL else ChipsetType.MEDIATEK
+                
+                device = Device(
+                    device_id="",  # Will be generated
+                    serial_number=port.serial_number or f"COM_{port.device}",
+                    mode=mode,
+                    chipset=chipset,
+                    manufacturer="Unknown",
+                    model=port.description,
+                    connection_path=port.device,
+                    usb_vid=f"{port.vid:04x}" if port.vid else None,
+                    usb_pid=f"{port.pid:04x}" if port.pid else None
+                )
+                
+                devices.append(device)
+                self.logger.debug("Found serial device: %s", device)
         
         except Exception as e:
             self.logger.error(f"Serial detection error: {e}")
@@ -177,37 +211,24 @@ class DeviceDetector:
             # Run adb devices command
             result = await self._run_command(['adb', 'devices', '-l'])
             
-            if result and 'List of devices attached' in result:
-                lines = result.split('\n')[1:]  # Skip header
+            for serial in self.parse_adb_devices(result):
+                # Get additional device info
+                device_info = await self._get_adb_device_info(serial)
                 
-                for line in lines:
-                    line = line.strip()
-                    if not line or 'offline' in line:
-                        continue
-                    
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        serial = parts[0]
-                        status = parts[1]
-                        
-                        if status == 'device':
-                            # Get additional device info
-                            device_info = await self._get_adb_device_info(serial)
-                            
-                            device = Device(
-                                device_id="",  # Will be generated
-                                serial_number=serial,
-                                mode=DeviceMode.ADB,
-                                chipset=self._detect_chipset_from_props(device_info),
-                                manufacturer=device_info.get('manufacturer', 'Unknown'),
-                                model=device_info.get('model', 'Unknown'),
-                                android_version=device_info.get('android_version'),
-                                bootloader=device_info.get('bootloader'),
-                                connection_path=f"ADB:{serial}"
-                            )
-                            
-                            devices.append(device)
-                            self.logger.debug(f"Found ADB device: {device}")
+                device = Device(
+                    device_id="",  # Will be generated
+                    serial_number=serial,
+                    mode=DeviceMode.ADB,
+                    chipset=self._detect_chipset_from_props(device_info),
+                    manufacturer=device_info.get('manufacturer', 'Unknown'),
+                    model=device_info.get('model', 'Unknown'),
+                    android_version=device_info.get('android_version'),
+                    bootloader=device_info.get('bootloader'),
+                    connection_path=f"ADB:{serial}"
+                )
+                
+                devices.append(device)
+                self.logger.debug("Found ADB device: %s", device)
         
         except Exception as e:
             self.logger.error(f"ADB detection error: {e}")
@@ -222,42 +243,82 @@ class DeviceDetector:
             # Run fastboot devices command
             result = await self._run_command(['fastboot', 'devices'])
             
-            if result:
-                lines = result.split('\n')
+            for serial in self.parse_fastboot_devices(result):
+                # Get additional device info
+                device_info = await self._get_fastboot_device_info(serial)
                 
-                for line in lines:
-                    line = line.strip()
-                    if line and '\t' in line:
-                        serial, status = line.split('\t', 1)
-                        
-                        if status == 'fastboot':
-                            # Get additional device info
-                            device_info = await self._get_fastboot_device_info(serial)
-                            
-                            device = Device(
-                                device_id="",  # Will be generated
-                                serial_number=serial,
-                                mode=DeviceMode.FASTBOOT,
-                                chipset=self._detect_chipset_from_fastboot(device_info),
-                                manufacturer=device_info.get('manufacturer', 'Unknown'),
-                                model=device_info.get('product', 'Unknown'),
-                                bootloader=device_info.get('bootloader'),
-                                connection_path=f"Fastboot:{serial}"
-                            )
-                            
-                            devices.append(device)
-                            self.logger.debug(f"Found Fastboot device: {device}")
+                device = Device(
+                    device_id="",  # Will be generated
+                    serial_number=serial,
+                    mode=DeviceMode.FASTBOOT,
+                    chipset=self._detect_chipset_from_fastboot(device_info),
+                    manufacturer=device_info.get('manufacturer', 'Unknown'),
+                    model=device_info.get('product', 'Unknown'),
+                    bootloader=device_info.get('bootloader'),
+                    connection_path=f"Fastboot:{serial}"
+                )
+                
+                devices.append(device)
+                self.logger.debug("Found Fastboot device: %s", device)
         
         except Exception as e:
             self.logger.error(f"Fastboot detection error: {e}")
         
         return devices
     
+    @classmethod
+    def match_serial_mode(cls, description: Optional[str]) -> Optional[DeviceMode]:
+        """Mode whose SERIAL_PATTERNS match a serial port description, if any."""
+        for mode, patterns in cls.SERIAL_PATTERNS.items():
+            for pattern in patterns:
+                if re.search(pattern, description or '', re.IGNORECASE):
+                    return mode
+        return None
+    
+    @staticmethod
+    def parse_adb_devices(output: Optional[str]) -> List[str]:
+        """Serials of ready devices in `adb devices -l` output."""
+        if not output or 'List of devices attached' not in output:
+            return []
+        
+        serials = []
+        for line in output.split('\n')[1:]:  # Skip header
+            line = line.strip()
+            if not line or 'offline' in line:
+                continue
+            
+            parts = line.split()
+            if len(parts) >= 2 and parts[1] == 'device':
+                serials.append(parts[0])
+        return serials
+    
+    @staticmethod
+    def parse_fastboot_devices(output: Optional[str]) -> List[str]:
+        """Serials of devices in `fastboot devices` output."""
+        if not output:
+            return []
+        
+        serials = []
+        for line in output.split('\n'):
+            line = line.strip()
+            if line and '\t' in line:
+                serial, status = line.split('\t', 1)
+                if status == 'fastboot':
+                    serials.append(serial)
+        return serials
+    
+    @staticmethod
+    def parse_getvar(output: Optional[str]) -> Optional[str]:
+        """Value from `fastboot getvar` output ("name: value"), or None."""
+        if not output or ':' not in output:
+            return None
+        return output.split(':', 1)[1].strip()
+    
     async def _get_usb_device_info(self, usb_dev) -> Dict[str, str]:
         """Get USB device information."""
         info = {}
         
-        if not USB_AVAILABLE:
+        if not _load_usb():
             return info
             
         try:
@@ -272,7 +333,7 @@ class DeviceDetector:
                 info['serial'] = usb.util.get_string(usb_dev, usb_dev.iSerialNumber)
         
         except Exception as e:
-            self.logger.debug(f"Error getting USB device info: {e}")
+            self.logger.debug("Error getting USB device info: %s", e)
         
         return info
     
@@ -294,7 +355,7 @@ class DeviceDetector:
                 if result:
                     info[key] = result.strip()
             except Exception as e:
-                self.logger.debug(f"Error getting ADB prop {prop}: {e}")
+                self.logger.debug("Error getting ADB prop %s: %s", prop, e)
         
         return info
     
@@ -307,11 +368,11 @@ class DeviceDetector:
         for var in vars_to_get:
             try:
                 result = await self._run_command(['fastboot', '-s', serial, 'getvar', var])
-                if result and ':' in result:
-                    value = result.split(':', 1)[1].strip()
+                value = self.parse_getvar(result)
+                if value is not None:
                     info[var.replace('-', '_')] = value
             except Exception as e:
-                self.logger.debug(f"Error getting fastboot var {var}: {e}")
+                self.logger.debug("Error getting fastboot var %s: %s", var, e)
         
         return info
     
@@ -342,37 +403,66 @@ class DeviceDetector:
     
     async def _run_command(self, cmd: List[str], timeout: int = 10) -> Optional[str]:
         """Run a command asynchronously."""
+        start = time.perf_counter()
+        outcome = 'error'
         try:
+            timeout = clamp_timeout(timeout)
+            
+            if faults.enabled:
+                injection = await faults.inject('command', ' '.join(cmd), timeout)
+                timeout -= injection.delay
+                if injection.fault is not None:
+                    outcome = 'failed'
+                    self.logger.debug("Command failed: %s, stderr: injected fault", LazyMessage(' '.join, cmd))
+                    return None
+            
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
             
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
-            )
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(),
+                    timeout=timeout
+                )
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # Don't leave a hung adb/fastboot holding the device
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
             
             if process.returncode == 0:
+                outcome = 'ok'
                 return stdout.decode('utf-8', errors='ignore')
             else:
-                self.logger.debug(f"Command failed: {' '.join(cmd)}, stderr: {stderr.decode()}")
+                outcome = 'failed'
+                self.logger.debug("Command failed: %s, stderr: %s", LazyMessage(' '.join, cmd), LazyMessage(stderr.decode))
                 return None
         
         except asyncio.TimeoutError:
-            self.logger.warning(f"Command timeout: {' '.join(cmd)}")
+            outcome = 'timeout'
+            self.logger.warning("Command timeout: %s", ' '.join(cmd))
             return None
+        except DeadlineExceeded:
+            outcome = 'timeout'
+            raise
         except FileNotFoundError:
-            self.logger.debug(f"Command not found: {cmd[0]}")
+            outcome = 'not_found'
+            self.logger.debug("Command not found: %s", cmd[0])
             return None
         except Exception as e:
-            self.logger.debug(f"Command error: {e}")
+            self.logger.debug("Command error: %s", e)
             return None
+        finally:
+            COMMANDS.labels(cmd[0], outcome).inc()
+            COMMAND_SECONDS.labels(cmd[0]).observe(time.perf_counter() - start)
     
     async def wait_for_device(self, mode: DeviceMode, timeout: int = 60) -> Optional[Device]:
         """Wait for a device in specific mode to connect."""
-        self.logger.info(f"Waiting for device in {mode.value.upper()} mode...")
+        self.logger.info("Waiting for device in %s mode...", mode.value.upper())
         
         start_time = time.time()
         
@@ -381,12 +471,12 @@ class DeviceDetector:
             
             for device in devices:
                 if device.mode == mode:
-                    self.logger.info(f"Device detected: {device}")
+                    self.logger.info("Device detected: %s", device)
                     return device
             
             await asyncio.sleep(2)  # Check every 2 seconds
         
-        self.logger.warning(f"No device found in {mode.value.upper()} mode within {timeout}s")
+        self.logger.warning("No device found in %s mode within %ss", mode.value.upper(), timeout)
         return None
     
     async def is_device_connected(self, device: Device) -> bool:
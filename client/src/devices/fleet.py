@@ -0,0 +1,266 @@
+"""Seeded generator for large, reproducible fleets of mock devices."""
+
+import bisect
+import gzip
+import itertools
+import json
+import random
+import string
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from .detector import DeviceDetector
+from .mock import MockDevice, MockDeviceSimulator, FAILURE_PROFILES
+from .models import Device, DeviceMode, ChipsetType
+from ..utils.clock import Clock
+
+
+
+def _usb_ids() -> Dict[DeviceMode, List[Tuple[str, str, ChipsetType]]]:
+    """Group DeviceDetector.USB_DEVICES by mode, so generated devices classify
+    exactly as real ones would. ChipsetType.UNKNOWN means the mode does not
+    imply a chipset and one is drawn from the chipset distribution."""
+    usb_ids: Dict[DeviceMode, List[Tuple[str, str, ChipsetType]]] = {}
+    for (vid, pid), (mode, chipset) in DeviceDetector.USB_DEVICES.items():
+        usb_ids.setdefault(mode, []).append((f"{vid:04x}", f"{pid:04x}", chipset))
+    return usb_ids
+
+
+USB_IDS = _usb_ids()
+
+DEFAULT_MODES = {'edl': 40, 'brom': 25, 'mi_assistant': 30, 'fastboot': 4, 'adb': 1}
+
+DEFAULT_CHIPSETS = {'qualcomm': 60, 'mediatek': 40}
+
+# chipset -> {(manufacturer, model): weight}
+DEFAULT_MODELS = {
+    'qualcomm': {
+        ('Xiaomi', 'Redmi Note 12'): 8, ('Xiaomi', 'Mi 11'): 5, ('Xiaomi', 'Redmi K40'): 4,
+        ('Xiaomi', 'POCO F4'): 4, ('Xiaomi', 'Mi 12 Pro'): 3, ('Xiaomi', 'POCO X4 Pro'): 3,
+        ('Samsung', 'SM-G991B'): 2, ('OnePlus', 'OnePlus 9'): 2, ('Sony', 'Xperia 1 III'): 1,
+    },
+    'mediatek': {
+        ('Xiaomi', 'Redmi 10'): 6, ('Xiaomi', 'Redmi Note 11'): 5, ('Xiaomi', 'Redmi K50'): 2,
+        ('Realme', 'Realme 9'): 3, ('Oppo', 'Oppo A96'): 2,
+    },
+    'xiaomi': {('Xiaomi', model): 1 for model in MockDevice.XIAOMI_MODELS},
+}
+
+DEFAULT_ANDROID_VERSIONS = {'11': 2, '12': 3, '13': 4, '14': 2}
+
+DEFAULT_FAILURE_PROFILES = {'healthy': 70, 'default': 20, 'slow': 6, 'flaky': 3, 'dead': 1}
+
+SERIAL_ALPHABET = string.digits + string.ascii_uppercase
+SERIAL_LENGTH = 12
+
+# Written fleet files store one JSON array per device in this column order
+COLUMNS = ('serialNumber', 'mode', 'chipset', 'manufacturer', 'model', 'androidVersion',
+           'bootloader', 'usbVid', 'usbPid', 'failureProfile')
+
+
+class _Weighted:
+    """Weighted choice over fixed values with precomputed cumulative weights."""
+
+    __slots__ = ('values', 'cumulative', 'total')
+
+    def __init__(self, weights: Dict[Any, float], what: str):
+        items = [(value, weight) for value, weight in weights.items() if weight > 0]
+        if not items:
+            raise ValueError(f"Fleet spec needs at least one {what} with a positive weight")
+        self.values = [value for value, _ in items]
+        self.cumulative = list(itertools.accumulate(weight for _, weight in items))
+        self.total = self.cumulative[-1]
+
+    def pick(self, rng: random.Random):
+        return self.values[bisect.bisect_right(self.cumulative, rng.random() * self.total)]
+
+
+@dataclass
+class FleetSpec:
+    """Seed and distributions a fleet is drawn from. Weights need not sum to 1."""
+    seed: int = 0
+    modes: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MODES))
+    chipsets: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_CHIPSETS))
+    models: Dict[str, Dict[Tuple[str, str], float]] = field(
+        default_factory=lambda: {chipset: dict(models) for chipset, models in DEFAULT_MODELS.items()})
+    android_versions: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_ANDROID_VERSIONS))
+    failure_profiles: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_FAILURE_PROFILES))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'seed': self.seed,
+            'modes': self.modes,
+            'chipsets': self.chipsets,
+            'models': {chipset: [[manufacturer, model, weight] for (manufacturer, model), weight in models.items()]
+                       for chipset, models in self.models.items()},
+            'androidVersions': self.android_versions,
+            'failureProfiles': self.failure_profiles
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FleetSpec':
+        """Build a spec from its JSON form; missing distributions keep their defaults."""
+        spec = cls(seed=data.get('seed', 0))
+        spec.modes = data.get('modes', spec.modes)
+        spec.chipsets = data.get('chipsets', spec.chipsets)
+        spec.android_versions = data.get('androidVersions', spec.android_versions)
+        spec.failure_profiles = data.get('failureProfiles', spec.failure_profiles)
+        for chipset, models in data.get('models', {}).items():
+            spec.models[chipset] = {(manufacturer, model): weight for manufacturer, model, weight in models}
+        return spec
+
+    @classmethod
+    def load(cls, file_path: str) -> 'FleetSpec':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+@dataclass
+class FleetRecord:
+    """One generated device and the failure profile its simulator uses."""
+    device: Device
+    failure_profile: str = 'default'
+
+    def to_row(self) -> list:
+        device = self.device
+        return [device.serial_number, device.mode.value, device.chipset.value, device.manufacturer, device.model,
+                device.android_version, device.bootloader, device.usb_vid, device.usb_pid, self.failure_profile]
+
+    @classmethod
+    def from_row(cls, row: list) -> 'FleetRecord':
+        data = dict(zip(COLUMNS, row))
+        device = Device.from_dict(data)
+        device.connection_path = f"Mock\\{device.serial_number}"
+        return cls(device, data['failureProfile'])
+
+    def simulator(self, clock: Optional[Clock] = None) -> MockDeviceSimulator:
+        """Simulator for this device, seeded by its serial so reruns behave identically."""
+        return MockDeviceSimulator(self.device, clock, FAILURE_PROFILES[self.failure_profile],
+                                   rng=random.Random(self.device.serial_number))
+
+
+class MockFleet:
+    """Draws a reproducible stream of unique, realistic mock devices.
+
+    The same spec (including seed) always yields the same devices in the
+    same order. Serial numbers are a seeded permutation of the record
+    index, so they look random but never repeat within a fleet.
+    """
+
+    def __init__(self, spec: Optional[FleetSpec] = None):
+        self.spec = spec or FleetSpec()
+        unknown = set(self.spec.failure_profiles) - set(FAILURE_PROFILES)
+        if unknown:
+            raise ValueError(f"Unknown failure profile(s): {', '.join(sorted(unknown))}")
+
+        self._modes = _Weighted({DeviceMode(mode): weight for mode, weight in self.spec.modes.items()}, 'mode')
+        self._chipsets = _Weighted({ChipsetType(chipset): weight for chipset, weight in self.spec.chipsets.items()},
+                                   'chipset')
+        self._models = {ChipsetType(chipset): _Weighted(models, f"{chipset} model")
+                        for chipset, models in self.spec.models.items() if models}
+        self._android_versions = _Weighted(self.spec.android_versions, 'Android version')
+        self._failure_profiles = _Weighted(self.spec.failure_profiles, 'failure profile')
+
+        for mode in self._modes.values:
+            if mode not in USB_IDS:
+                raise ValueError(f"Fleet spec cannot generate devices in '{mode.value}' mode")
+            for _, _, chipset in USB_IDS[mode]:
+                for needed in ([chipset] if chipset != ChipsetType.UNKNOWN else self._chipsets.values):
+                    if needed not in self._models:
+                        raise ValueError(f"Fleet spec has no models for chipset '{needed.value}' ({mode.value} mode)")
+
+    def generate(self, count: int) -> Iterator[FleetRecord]:
+        """Yield ``count`` records without holding the fleet in memory."""
+        space = len(SERIAL_ALPHABET) ** SERIAL_LENGTH
+        if count > space:
+            raise ValueError(f"Fleet size is limited to {space} devices")
+
+        rng = random.Random(self.spec.seed)
+        # Any multiplier coprime with 36 makes index -> serial a bijection
+        multiplier = rng.randrange(space) | 1
+        while multiplier % 3 == 0:
+            multiplier += 2
+        offset = rng.randrange(space)
+
+        for index in range(count):
+            yield self._record(rng, self._serial((multiplier * index + offset) % space))
+
+    def devices(self, count: int) -> Iterator[Device]:
+        for record in self.generate(count):
+            yield record.device
+
+    def _record(self, rng: random.Random, serial: str) -> FleetRecord:
+        mode = self._modes.pick(rng)
+        usb_vid, usb_pid, chipset = rng.choice(USB_IDS[mode])
+        if chipset == ChipsetType.UNKNOWN:
+            chipset = self._chipsets.pick(rng)
+
+        manufacturer, model = self._models[chipset].pick(rng)
+        if chipset == ChipsetType.MEDIATEK:
+            bootloader = f"MTK{rng.randint(1000, 9999)}"
+        else:
+            bootloader = f"V{rng.randint(1, 9)}.{rng.randint(0, 9)}.{rng.randint(0, 99)}"
+
+        device = Device(
+            device_id="",  # Derived from serial, USB ids and model
+            serial_number=serial,
+            mode=mode,
+            chipset=chipset,
+            manufacturer=manufacturer,
+            model=model,
+            android_version=self._android_versions.pick(rng),
+            bootloader=bootloader,
+            usb_vid=usb_vid,
+            usb_pid=usb_pid,
+            connection_path=f"Mock\\{serial}"
+        )
+        return FleetRecord(device, self._failure_profiles.pick(rng))
+
+    @staticmethod
+    def _serial(number: int) -> str:
+        chars = []
+        for _ in range(SERIAL_LENGTH):
+            number, digit = divmod(number, len(SERIAL_ALPHABET))
+            chars.append(SERIAL_ALPHABET[digit])
+        return ''.join(chars)
+
+    def write(self, file_path: str, count: int) -> int:
+        """Write a fleet file: a header line with the spec, then one compact row per device.
+
+        Paths ending in .gz are gzip-compressed.
+        """
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        written = 0
+        with _open(path, 'wt') as f:
+            f.write(json.dumps({'spec': self.spec.to_dict(), 'count': count, 'columns': COLUMNS}) + '\n')
+            for record in self.generate(count):
+                f.write(json.dumps(record.to_row(), separators=(',', ':')) + '\n')
+                written += 1
+        return written
+
+
+def read_fleet(file_path: str) -> Iterator[FleetRecord]:
+    """Stream the records of a fleet file written by MockFleet.write()."""
+    with _open(Path(file_path), 'rt') as f:
+        header = json.loads(f.readline())
+        if list(header.get('columns', [])) != list(COLUMNS):
+            raise ValueError(f"{file_path} is not a fleet file with the expected columns")
+        for line in f:
+            if line.strip():
+                yield FleetRecord.from_row(json.loads(line))
+
+
+def read_fleet_spec(file_path: str) -> Tuple[FleetSpec, int]:
+    """The spec and device count a fleet file was generated with."""
+    with _open(Path(file_path), 'rt') as f:
+        header = json.loads(f.readline())
+    return FleetSpec.from_dict(header['spec']), header['count']
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == '.gz':
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
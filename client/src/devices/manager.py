@@ -1,39 +1,61 @@
 """Device management and operations."""
 
-import asyncio
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
 from .models import Device, DeviceMode, DeviceConnection
 from ..api.client import APIClient
+from ..utils.clock import Clock, SYSTEM_CLOCK
 from ..utils.config import Config
+from ..utils.logger import LazyLogger
 
 
 class DeviceManager:
     """Manages device operations and state."""
     
-    def __init__(self, config: Config, logger, api_client: APIClient):
+    def __init__(self, config: Config, logger, api_client: APIClient, clock: Optional[Clock] = None):
         self.config = config
-        self.logger = logger
+        self.logger = LazyLogger.wrap(logger)
         self.api_client = api_client
+        self.clock = clock or SYSTEM_CLOCK
         self.connected_devices = {}  # device_id -> DeviceConnection
         self.operation_cache = {}    # device_id -> operation_info
+        # Kept in step with connected_devices so statistics need no rescan
+        self.mode_counts = {}
+        self.chipset_counts = {}
+    
+    def track_device(self, device: Device) -> DeviceConnection:
+        """Track a device that is already registered with the server."""
+        connection = DeviceConnection(
+            device=device,
+            status="connected"
+        )
+        self._untrack(device.device_id)
+        self.connected_devices[device.device_id] = connection
+        self._count(device, 1)
+        return connection
+    
+    def _untrack(self, device_id: str) -> Optional[DeviceConnection]:
+        connection = self.connected_devices.pop(device_id, None)
+        if connection is not None:
+            self._count(connection.device, -1)
+        return connection
+    
+    def _count(self, device: Device, delta: int):
+        for counts, key in ((self.mode_counts, device.mode.value), (self.chipset_counts, device.chipset.value)):
+            counts[key] = counts.get(key, 0) + delta
+            if counts[key] <= 0:
+                del counts[key]
     
     async def register_device(self, device: Device) -> bool:
         """Register device with the server."""
         try:
-            # Create device connection
-            connection = DeviceConnection(
-                device=device,
-                status="connected"
-            )
-            
             # Register with API
             success = await self.api_client.register_device(device.to_dict())
             
             if success:
-                self.connected_devices[device.device_id] = connection
-                self.logger.info(f"Device registered: {device.device_id}")
+                self.track_device(device)
+                self.logger.info("Device registered: %s", device.device_id)
                 return True
             else:
                 self.logger.error(f"Failed to register device: {device.device_id}")
@@ -47,11 +69,10 @@ class DeviceManager:
         """Unregister device."""
         try:
             if device_id in self.connected_devices:
-                connection = self.connected_devices[device_id]
+                connection = self._untrack(device_id)
                 connection.status = "disconnected"
-                del self.connected_devices[device_id]
                 
-                self.logger.info(f"Device unregistered: {device_id}")
+                self.logger.info("Device unregistered: %s", device_id)
                 return True
             return False
             
@@ -65,8 +86,7 @@ class DeviceManager:
             success = await self.api_client.ping_device(device_id)
             
             if success and device_id in self.connected_devices:
-                import time
-                self.connected_devices[device_id].last_seen = time.time()
+                self.connected_devices[device_id].last_seen = self.clock.time()
             
             return success
             
@@ -86,7 +106,7 @@ class DeviceManager:
     async def prepare_device_for_unlock(self, device: Device) -> bool:
         """Prepare device for unlock operation."""
         try:
-            self.logger.info(f"Preparing device for unlock: {device.device_id}")
+            self.logger.info("Preparing device for unlock: %s", device.device_id)
             
             # Device-specific preparation
             if device.mode == DeviceMode.EDL:
@@ -96,7 +116,7 @@ class DeviceManager:
             elif device.mode == DeviceMode.MI_ASSISTANT:
                 return await self._prepare_mi_assistant_device(device)
             else:
-                self.logger.warning(f"Unsupported device mode: {device.mode}")
+                self.logger.warning("Unsupported device mode: %s", device.mode)
                 return False
                 
         except Exception as e:
@@ -111,7 +131,7 @@ class DeviceManager:
             # Check if device is accessible
             # In a real implementation, this would use edlclient library
             self.logger.info("Checking EDL interface...")
-            await asyncio.sleep(1)  # Simulate check
+            await self.clock.sleep(1)  # Simulate check
             
             self.logger.info("EDL device ready")
             return True
@@ -128,7 +148,7 @@ class DeviceManager:
             # Check if device is accessible
             # In a real implementation, this would use mtkclient library
             self.logger.info("Checking BROM interface...")
-            await asyncio.sleep(1)  # Simulate check
+            await self.clock.sleep(1)  # Simulate check
             
             self.logger.info("BROM device ready")
             return True
@@ -144,7 +164,7 @@ class DeviceManager:
         try:
             # Check if device is accessible
             self.logger.info("Checking Mi Assistant interface...")
-            await asyncio.sleep(1)  # Simulate check
+            await self.clock.sleep(1)  # Simulate check
             
             self.logger.info("Mi Assistant device ready")
             return True
@@ -156,7 +176,7 @@ class DeviceManager:
     async def execute_unlock_operation(self, device: Device, auth_data: Dict[str, Any]) -> bool:
         """Execute the actual unlock operation."""
         try:
-            self.logger.info(f"Executing unlock for device: {device.device_id}")
+            self.logger.info("Executing unlock for device: %s", device.device_id)
             
             # Prepare device
             if not await self.prepare_device_for_unlock(device):
@@ -197,8 +217,8 @@ class DeviceManager:
             ]
             
             for i, step in enumerate(steps):
-                self.logger.info(f"Step {i+1}/{len(steps)}: {step}")
-                await asyncio.sleep(2)  # Simulate work
+                self.logger.info("Step %s/%s: %s", i+1, len(steps), step)
+                await self.clock.sleep(2)  # Simulate work
             
             self.logger.info("EDL unlock completed successfully")
             return True
@@ -227,8 +247,8 @@ class DeviceManager:
             ]
             
             for i, step in enumerate(steps):
-                self.logger.info(f"Step {i+1}/{len(steps)}: {step}")
-                await asyncio.sleep(2)  # Simulate work
+                self.logger.info("Step %s/%s: %s", i+1, len(steps), step)
+                await self.clock.sleep(2)  # Simulate work
             
             self.logger.info("BROM unlock completed successfully")
             return True
@@ -256,8 +276,8 @@ class DeviceManager:
             ]
             
             for i, step in enumerate(steps):
-                self.logger.info(f"Step {i+1}/{len(steps)}: {step}")
-                await asyncio.sleep(2)  # Simulate work
+                self.logger.info("Step %s/%s: %s", i+1, len(steps), step)
+                await self.clock.sleep(2)  # Simulate work
             
             self.logger.info("Mi Assistant unlock completed successfully")
             return True
@@ -276,7 +296,7 @@ class DeviceManager:
                     # Ping device to keep connection alive
                     await self.ping_device(device_id)
                 
-                await asyncio.sleep(30)  # Check every 30 seconds
+                await self.clock.sleep(30)  # Check every 30 seconds
                 
         except Exception as e:
             self.logger.error(f"Connection monitoring error: {e}")
@@ -284,7 +304,7 @@ class DeviceManager:
     async def cleanup_inactive_devices(self) -> None:
         """Clean up inactive device connections."""
         try:
-            current_time = asyncio.get_event_loop().time()
+            current_time = self.clock.time()
             timeout = 300  # 5 minutes
             
             inactive_devices = []
@@ -296,7 +316,7 @@ class DeviceManager:
             
             for device_id in inactive_devices:
                 await self.unregister_device(device_id)
-                self.logger.info(f"Cleaned up inactive device: {device_id}")
+                self.logger.info("Cleaned up inactive device: %s", device_id)
                 
         except Exception as e:
             self.logger.error(f"Device cleanup error: {e}")
@@ -307,21 +327,9 @@ class DeviceManager:
         active_devices = len([conn for conn in self.connected_devices.values() 
                              if conn.is_active()])
         
-        mode_counts = {}
-        chipset_counts = {}
-        
-        for connection in self.connected_devices.values():
-            device = connection.device
-            
-            mode = device.mode.value
-            mode_counts[mode] = mode_counts.get(mode, 0) + 1
-            
-            chipset = device.chipset.value
-            chipset_counts[chipset] = chipset_counts.get(chipset, 0) + 1
-        
         return {
             'total_devices': total_devices,
             'active_devices': active_devices,
-            'modes': mode_counts,
-            'chipsets': chipset_counts
+            'modes': dict(self.mode_counts),
+            'chipsets': dict(self.chipset_counts)
         }
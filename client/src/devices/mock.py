@@ -1,10 +1,31 @@
 """Mock devices for testing purposes."""
 
 import random
-import time
-from typing import List, Dict, Any
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
 
 from .models import Device, DeviceMode, ChipsetType
+from ..utils.clock import Clock, SYSTEM_CLOCK
+from ..utils.faults import faults
+
+
+@dataclass(frozen=True)
+class FailureProfile:
+    """How unreliable a simulated device is."""
+    name: str
+    step_failure_rate: float = 0.05
+    latency_factor: float = 1.0
+    disconnect_rate: float = 0.0
+
+
+# Named profiles mock fleets draw from; 'default' is the simulator's historic behaviour
+FAILURE_PROFILES = {
+    'healthy': FailureProfile('healthy', step_failure_rate=0.01),
+    'default': FailureProfile('default'),
+    'slow': FailureProfile('slow', latency_factor=3.0),
+    'flaky': FailureProfile('flaky', step_failure_rate=0.15, latency_factor=1.5, disconnect_rate=0.05),
+    'dead': FailureProfile('dead', step_failure_rate=1.0),
+}
 
 
 class MockDevice:
@@ -145,21 +166,24 @@ class MockDevice:
         return devices
     
     @classmethod
-    def simulate_device_operation(cls, device: Device, operation_type: str) -> Dict[str, Any]:
+    def simulate_device_operation(cls, device: Device, operation_type: str,
+                                  clock: Clock = SYSTEM_CLOCK, rng: Optional[random.Random] = None) -> Dict[str, Any]:
         """Simulate a device operation and return mock results."""
+        rng = rng or random
+        
         # Simulate operation time
-        operation_time = random.uniform(10, 60)  # 10-60 seconds
+        operation_time = rng.uniform(10, 60)  # 10-60 seconds
         
         # Simulate success rate (90% success for testing)
-        success = random.random() < 0.9
+        success = rng.random() < 0.9
         
         result = {
             'device_id': device.device_id,
             'operation_type': operation_type,
             'success': success,
             'duration': operation_time,
-            'timestamp': time.time(),
-            'steps_completed': random.randint(5, 10),
+            'timestamp': clock.time(),
+            'steps_completed': rng.randint(5, 10),
             'total_steps': 10
         }
         
@@ -171,7 +195,7 @@ class MockDevice:
                 "Security verification failed",
                 "Device not responding"
             ]
-            result['error'] = random.choice(errors)
+            result['error'] = rng.choice(errors)
         else:
             result['unlock_status'] = 'unlocked'
             result['frp_status'] = 'bypassed'
@@ -179,13 +203,12 @@ class MockDevice:
         return result
     
     @classmethod
-    def generate_mock_auth_response(cls, device: Device) -> Dict[str, Any]:
+    def generate_mock_auth_response(cls, device: Device, clock: Clock = SYSTEM_CLOCK) -> Dict[str, Any]:
         """Generate mock authentication response."""
         import jwt
-        import time
         
         # Mock auth key (not a real JWT for testing)
-        auth_key = f"mock_auth_key_{device.device_id}_{int(time.time())}"
+        auth_key = f"mock_auth_key_{device.device_id}_{int(clock.time())}"
         
         bypass_tokens = {}
         
@@ -193,19 +216,19 @@ class MockDevice:
             bypass_tokens = {
                 'token': f"mock_edl_token_{device.serial_number}",
                 'signature': f"mock_signature_{random.randint(1000, 9999)}",
-                'expires': int(time.time()) + 300
+                'expires': int(clock.time()) + 300
             }
         elif device.mode == DeviceMode.BROM:
             bypass_tokens = {
                 'auth_token': f"mock_brom_token_{device.serial_number}",
                 'device_key': f"mock_device_key_{random.randint(1000, 9999)}",
-                'expires': int(time.time()) + 300
+                'expires': int(clock.time()) + 300
             }
         elif device.mode == DeviceMode.MI_ASSISTANT:
             bypass_tokens = {
                 'mi_token': f"mock_mi_token_{device.serial_number}",
                 'account_bypass': f"mock_bypass_{random.randint(1000, 9999)}",
-                'expires': int(time.time()) + 300
+                'expires': int(clock.time()) + 300
             }
         
         return {
@@ -214,7 +237,7 @@ class MockDevice:
             'deviceId': device.device_id,
             'bypassTokens': bypass_tokens,
             'expiresIn': 300,
-            'timestamp': time.time()
+            'timestamp': clock.time()
         }
     
     @classmethod
@@ -249,16 +272,21 @@ class MockDevice:
 class MockDeviceSimulator:
     """Simulates device behavior for testing."""
     
-    def __init__(self, device: Device):
+    def __init__(self, device: Device, clock: Optional[Clock] = None, profile: Optional[FailureProfile] = None,
+                 rng: Optional[random.Random] = None):
         self.device = device
+        self.clock = clock or SYSTEM_CLOCK
+        self.profile = profile or FAILURE_PROFILES['default']
+        # A per-device generator keeps seeded fleets reproducible
+        self.rng = rng or random
         self.connected = True
         self.operation_in_progress = False
-        self.last_ping = time.time()
+        self.last_ping = self.clock.time()
     
     async def simulate_connection_loss(self, duration: float = 5.0):
         """Simulate temporary connection loss."""
         self.connected = False
-        await asyncio.sleep(duration)
+        await self.clock.sleep(duration)
         self.connected = True
     
     async def simulate_operation(self, operation_type: str) -> Dict[str, Any]:
@@ -282,14 +310,28 @@ class MockDeviceSimulator:
                 if not self.connected:
                     raise RuntimeError("Device disconnected during operation")
                 
-                # Simulate step duration
-                await asyncio.sleep(random.uniform(1, 3))
+                # Simulate step duration; failures strike halfway through
+                duration = self.rng.uniform(1, 3) * self.profile.latency_factor
+                await self.clock.sleep(duration / 2)
+                
+                if faults.enabled:
+                    # Configured faults replace the profile's own failure draws
+                    fault = (await faults.inject('device', step.lower().replace(' ', '_'))).fault
+                    if fault is not None and fault.kind == 'disconnect':
+                        raise RuntimeError(f"Device disconnected during step: {step}")
+                    if fault is not None:
+                        raise RuntimeError(f"Operation failed at step: {step}")
+                else:
+                    if self.rng.random() < self.profile.disconnect_rate:
+                        raise RuntimeError(f"Device disconnected during step: {step}")
+                    
+                    # Chance of random failure
+                    if self.rng.random() < self.profile.step_failure_rate:
+                        raise RuntimeError(f"Operation failed at step: {step}")
                 
-                # Small chance of random failure
-                if random.random() < 0.05:  # 5% chance
-                    raise RuntimeError(f"Operation failed at step: {step}")
+                await self.clock.sleep(duration / 2)
             
-            return MockDevice.simulate_device_operation(self.device, operation_type)
+            return MockDevice.simulate_device_operation(self.device, operation_type, self.clock, self.rng)
         
         finally:
             self.operation_in_progress = False
@@ -297,7 +339,7 @@ class MockDeviceSimulator:
     def ping(self) -> bool:
         """Ping device to check connectivity."""
         if self.connected:
-            self.last_ping = time.time()
+            self.last_ping = self.clock.time()
             return True
         return False
     
@@ -5,22 +5,37 @@ import time
 from typing import Optional, List, Dict, Any
 from contextlib import contextmanager
 
-try:
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.table import Table
-    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
-    from rich.prompt import Prompt, Confirm
-    from rich.text import Text
-    from rich.align import Align
-    RICH_AVAILABLE = True
-except ImportError:
-    RICH_AVAILABLE = False
+from ..utils.logger import load_colorama
 
-from colorama import init, Fore, Style, Back
+# Resolved on first use; rich alone costs more to import than the rest of startup
+RICH_AVAILABLE = None
 
-# Initialize colorama
-init(autoreset=True)
+
+def _load_rich() -> bool:
+    """Import rich into this module on first use."""
+    global RICH_AVAILABLE, Console, Panel, Table, Progress, SpinnerColumn, TextColumn
+    global BarColumn, TimeRemainingColumn, Prompt, Confirm, Text, Align
+    
+    if RICH_AVAILABLE is None:
+        try:
+            from rich.console import Console
+            from rich.panel import Panel
+            from rich.table import Table
+            from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+            from rich.prompt import Prompt, Confirm
+            from rich.text import Text
+            from rich.align import Align
+            RICH_AVAILABLE = True
+        except ImportError:
+            RICH_AVAILABLE = False
+    
+    return RICH_AVAILABLE
+
+
+def _load_colorama():
+    """Import colorama into this module on first use."""
+    global Fore, Style
+    Fore, Style = load_colorama()
 
 
 class CLI:
@@ -30,10 +45,11 @@ class CLI:
         self.no_color = no_color
         self.quiet = quiet
         
-        if RICH_AVAILABLE and not no_color:
+        if not no_color and _load_rich():
             self.console = Console()
             self.use_rich = True
         else:
+            _load_colorama()
             self.console = None
             self.use_rich = False
     
@@ -0,0 +1,198 @@
+"""Injectable clocks, including a virtual clock that lets simulations skip idle time."""
+
+import asyncio
+import selectors
+import time
+from typing import Optional
+
+
+class Clock:
+    """Wall time, monotonic time and sleeping, taken from the real world.
+
+    Mirrors the ``time`` functions the client uses so code that takes a
+    clock reads the same as code that calls ``time`` directly.
+    """
+
+    virtual = False
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def perf_counter(self) -> float:
+        return time.perf_counter()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    def to_real(self, seconds: float) -> float:
+        """Convert a span of clock time to event-loop seconds, e.g. for asyncio.wait_for."""
+        return seconds
+
+    def run(self, coro):
+        """Run a coroutine to completion on a new event loop, like asyncio.run()."""
+        return asyncio.run(coro)
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class _VirtualSelector(selectors.BaseSelector):
+    """Selector that jumps the clock forward instead of waiting out an idle timeout.
+
+    Real sockets, pipes and executor jobs can only finish in real time, so
+    while any are outstanding the wait is real and the clock advances by
+    the time actually spent; otherwise nothing but a timer can wake the
+    loop, and the clock skips straight to it.
+    """
+
+    def __init__(self, clock: 'VirtualClock'):
+        self._selector = selectors.DefaultSelector()
+        self._clock = clock
+        self.internal_fds = set()
+        self.real_jobs = 0
+
+    def register(self, fileobj, events, data=None):
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        return self._selector.modify(fileobj, events, data)
+
+    def get_map(self):
+        return self._selector.get_map()
+
+    def close(self):
+        self._selector.close()
+
+    def _waiting_on_real_work(self) -> bool:
+        return self.real_jobs > 0 or len(self._selector.get_map()) > len(self.internal_fds)
+
+    def select(self, timeout: Optional[float] = None):
+        if timeout is None or self._waiting_on_real_work():
+            start = time.monotonic()
+            events = self._selector.select(timeout)
+            self._clock.advance(time.monotonic() - start)
+            return events
+
+        events = self._selector.select(0)
+        if not events:
+            self._clock.advance(timeout)
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop whose time is a VirtualClock.
+
+    Timers fire in the same order and at the same loop times as on a real
+    loop, but the loop never sleeps through a gap between them, so
+    ``asyncio.sleep`` and ``wait_for`` timeouts cost no real time. Code
+    that blocks the loop (e.g. a synchronous request) takes no virtual time.
+    """
+
+    def __init__(self, clock: 'VirtualClock'):
+        self.clock = clock
+        selector = _VirtualSelector(clock)
+        super().__init__(selector)
+        # The loop's own wake-up pipe is always registered; it is not real work
+        selector.internal_fds = set(selector.get_map())
+
+    def time(self) -> float:
+        return self.clock.monotonic()
+
+    def run_in_executor(self, executor, func, *args):
+        selector = self._selector
+        selector.real_jobs += 1
+        future = super().run_in_executor(executor, func, *args)
+
+        def finished(_):
+            selector.real_jobs -= 1
+
+        future.add_done_callback(finished)
+        return future
+
+
+class VirtualClock(Clock):
+    """Clock that only moves when a VirtualTimeLoop advances it.
+
+    Wall time starts at the real time the clock was created (or ``start``)
+    and then follows virtual time, so timestamps stay plausible. Sleeping
+    is only virtual on a loop from ``new_event_loop``/``run``; time carries
+    over between successive runs.
+    """
+
+    virtual = True
+
+    def __init__(self, start: Optional[float] = None):
+        self.epoch = time.time() if start is None else start
+        self.now = 0.0
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            self.now += seconds
+
+    def time(self) -> float:
+        return self.epoch + self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def new_event_loop(self) -> VirtualTimeLoop:
+        return VirtualTimeLoop(self)
+
+    def run(self, coro):
+        """asyncio.run() on a VirtualTimeLoop."""
+        loop = self.new_event_loop()
+        try:
+            asyncio.set_event_loop(loop)
+            return loop.run_until_complete(coro)
+        finally:
+            try:
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.run_until_complete(loop.shutdown_default_executor())
+            finally:
+                asyncio.set_event_loop(None)
+                loop.close()
+
+
+class ScaledClock(Clock):
+    """Clock that runs ``factor`` times faster than real time.
+
+    Unlike VirtualClock it keeps real I/O meaningful: sleeps are shortened
+    rather than skipped, so simulated device work shrinks while requests,
+    disk writes and CPU time are still paid in full.
+    """
+
+    def __init__(self, factor: float):
+        if factor <= 0:
+            raise ValueError("Clock scale factor must be positive")
+        self.factor = factor
+        self.epoch = time.time()
+        self._origin = time.monotonic()
+
+    def monotonic(self) -> float:
+        return (time.monotonic() - self._origin) * self.factor
+
+    def time(self) -> float:
+        return self.epoch + self.monotonic()
+
+    def perf_counter(self) -> float:
+        return self.monotonic()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds / self.factor)
+
+    def to_real(self, seconds: float) -> float:
+        return seconds / self.factor
@@ -13,6 +13,9 @@ class ServerConfig(BaseModel):
     timeout: int = 30
     retry_attempts: int = 3
     retry_delay: int = 2
+    # auto, aiohttp, http2 (needs httpx[http2]) or requests; see src/api/transport.py
+    transport: str = "auto"
+    pool_size: int = 100
 
     @validator('url')
     def validate_url(cls, v):
@@ -20,6 +23,12 @@ class ServerConfig(BaseModel):
             raise ValueError('Server URL must start with http:// or https://')
         return v.rstrip('/')
 
+    @validator('transport')
+    def validate_transport(cls, v):
+        if v not in ('auto', 'aiohttp', 'http2', 'requests'):
+            raise ValueError('Transport must be one of auto, aiohttp, http2, requests')
+        return v
+
 
 class ClientConfig(BaseModel):
     id: str = "xiaomi-unlock-client"
@@ -58,6 +67,19 @@ class AdvancedConfig(BaseModel):
     enable_debug_logging: bool = False
     save_operation_logs: bool = True
     auto_register_devices: bool = True
+    enable_checkpoints: bool = True
+    checkpoint_dir: str = "logs/checkpoints"
+    journal_dir: str = "logs/journal"
+    journal_segment_size: str = "16MB"
+    journal_segment_age: int = 86400
+    journal_compress: bool = True
+    history_db: str = "logs/history.db"
+    history_sync_page_size: int = 100
+    metrics_port: Optional[int] = None
+    metrics_file: Optional[str] = None
+    trace_file: Optional[str] = None
+    loop_lag_threshold_ms: Optional[int] = None
+    fault_file: Optional[str] = None
 
 
 class Config(BaseModel):
@@ -106,7 +128,15 @@ class Config(BaseModel):
 
     def get_max_log_size_bytes(self) -> int:
         """Convert log size string to bytes."""
-        size_str = self.logging.max_size.upper()
+        return self._parse_size(self.logging.max_size)
+
+    def get_journal_segment_bytes(self) -> int:
+        """Convert journal segment size string to bytes."""
+        return self._parse_size(self.advanced.journal_segment_size)
+
+    @staticmethod
+    def _parse_size(size: str) -> int:
+        size_str = size.upper()
         if size_str.endswith('KB'):
             return int(size_str[:-2]) * 1024
         elif size_str.endswith('MB'):
@@ -124,6 +154,7 @@ class Config(BaseModel):
             'XIAOMI_HMAC_SECRET': ('client', 'hmac_secret'),
             'XIAOMI_LOG_LEVEL': ('logging', 'level'),
             'XIAOMI_TIMEOUT': ('server', 'timeout'),
+            'XIAOMI_TRANSPORT': ('server', 'transport'),
         }
         
         for env_var, (section, key) in env_mappings.items():
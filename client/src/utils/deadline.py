@@ -0,0 +1,136 @@
+"""Deadline budgets for bounding operation and stage run time."""
+
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Awaitable, Any
+
+from .clock import Clock, SYSTEM_CLOCK
+from .metrics import STAGE_SECONDS
+from .tracing import tracer
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage runs past its deadline."""
+
+    def __init__(self, stage: str, budget: float):
+        super().__init__(f"Deadline exceeded during {stage} (budget {budget:.1f}s)")
+        self.stage = stage
+        self.budget = budget
+
+
+class Deadline:
+    """A point in monotonic time after which work should be abandoned."""
+
+    def __init__(self, seconds: float, parent: Optional['Deadline'] = None, name: str = "operation",
+                 clock: Optional[Clock] = None):
+        self.name = name
+        self.budget = seconds
+        self.clock = clock or (parent.clock if parent is not None else SYSTEM_CLOCK)
+        self.expires_at = self.clock.monotonic() + seconds
+        if parent is not None:
+            self.expires_at = min(self.expires_at, parent.expires_at)
+
+    def remaining(self) -> float:
+        """Seconds left before expiry, never negative."""
+        return max(0.0, self.expires_at - self.clock.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.clock.monotonic() >= self.expires_at
+
+    def clamp(self, timeout: float) -> float:
+        """Shrink a timeout (event-loop seconds) so it does not outlive this deadline."""
+        return min(timeout, self.clock.to_real(self.remaining()))
+
+    def check(self):
+        """Raise if the deadline has already passed."""
+        if self.expired:
+            raise DeadlineExceeded(self.name, self.budget)
+
+
+# The deadline of the stage currently running in this task. API calls and
+# subprocesses read it so the budget reaches them without new parameters.
+current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    'current_deadline', default=None
+)
+
+
+def clamp_timeout(timeout: float) -> float:
+    """Clamp a timeout in event-loop seconds to the current deadline, if any."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return timeout
+    deadline.check()
+    return deadline.clamp(timeout)
+
+
+async def within_deadline(awaitable: Awaitable) -> Any:
+    """Await something not bound by the current deadline, giving up when the deadline runs out."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return await awaitable
+    deadline.check()
+    try:
+        return await asyncio.wait_for(awaitable, timeout=deadline.clock.to_real(deadline.remaining()))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(deadline.name, deadline.budget)
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """Make a deadline current for the enclosed code."""
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+class DeadlineScheduler:
+    """Splits an operation budget into per-stage sub-deadlines.
+
+    Each stage gets its share of the total budget counted from when it
+    starts, capped by the operation deadline, so time left over by fast
+    stages is available to later ones.
+    """
+
+    DEFAULT_SHARES = {
+        'device_registration': 0.1,
+        'auth_key_request': 0.1,
+        'operation_start': 0.1,
+        'device_unlock': 0.6,
+        'status_update': 0.1,
+    }
+
+    def __init__(self, total: float, shares: Optional[Dict[str, float]] = None, clock: Optional[Clock] = None):
+        self.total = total
+        self.shares = shares or self.DEFAULT_SHARES
+        self.deadline = Deadline(total, clock=clock)
+
+    def stage(self, name: str) -> Deadline:
+        """Create the sub-deadline for a stage."""
+        share = self.shares.get(name, 1.0)
+        return Deadline(self.total * share, parent=self.deadline, name=name)
+
+    async def run(self, name: str, awaitable: Awaitable) -> Any:
+        """Run a stage under its sub-deadline, cancelling it on expiry."""
+        stage = self.stage(name)
+        start = time.perf_counter()
+        status = 'error'
+
+        with deadline_scope(stage), tracer.span(name, budget=round(stage.budget, 3)):
+            try:
+                # The budget is in clock time; wait_for counts event-loop seconds
+                result = await asyncio.wait_for(awaitable, timeout=stage.clock.to_real(stage.remaining()))
+                status = 'ok'
+                return result
+            except asyncio.TimeoutError:
+                status = 'timeout'
+                raise DeadlineExceeded(name, stage.budget)
+            except DeadlineExceeded:
+                status = 'timeout'
+                raise
+            finally:
+                STAGE_SECONDS.labels(name, status).observe(time.perf_counter() - start)
@@ -0,0 +1,195 @@
+"""Declarative fault injection for the API client, device commands and simulated devices.
+
+Faults are described in a JSON file and matched against the call being
+made. Each hook names a target and a key:
+
+  api      "METHOD /route", e.g. "POST /auth/request-key"
+  command  the full command line, e.g. "fastboot getvar all"
+  device   the unlock step, e.g. "edl_unlock.unlocking_bootloader"
+  server   "METHOD /route" as the stand-in server registers it, e.g. "PUT /api/unlock/{operationId}/status"
+
+Example:
+
+  {
+    "seed": 42,
+    "faults": [
+      {"target": "api", "kind": "latency", "latency": {"distribution": "lognormal", "median": 0.2, "sigma": 0.8}},
+      {"target": "api", "match": "POST /unlock/*", "kind": "status", "status": 503, "probability": 0.02, "burst": 5},
+      {"target": "api", "kind": "status", "status": 429, "probability": 0.01, "burst": 10},
+      {"target": "command", "match": "fastboot *", "kind": "latency", "latency": {"distribution": "uniform", "min": 2, "max": 8}},
+      {"target": "device", "match": "*.unlocking_bootloader", "kind": "disconnect", "probability": 0.01}
+    ]
+  }
+"""
+
+import asyncio
+import fnmatch
+import json
+import math
+import random
+from typing import Dict, Any, List, Optional
+
+from .metrics import FAULTS_INJECTED
+
+# Fault kinds each hook knows how to apply
+TARGET_KINDS = {
+    'api': ('latency', 'timeout', 'status', 'error'),
+    'command': ('latency', 'timeout', 'error'),
+    'device': ('latency', 'error', 'disconnect'),
+    'server': ('latency', 'status'),
+}
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'normal', 'lognormal')
+
+
+class Fault:
+    """One fault rule: where it applies, what it does and how often."""
+
+    def __init__(self, target: str, kind: str, match: str = '*', probability: float = 1.0, burst: int = 1,
+                 status: Optional[int] = None, latency: Optional[Dict[str, Any]] = None):
+        if target not in TARGET_KINDS:
+            raise ValueError(f"Unknown fault target '{target}' (expected one of {', '.join(TARGET_KINDS)})")
+        if kind not in TARGET_KINDS[target]:
+            raise ValueError(f"Fault kind '{kind}' is not supported for {target} (expected one of "
+                             f"{', '.join(TARGET_KINDS[target])})")
+        if kind == 'status' and not status:
+            raise ValueError("Status faults need a 'status' code")
+        if kind == 'latency':
+            latency = latency or {}
+            if latency.get('distribution', 'fixed') not in DISTRIBUTIONS:
+                raise ValueError(f"Unknown latency distribution '{latency.get('distribution')}'")
+
+        self.target = target
+        self.kind = kind
+        self.match = match
+        self.probability = probability
+        self.burst = max(1, burst)
+        self.status = status
+        self.latency = latency
+        self.fired = 0
+        self._burst_left = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Fault':
+        return cls(
+            target=data['target'],
+            kind=data['kind'],
+            match=data.get('match', '*'),
+            probability=data.get('probability', 1.0),
+            burst=data.get('burst', 1),
+            status=data.get('status'),
+            latency=data.get('latency')
+        )
+
+    def matches(self, target: str, key: str) -> bool:
+        return self.target == target and fnmatch.fnmatchcase(key, self.match)
+
+    def fires(self, rng: random.Random) -> bool:
+        """Whether this call is hit; once triggered, the next burst-1 matching calls are too."""
+        if self._burst_left > 0:
+            self._burst_left -= 1
+            return True
+        if rng.random() < self.probability:
+            self._burst_left = self.burst - 1
+            return True
+        return False
+
+    def sample_latency(self, rng: random.Random) -> float:
+        spec = self.latency or {}
+        distribution = spec.get('distribution', 'fixed')
+        if distribution == 'uniform':
+            value = rng.uniform(spec.get('min', 0.0), spec.get('max', 1.0))
+        elif distribution == 'exponential':
+            value = rng.expovariate(1 / spec.get('mean', 1.0))
+        elif distribution == 'normal':
+            value = rng.gauss(spec.get('mean', 1.0), spec.get('stddev', 0.0))
+        elif distribution == 'lognormal':
+            value = rng.lognormvariate(math.log(spec.get('median', 1.0)), spec.get('sigma', 0.0))
+        else:
+            value = spec.get('seconds', 1.0)
+        return max(0.0, min(value, spec.get('cap', math.inf)))
+
+    def response_body(self) -> Dict[str, Any]:
+        """JSON body sent with an injected status code."""
+        return {'success': False, 'error': f"Injected {self.status} fault"}
+
+
+class Injection:
+    """Outcome of one hook call: the latency added and the fault to apply, if any."""
+
+    __slots__ = ('delay', 'fault')
+
+    def __init__(self, delay: float = 0.0, fault: Optional[Fault] = None):
+        self.delay = delay
+        self.fault = fault
+
+
+_NO_INJECTION = Injection()
+
+
+class FaultInjector:
+    """Applies configured faults at the client's hook points.
+
+    Disabled until ``load``/``configure`` is given rules; hooks check
+    ``enabled`` first, so normal runs pay one attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.rules: List[Fault] = []
+        self.rng = random.Random()
+
+    def configure(self, rules: List[Fault], seed: Optional[int] = None):
+        self.rules = list(rules)
+        self.rng = random.Random(seed)
+        self.enabled = bool(self.rules)
+
+    def load(self, file_path: str):
+        """Load rules from a JSON fault file."""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.configure([Fault.from_dict(rule) for rule in data.get('faults', [])], data.get('seed'))
+
+    def reset(self):
+        self.configure([])
+
+    async def inject(self, target: str, key: str, timeout: Optional[float] = None) -> Injection:
+        """Apply the faults matching this call.
+
+        Latency from every firing latency rule is slept here; the first
+        other firing rule is returned for the hook to apply. Latency that
+        reaches ``timeout``, or a 'timeout' fault, sleeps out the timeout
+        and raises asyncio.TimeoutError as the real call would.
+        """
+        delay = 0.0
+        fault = None
+        for rule in self.rules:
+            if not rule.matches(target, key) or (fault is not None and rule.kind != 'latency'):
+                continue
+            if not rule.fires(self.rng):
+                continue
+            rule.fired += 1
+            FAULTS_INJECTED.labels(target, rule.kind).inc()
+            if rule.kind == 'latency':
+                delay += rule.sample_latency(self.rng)
+            else:
+                fault = rule
+
+        timed_out = timeout is not None and (delay >= timeout or (fault is not None and fault.kind == 'timeout'))
+        if timed_out:
+            await asyncio.sleep(timeout)
+            raise asyncio.TimeoutError(f"Injected timeout on {target} {key}")
+
+        if delay:
+            await asyncio.sleep(delay)
+        elif fault is None:
+            return _NO_INJECTION
+        return Injection(delay, fault)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """How often each rule fired."""
+        return [{'target': rule.target, 'match': rule.match, 'kind': rule.kind, 'fired': rule.fired}
+                for rule in self.rules]
+
+
+faults = FaultInjector()
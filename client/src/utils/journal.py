@@ -0,0 +1,281 @@
+"""Append-only, segmented journal of completed operation logs."""
+
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator
+
+
+class OperationJournal:
+    """Operation logs appended as JSON lines to rotating segment files.
+
+    Each record lands in the active segment and an entry with its segment,
+    byte offset and length is appended to ``index.jsonl``. The index is
+    held in memory, so looking up one operation is a dict hit plus one
+    read. Segments are closed once they pass a size or age limit and are
+    then gzip-compressed on a background thread, so appends never wait for
+    it; reads from a compressed segment cost at most one segment's worth
+    of decompression, however large the journal grows.
+
+    Every record is kept. If two records share an operation id, both are
+    scanned and counted, ``get`` returns the newer one, and
+    ``stats()['duplicates']`` counts the collision.
+    """
+
+    INDEX_FILE = 'index.jsonl'
+    SEGMENT_PREFIX = 'segment-'
+    SEGMENT_SUFFIX = '.jsonl'
+
+    def __init__(self, directory: str = "logs/journal",
+                 max_segment_bytes: int = 16 * 1024 * 1024,
+                 max_segment_age: float = 24 * 3600,
+                 compress: bool = True):
+        self.directory = Path(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.compress = compress
+
+        self.index: Dict[str, Dict[str, Any]] = {}  # operation_id -> latest index entry
+        self.entries: List[Dict[str, Any]] = []  # every index entry, in append order
+        self.counters = {'operations': 0, 'succeeded': 0, 'failed': 0, 'steps': 0, 'duplicates': 0}
+
+        self._segment = 1
+        self._segment_size = 0
+        self._segment_opened: Optional[float] = None
+        self._loaded = False
+
+    # Writing
+
+    def append(self, operation_log: Dict[str, Any]) -> Dict[str, Any]:
+        """Append one operation log and return its index entry."""
+        self._load()
+
+        line = (json.dumps(operation_log, ensure_ascii=False, default=str, separators=(',', ':')) + '\n').encode('utf-8')
+        if self._should_rotate(len(line)):
+            self.rotate()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        offset = self._segment_size
+        with open(self._segment_path(self._segment), 'ab') as f:
+            f.write(line)
+
+        entry = self._entry(operation_log, self._segment, offset, len(line))
+        with open(self.directory / self.INDEX_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+        self._segment_size += len(line)
+        if self._segment_opened is None:
+            self._segment_opened = entry['written_at']
+        self._apply(entry)
+        return entry
+
+    def rotate(self):
+        """Close the active segment, start a new one and compress the old one in the background."""
+        self._load()
+        if self._segment_size == 0:
+            return
+
+        closed = self._segment
+        self._segment += 1
+        self._segment_size = 0
+        self._segment_opened = None
+
+        if self.compress:
+            # Not a daemon, so interpreter exit waits for the segment to finish
+            threading.Thread(target=self._compress_segment, args=(closed,),
+                             name=f'journal-compress-{closed}').start()
+
+    # Reading
+
+    def get(self, operation_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a single operation log by id (the latest, if the id repeats)."""
+        self._load()
+        entry = self.index.get(str(operation_id))
+        if entry is None:
+            return None
+
+        with self._open_segment(entry['segment']) as f:
+            f.seek(entry['offset'])
+            return json.loads(f.read(entry['length']))
+
+    def scan(self, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Stream operation logs started within [since, until), oldest first.
+
+        Segments with no matching index entries are not opened at all.
+        """
+        self._load()
+
+        segments = sorted({
+            entry['segment'] for entry in self.entries
+            if self._in_range(entry, since, until)
+        })
+
+        for segment in segments:
+            with self._open_segment(segment) as f:
+                for line in f:
+                    try:
+                        operation_log = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if self._in_range(operation_log, since, until):
+                        yield operation_log
+
+    def __contains__(self, operation_id: str) -> bool:
+        self._load()
+        return str(operation_id) in self.index
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self.entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Running counters kept up to date on every append."""
+        self._load()
+        return dict(self.counters, segments=self._segment)
+
+    # Internals
+
+    def _load(self):
+        """Read the index once and bring it up to date with the active segment."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        index_path = self.directory / self.INDEX_FILE
+        if index_path.exists():
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except (json.JSONDecodeError, KeyError):
+                        continue
+
+        segments = self._segment_numbers()
+        if segments:
+            self._segment = max(segments[-1], self._segment)
+
+        active = self._segment_path(self._segment)
+        if not active.exists():
+            if self._compressed_path(self._segment).exists():
+                self._segment += 1
+            return
+
+        self._segment_size = active.stat().st_size
+        self._recover_active_segment(active)
+
+        first = next((entry for entry in self.entries if entry['segment'] == self._segment), None)
+        self._segment_opened = first['written_at'] if first else None
+
+    def _recover_active_segment(self, path: Path):
+        """Index records written after the last index entry (a crash between
+        the two appends) and cut a torn trailing line."""
+        indexed_end = 0
+        for entry in self.entries:
+            if entry['segment'] == self._segment:
+                indexed_end = max(indexed_end, entry['offset'] + entry['length'])
+
+        if indexed_end >= self._segment_size:
+            return
+
+        good_bytes = indexed_end
+        with open(path, 'rb') as f:
+            f.seek(indexed_end)
+            for line in f:
+                try:
+                    operation_log = json.loads(line.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                if not line.endswith(b'\n'):
+                    break
+
+                entry = self._entry(operation_log, self._segment, good_bytes, len(line))
+                with open(self.directory / self.INDEX_FILE, 'a', encoding='utf-8') as index_file:
+                    index_file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+                self._apply(entry)
+                good_bytes += len(line)
+
+        if good_bytes < self._segment_size:
+            with open(path, 'r+b') as f:
+                f.truncate(good_bytes)
+            self._segment_size = good_bytes
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if self._segment_size == 0:
+            return False
+        if self._segment_size + incoming > self.max_segment_bytes:
+            return True
+        return (self._segment_opened is not None
+                and time.time() - self._segment_opened > self.max_segment_age)
+
+    def _entry(self, operation_log: Dict[str, Any], segment: int, offset: int, length: int) -> Dict[str, Any]:
+        return {
+            'id': str(operation_log.get('operation_id')),
+            'segment': segment,
+            'offset': offset,
+            'length': length,
+            'started_at': operation_log.get('started_at'),
+            'success': operation_log.get('success'),
+            'steps': operation_log.get('total_steps', 0),
+            'written_at': time.time()
+        }
+
+    def _apply(self, entry: Dict[str, Any]):
+        operation_id = entry['id']
+        if operation_id in self.index:
+            self.counters['duplicates'] += 1
+        self.index[operation_id] = entry
+        self.entries.append(entry)
+        self.counters['operations'] += 1
+        self.counters['steps'] += entry.get('steps') or 0
+        if entry.get('success') is True:
+            self.counters['succeeded'] += 1
+        elif entry.get('success') is False:
+            self.counters['failed'] += 1
+
+    @staticmethod
+    def _in_range(record: Dict[str, Any], since: Optional[float], until: Optional[float]) -> bool:
+        started_at = record.get('started_at') or 0
+        if since is not None and started_at < since:
+            return False
+        if until is not None and started_at >= until:
+            return False
+        return True
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"{self.SEGMENT_PREFIX}{segment:06d}{self.SEGMENT_SUFFIX}"
+
+    def _compressed_path(self, segment: int) -> Path:
+        return self._segment_path(segment).with_name(self._segment_path(segment).name + '.gz')
+
+    def _open_segment(self, segment: int):
+        # A closed segment stays readable as plain JSON lines until its .gz is in place
+        try:
+            return open(self._segment_path(segment), 'rb')
+        except FileNotFoundError:
+            return gzip.open(self._compressed_path(segment), 'rb')
+
+    def _compress_segment(self, segment: int):
+        path = self._segment_path(segment)
+        if not path.exists():
+            return
+
+        tmp_path = self._compressed_path(segment).with_suffix('.tmp')
+        with open(path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, self._compressed_path(segment))
+        path.unlink()
+
+    def _segment_numbers(self) -> List[int]:
+        if not self.directory.exists():
+            return []
+
+        numbers = set()
+        for path in self.directory.glob(f"{self.SEGMENT_PREFIX}*"):
+            digits = path.name[len(self.SEGMENT_PREFIX):].split('.', 1)[0]
+            if digits.isdigit():
+                numbers.add(int(digits))
+        return sorted(numbers)
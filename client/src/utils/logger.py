@@ -1,58 +1,247 @@
 """Logging utilities for Xiaomi Unlock Client."""
 
+import atexit
+import copy
 import logging
+import queue
 import sys
+import time
+import weakref
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from typing import Optional
-from colorama import init, Fore, Style
 import os
 
-# Initialize colorama for Windows compatibility
-init(autoreset=True)
+from .clock import SYSTEM_CLOCK
+
+_colorama_ready = False
+
+
+def load_colorama():
+    """Import and initialize colorama on first use."""
+    global _colorama_ready
+    from colorama import init, Fore, Style
+    
+    if not _colorama_ready:
+        # Initialize colorama for Windows compatibility
+        init(autoreset=True)
+        _colorama_ready = True
+    
+    return Fore, Style
 
 
 class ColoredFormatter(logging.Formatter):
     """Custom formatter with color support."""
     
-    COLORS = {
-        'DEBUG': Fore.CYAN,
-        'INFO': Fore.GREEN,
-        'WARNING': Fore.YELLOW,
-        'ERROR': Fore.RED,
-        'CRITICAL': Fore.MAGENTA + Style.BRIGHT,
-    }
+    # Filled on first colored use so importing this module stays cheap
+    COLORS = None
+    RESET = ""
+    
+    LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
     
     def __init__(self, use_color: bool = True):
         super().__init__()
         self.use_color = use_color
+        if use_color:
+            self._load_colors()
         
-    def format(self, record):
-        # Create base format
-        if hasattr(record, 'device_id'):
-            device_info = f" [{record.device_id}]"
-        else:
-            device_info = ""
-            
+        # One formatter per (level, has device context), built up front
+        # instead of per record
+        self._formatters = {}
+        for levelname in self.LEVELS:
+            for with_device in (False, True):
+                self._formatters[(levelname, with_device)] = self._build_formatter(levelname, with_device)
+    
+    @classmethod
+    def _load_colors(cls):
+        if cls.COLORS is None:
+            Fore, Style = load_colorama()
+            cls.COLORS = {
+                'DEBUG': Fore.CYAN,
+                'INFO': Fore.GREEN,
+                'WARNING': Fore.YELLOW,
+                'ERROR': Fore.RED,
+                'CRITICAL': Fore.MAGENTA + Style.BRIGHT,
+            }
+            cls.RESET = Style.RESET_ALL
+    
+    def _build_formatter(self, levelname: str, with_device: bool) -> logging.Formatter:
+        device_info = " [%(device_id)s]" if with_device else ""
         base_format = f"%(asctime)s - %(name)s{device_info} - %(levelname)s - %(message)s"
         
-        if self.use_color and record.levelname in self.COLORS:
+        if self.use_color and levelname in self.COLORS:
             # Apply color to the entire message
-            color = self.COLORS[record.levelname]
-            colored_format = f"{color}{base_format}{Style.RESET_ALL}"
-            formatter = logging.Formatter(colored_format)
+            color = self.COLORS[levelname]
+            return logging.Formatter(f"{color}{base_format}{self.RESET}")
+        return logging.Formatter(base_format)
+        
+    def format(self, record):
+        key = (record.levelname, hasattr(record, 'device_id'))
+        formatter = self._formatters.get(key)
+        if formatter is None:
+            # Custom level names
+            formatter = self._formatters[key] = self._build_formatter(*key)
+        return formatter.format(record)
+
+
+def load_json_backend(name: str = 'auto'):
+    """Return a dumps(obj) -> str function for the named JSON backend.
+    
+    'auto' prefers orjson when it is installed and falls back to the
+    standard library encoder.
+    """
+    if name in ('auto', 'orjson'):
+        try:
+            import orjson
+        except ImportError:
+            if name == 'orjson':
+                raise
         else:
-            formatter = logging.Formatter(base_format)
+            return lambda obj: orjson.dumps(obj, default=str).decode('utf-8')
+    
+    if name not in ('auto', 'json'):
+        raise ValueError(f"Unknown JSON backend: {name}")
+    
+    import json
+    return json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line with a fixed schema.
+    
+    Context fields come from the record's extra (DeviceAdapter,
+    OperationLogger) and are null when not set, so every line has the
+    same keys in the same order.
+    """
+    
+    FIELDS = ('timestamp', 'level', 'logger', 'device_id', 'operation_id', 'step', 'duration', 'message')
+    
+    def __init__(self, backend: str = 'auto'):
+        super().__init__()
+        self._dumps = load_json_backend(backend)
+    
+    def format(self, record):
+        created = time.gmtime(record.created)
+        entry = {
+            'timestamp': f"{time.strftime('%Y-%m-%dT%H:%M:%S', created)}.{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'device_id': getattr(record, 'device_id', None),
+            'operation_id': getattr(record, 'operation_id', None),
+            'step': getattr(record, 'step', None),
+            'duration': getattr(record, 'duration', None),
+            'message': record.getMessage()
+        }
+        
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        
+        return self._dumps(entry)
+
+
+class DeferredFlushMixin:
+    """Lets a batching listener suppress per-record flushes."""
+    
+    _defer_flush = False
+    
+    def defer_flush(self, enabled: bool):
+        self._defer_flush = enabled
+        if not enabled:
+            self.flush()
+    
+    def flush(self):
+        if not self._defer_flush:
+            super().flush()
+
+
+class BatchStreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    """Stream handler that flushes once per batch."""
+
+
+class BatchRotatingFileHandler(DeferredFlushMixin, RotatingFileHandler):
+    """Rotating file handler that flushes once per batch."""
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+    
+    The stdlib prepare() runs the full formatter on the calling thread and
+    folds the traceback into msg, dropping exc_info. This one only merges
+    args into msg, since they may change before the listener gets to them,
+    and keeps exc_info so formatters (e.g. JSONFormatter's exception field)
+    still see it.
+    """
+    
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class BatchingQueueListener(QueueListener):
+    """Queue listener that drains records in batches.
+    
+    Formatting, rotation and disk I/O all happen on the listener thread;
+    handlers are flushed once per batch instead of once per record.
+    """
+    
+    def __init__(self, log_queue, *handlers, max_batch: int = 256):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.max_batch = max_batch
+    
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        stop = False
+        
+        while not stop:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
             
-        return formatter.format(record)
+            for handler in self.handlers:
+                if isinstance(handler, DeferredFlushMixin):
+                    handler.defer_flush(True)
+            
+            try:
+                for record in batch:
+                    if record is self._sentinel:
+                        stop = True
+                    else:
+                        self.handle(record)
+                    if has_task_done:
+                        q.task_done()
+            finally:
+                for handler in self.handlers:
+                    if isinstance(handler, DeferredFlushMixin):
+                        handler.defer_flush(False)
+
+
+_listener: Optional[BatchingQueueListener] = None
+
+
+def shutdown_logging():
+    """Stop the background listener after writing out queued records."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 
 class DeviceAdapter(logging.LoggerAdapter):
     """Logger adapter that adds device context."""
     
     def process(self, msg, kwargs):
-        if 'device_id' in self.extra:
-            kwargs.setdefault('extra', {})['device_id'] = self.extra['device_id']
+        # Context from the call (operation_id, step, ...) wins over the adapter's
+        extra = kwargs.setdefault('extra', {})
+        for key, value in self.extra.items():
+            extra.setdefault(key, value)
         return msg, kwargs
 
 
@@ -60,39 +249,75 @@ def setup_logger(level: str = 'INFO',
                 use_color: bool = True,
                 log_file: Optional[str] = None,
                 max_size: int = 10 * 1024 * 1024,  # 10MB
-                backup_count: int = 5) -> logging.Logger:
-    """Setup logging configuration."""
+                backup_count: int = 5,
+                async_output: bool = True,
+                log_format: str = 'text',
+                json_backend: str = 'auto') -> logging.Logger:
+    """Setup logging configuration.
+    
+    With async_output the logger only enqueues records; a listener thread
+    formats them and does all console and file I/O. log_format 'json'
+    writes JSONL (see JSONFormatter) to both console and file.
+    """
+    global _listener
     
     # Convert string level to logging constant
     numeric_level = getattr(logging, level.upper(), logging.INFO)
     
+    silence_third_party_loggers()
+    
     # Create main logger
     logger = logging.getLogger('xiaomi_unlock')
     logger.setLevel(numeric_level)
+    invalidate_level_cache()
     
     # Clear existing handlers
+    shutdown_logging()
     logger.handlers.clear()
     
+    handlers = []
+    
+    if log_format == 'json':
+        json_formatter = JSONFormatter(json_backend)
+    elif log_format != 'text':
+        raise ValueError(f"Unknown log format: {log_format}")
+    
     # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = BatchStreamHandler(sys.stdout)
     console_handler.setLevel(numeric_level)
-    console_handler.setFormatter(ColoredFormatter(use_color))
-    logger.addHandler(console_handler)
+    if log_format == 'json':
+        console_handler.setFormatter(json_formatter)
+    else:
+        console_handler.setFormatter(ColoredFormatter(use_color))
+    handlers.append(console_handler)
     
     # File handler (if specified)
     if log_file:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         
-        file_handler = RotatingFileHandler(
+        file_handler = BatchRotatingFileHandler(
             log_path,
             maxBytes=max_size,
             backupCount=backup_count,
             encoding='utf-8'
         )
         file_handler.setLevel(logging.DEBUG)  # Always log everything to file
-        file_handler.setFormatter(ColoredFormatter(use_color=False))  # No colors in file
-        logger.addHandler(file_handler)
+        if log_format == 'json':
+            file_handler.setFormatter(json_formatter)
+        else:
+            file_handler.setFormatter(ColoredFormatter(use_color=False))  # No colors in file
+        handlers.append(file_handler)
+    
+    if async_output:
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(DeferredQueueHandler(log_queue))
+        _listener = BatchingQueueListener(log_queue, *handlers)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     # Prevent propagation to root logger
     logger.propagate = False
@@ -100,6 +325,83 @@ def setup_logger(level: str = 'INFO',
     return logger
 
 
+# Every live LazyLogger, so level changes can be pushed to their caches
+_lazy_loggers = weakref.WeakSet()
+
+
+def invalidate_level_cache():
+    """Make every LazyLogger re-read its enabled levels after a level change."""
+    for lazy_logger in list(_lazy_loggers):
+        lazy_logger._refresh()
+
+
+def _discard(*args, **kwargs):
+    pass
+
+
+class LazyMessage:
+    """Defers building an expensive log argument until it is formatted."""
+    
+    __slots__ = ('func', 'args')
+    
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+    
+    def __str__(self):
+        return str(self.func(*self.args))
+
+
+class LazyLogger:
+    """Logger facade whose disabled levels cost a single no-op call.
+    
+    debug/info/warning are bound per instance to either the wrapped
+    logger's method or a no-op, and rebound by invalidate_level_cache().
+    Messages use %-style arguments (or LazyMessage) so nothing is
+    formatted unless the record is actually emitted.
+    """
+    
+    __slots__ = ('_logger', 'debug', 'info', 'warning',
+                 'debug_enabled', 'info_enabled', 'warning_enabled', '__weakref__')
+    
+    def __init__(self, logger):
+        self._logger = logger
+        self._refresh()
+        _lazy_loggers.add(self)
+    
+    @classmethod
+    def wrap(cls, logger) -> 'LazyLogger':
+        return logger if isinstance(logger, cls) else cls(logger)
+    
+    def _refresh(self):
+        logger = self._logger
+        self.debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        self.info_enabled = logger.isEnabledFor(logging.INFO)
+        self.warning_enabled = logger.isEnabledFor(logging.WARNING)
+        self.debug = logger.debug if self.debug_enabled else _discard
+        self.info = logger.info if self.info_enabled else _discard
+        self.warning = logger.warning if self.warning_enabled else _discard
+    
+    def error(self, msg, *args, **kwargs):
+        self._logger.error(msg, *args, **kwargs)
+    
+    def critical(self, msg, *args, **kwargs):
+        self._logger.critical(msg, *args, **kwargs)
+    
+    def exception(self, msg, *args, **kwargs):
+        self._logger.exception(msg, *args, **kwargs)
+    
+    def log(self, level, msg, *args, **kwargs):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg, *args, **kwargs)
+    
+    def isEnabledFor(self, level) -> bool:
+        return self._logger.isEnabledFor(level)
+    
+    def __getattr__(self, name):
+        return getattr(self._logger, name)
+
+
 def get_device_logger(device_id: str, base_logger: logging.Logger) -> DeviceAdapter:
     """Get a logger adapter with device context."""
     return DeviceAdapter(base_logger, {'device_id': device_id})
@@ -108,61 +410,107 @@ def get_device_logger(device_id: str, base_logger: logging.Logger) -> DeviceAdap
 class OperationLogger:
     """Logger for tracking unlock operations."""
     
-    def __init__(self, logger: logging.Logger, operation_id: str):
-        self.logger = logger
+    # Statuses that close the span opened by a matching 'started' step
+    END_STATUSES = ('completed', 'failed')
+    # Log level per step status; anything else logs at DEBUG
+    STATUS_LEVELS = {'started': logging.INFO, 'completed': logging.INFO, 'failed': logging.ERROR}
+    
+    def __init__(self, logger: logging.Logger, operation_id: str, clock=None):
+        self.logger = LazyLogger.wrap(logger)
         self.operation_id = operation_id
+        # Id the server assigned once the operation was started there
+        self.server_operation_id = None
+        self.clock = clock or SYSTEM_CLOCK
         self.steps = []
+        self.spans = []
+        self._open_spans = []
+        self.status_counts = {}
+        self.duration = None
+        self.success = None
+        self._started_at = self.clock.time()
+        self._start = self.clock.perf_counter()
         
     def log_step(self, step: str, status: str = 'started', details: str = None):
         """Log an operation step."""
         timestamp = self._get_timestamp()
+        elapsed = self.clock.perf_counter() - self._start
         step_info = {
             'timestamp': timestamp,
+            'elapsed': round(elapsed, 6),
             'step': step,
             'status': status,
             'details': details
         }
+        
+        if status == 'started':
+            self._open_span(step, elapsed)
+        elif status in self.END_STATUSES:
+            span = self._close_span(step, status, elapsed)
+            if span:
+                step_info['duration'] = span['duration']
+        
+        step_info['depth'] = len(self._open_spans)
         self.steps.append(step_info)
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        
+        # Bookkeeping above always runs; the log record is built only if it will be emitted
+        level = self.STATUS_LEVELS.get(status, logging.DEBUG)
+        if not self.logger.isEnabledFor(level):
+            return
         
         message = f"Operation {self.operation_id} - {step}: {status}"
         if details:
             message += f" - {details}"
-            
-        if status == 'completed':
-            self.logger.info(message)
-        elif status == 'failed':
-            self.logger.error(message)
-        elif status == 'started':
-            self.logger.info(message)
-        else:
-            self.logger.debug(message)
+        if 'duration' in step_info:
+            message += f" ({step_info['duration']:.3f}s)"
+        
+        extra = {'operation_id': self.operation_id, 'step': step, 'duration': step_info.get('duration')}
+        self.logger.log(level, message, extra=extra)
     
     def log_progress(self, step: str, progress: int, total: int, message: str = None):
         """Log progress within a step."""
+        # Called for every unit of device work; skip all of it when DEBUG is off
+        if not self.logger.debug_enabled:
+            return
+        
         percentage = (progress / total) * 100 if total > 0 else 0
         msg = f"Operation {self.operation_id} - {step}: {progress}/{total} ({percentage:.1f}%)"
         if message:
             msg += f" - {message}"
-        self.logger.debug(msg)
+        self.logger.debug(msg, extra={'operation_id': self.operation_id, 'step': step})
     
     def log_completion(self, success: bool, error: str = None):
         """Log operation completion."""
+        # Close anything a failure path left open so every span has an end
+        elapsed = self.clock.perf_counter() - self._start
+        final_status = 'completed' if success else 'failed'
+        while self._open_spans:
+            self._close_span(self._open_spans[-1]['name'], final_status, elapsed)
+        self.duration = round(elapsed, 6)
+        self.success = success
+        
+        extra = {'operation_id': self.operation_id, 'duration': self.duration}
         if success:
-            self.logger.info(f"Operation {self.operation_id} completed successfully")
+            self.logger.info(f"Operation {self.operation_id} completed successfully ({elapsed:.3f}s)", extra=extra)
         else:
             error_msg = f"Operation {self.operation_id} failed"
             if error:
                 error_msg += f": {error}"
-            self.logger.error(error_msg)
+            self.logger.error(error_msg, extra=extra)
     
     def get_operation_log(self) -> dict:
         """Get complete operation log."""
         return {
             'operation_id': self.operation_id,
+            'server_operation_id': self.server_operation_id,
+            'started_at': self._started_at,
+            'duration': self.duration,
+            'success': self.success,
             'steps': self.steps,
+            'spans': self.spans,
             'total_steps': len(self.steps),
-            'completed_steps': len([s for s in self.steps if s['status'] == 'completed']),
-            'failed_steps': len([s for s in self.steps if s['status'] == 'failed'])
+            'completed_steps': self.status_counts.get('completed', 0),
+            'failed_steps': self.status_counts.get('failed', 0)
         }
     
     def save_operation_log(self, file_path: str):
@@ -176,10 +524,45 @@ class OperationLogger:
         with open(log_file, 'w', encoding='utf-8') as f:
             json.dump(log_data, f, indent=2, ensure_ascii=False, default=str)
     
+    def export_chrome_trace(self, file_path: str):
+        """Export step spans in Chrome trace-event format."""
+        from .timing import write_chrome_trace
+        write_chrome_trace([self.get_operation_log()], file_path)
+    
+    def _open_span(self, name: str, start: float):
+        parent = self._open_spans[-1]['name'] if self._open_spans else None
+        self._open_spans.append({
+            'name': name,
+            'parent': parent,
+            'depth': len(self._open_spans),
+            'start': start
+        })
+    
+    def _close_span(self, name: str, status: str, end: float) -> Optional[dict]:
+        # Match the innermost open span with this name; anything opened
+        # inside it and never closed ends with it.
+        for index in range(len(self._open_spans) - 1, -1, -1):
+            if self._open_spans[index]['name'] == name:
+                break
+        else:
+            return None
+        
+        closed = None
+        while len(self._open_spans) > index:
+            span = self._open_spans.pop()
+            span['end'] = round(end, 6)
+            span['start'] = round(span['start'], 6)
+            span['duration'] = round(end - span['start'], 6)
+            span['status'] = status
+            self.spans.append(span)
+            closed = span
+        
+        return closed
+    
     def _get_timestamp(self) -> str:
         """Get current timestamp."""
         from datetime import datetime
-        return datetime.now().isoformat()
+        return datetime.fromtimestamp(self.clock.time()).isoformat()
 
 
 # Silence noisy third-party loggers
@@ -196,6 +579,3 @@ def silence_third_party_loggers():
     for logger_name in noisy_loggers:
         logging.getLogger(logger_name).setLevel(logging.WARNING)
 
-
-# Setup third-party logger silencing
-silence_third_party_loggers()
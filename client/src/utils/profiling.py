@@ -0,0 +1,235 @@
+"""Whole-run profiling: per-phase CPU profiles, sampled stacks and asyncio task timings."""
+
+import asyncio
+import collections.abc
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .tracing import tracer, current_span
+
+
+class _TaskRecord:
+    __slots__ = ('label', 'coroutine', 'created', 'finished', 'busy', 'steps')
+
+    def __init__(self, label: str, coroutine: str):
+        self.label = label
+        self.coroutine = coroutine
+        self.created = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.busy = 0.0
+        self.steps = 0
+
+
+class _TimedCoroutine(collections.abc.Coroutine):
+    """Coroutine proxy that adds up the time spent inside each step."""
+
+    __slots__ = ('_coro', '_record')
+
+    def __init__(self, coro, record: _TaskRecord):
+        self._coro = coro
+        self._record = record
+
+    def send(self, value):
+        start = time.perf_counter()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._record.busy += time.perf_counter() - start
+            self._record.steps += 1
+
+    def throw(self, *args):
+        start = time.perf_counter()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._record.busy += time.perf_counter() - start
+            self._record.steps += 1
+
+    def close(self):
+        return self._coro.close()
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+
+class StackSampler:
+    """Samples one thread's stack on a timer and counts collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def write_collapsed(self, file_path: Path):
+        """Write stacks in the folded format flamegraph.pl and speedscope read."""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Profiles a full CLI run, split into sequential phases.
+
+    Each phase (startup, config_load, run, shutdown) gets its own cProfile
+    and wall/CPU totals. Work inside ``run`` is broken down further from
+    tracer spans (detection, each unlock stage) and from per-task timings
+    collected by a task factory installed on every event loop.
+    """
+
+    def __init__(self, output_dir: str = "profiles"):
+        self.output_dir = Path(output_dir) / time.strftime('%Y%m%d-%H%M%S')
+        self.phases: List[Dict[str, Any]] = []
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.tasks: List[_TaskRecord] = []
+        self.sampler = StackSampler(threading.get_ident())
+        self._current: Optional[Dict[str, Any]] = None
+        self._stopped = False
+
+    def start(self):
+        tracer.enable_recording()
+        self.sampler.start()
+        self.enter('startup')
+
+    def enter(self, name: str):
+        """End the current phase and start the next one."""
+        self._end_phase()
+        profile = self.profiles[name] = cProfile.Profile()
+        self._current = {
+            'name': name,
+            'wall_start': time.perf_counter(),
+            'cpu_start': time.process_time()
+        }
+        profile.enable()
+
+    def _end_phase(self):
+        if self._current is None:
+            return
+        self.profiles[self._current['name']].disable()
+        self.phases.append({
+            'phase': self._current['name'],
+            'wall': time.perf_counter() - self._current['wall_start'],
+            'cpu': time.process_time() - self._current['cpu_start']
+        })
+        self._current = None
+
+    def install(self, loop: asyncio.AbstractEventLoop):
+        """Time every task created on this loop."""
+        def task_factory(loop, coro, **kwargs):
+            span = current_span.get()
+            name = getattr(coro, '__qualname__', type(coro).__name__)
+            record = _TaskRecord(span.name if span else name, name)
+            self.tasks.append(record)
+            task = asyncio.Task(_TimedCoroutine(coro, record), loop=loop, **kwargs)
+            task.add_done_callback(lambda _: setattr(record, 'finished', time.perf_counter()))
+            return task
+
+        loop.set_task_factory(task_factory)
+
+    def stop(self):
+        """Finish the last phase and write every output file."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._end_phase()
+        self.sampler.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, profile in self.profiles.items():
+            profile.dump_stats(str(self.output_dir / f"phase-{name}.pstats"))
+        combined = pstats.Stats(*[str(self.output_dir / f"phase-{name}.pstats") for name in self.profiles])
+        combined.dump_stats(str(self.output_dir / "profile.pstats"))
+
+        self.sampler.write_collapsed(self.output_dir / "stacks.collapsed")
+
+        task_rows = self._task_summary()
+        stage_rows = self._stage_summary()
+        with open(self.output_dir / "tasks.json", 'w', encoding='utf-8') as f:
+            json.dump({'phases': self.phases, 'stages': stage_rows, 'tasks': task_rows}, f, indent=2)
+
+        with open(self.output_dir / "summary.txt", 'w', encoding='utf-8') as f:
+            f.write(self._format_summary(combined, stage_rows, task_rows))
+
+    def _task_summary(self) -> List[Dict[str, Any]]:
+        groups: Dict[str, Dict[str, Any]] = {}
+        for record in self.tasks:
+            row = groups.setdefault(record.label, {'label': record.label, 'coroutine': record.coroutine,
+                                                   'tasks': 0, 'busy': 0.0, 'wall': 0.0, 'steps': 0})
+            row['tasks'] += 1
+            row['busy'] += record.busy
+            row['steps'] += record.steps
+            if record.finished is not None:
+                row['wall'] += record.finished - record.created
+        return sorted(groups.values(), key=lambda row: row['busy'], reverse=True)
+
+    def _stage_summary(self) -> List[Dict[str, Any]]:
+        groups: Dict[str, Dict[str, Any]] = {}
+        for span in list(tracer.finished):
+            row = groups.setdefault(span.name, {'stage': span.name, 'count': 0, 'wall': 0.0, 'max': 0.0})
+            row['count'] += 1
+            row['wall'] += span.duration or 0.0
+            row['max'] = max(row['max'], span.duration or 0.0)
+        return sorted(groups.values(), key=lambda row: row['wall'], reverse=True)
+
+    def _format_summary(self, stats: pstats.Stats, stage_rows, task_rows, limit: int = 20) -> str:
+        out = io.StringIO()
+
+        out.write(f"{'Phase':<16} {'Wall s':>9} {'CPU s':>9}\n")
+        for phase in self.phases:
+            out.write(f"{phase['phase']:<16} {phase['wall']:>9.3f} {phase['cpu']:>9.3f}\n")
+
+        if stage_rows:
+            out.write(f"\n{'Stage':<40} {'Count':>6} {'Wall s':>9} {'Max s':>8}\n")
+            for row in stage_rows[:limit]:
+                out.write(f"{row['stage'][:40]:<40} {row['count']:>6} {row['wall']:>9.3f} {row['max']:>8.3f}\n")
+
+        if task_rows:
+            out.write(f"\n{'Task':<40} {'Tasks':>6} {'Busy s':>9} {'Wall s':>9} {'Steps':>7}\n")
+            for row in task_rows[:limit]:
+                out.write(f"{row['label'][:40]:<40} {row['tasks']:>6} {row['busy']:>9.3f} {row['wall']:>9.3f} {row['steps']:>7}\n")
+
+        out.write("\nTop functions by cumulative time:\n")
+        stats.stream = out
+        stats.sort_stats('cumulative').print_stats(limit)
+        out.write("Top functions by own time:\n")
+        stats.sort_stats('tottime').print_stats(limit)
+
+        return out.getvalue()
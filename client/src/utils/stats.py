@@ -0,0 +1,227 @@
+"""Incrementally maintained operation statistics over rolling time windows."""
+
+import math
+import time
+from typing import Dict, Any, Optional, Callable, Iterable, Tuple
+
+
+class QuantileSketch:
+    """Streaming quantile estimator with bounded relative error.
+
+    Values are counted in logarithmic buckets (as in DDSketch), so adding
+    a value is one dict update, sketches merge by adding bucket counts,
+    and any quantile is within ``relative_accuracy`` of the true value.
+    """
+
+    __slots__ = ('relative_accuracy', '_gamma_log', 'buckets', 'zeros', 'count', 'min', 'max', 'total')
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._gamma_log = math.log(gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+
+    def add(self, value: float):
+        if value <= 0:
+            self.zeros += 1
+        else:
+            key = math.ceil(math.log(value) / self._gamma_log)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'QuantileSketch'):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0 <= q <= 1), or None when empty."""
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Bucket midpoint, clamped to the exact extremes
+                value = 2 * math.exp(key * self._gamma_log) / (1 + math.exp(self._gamma_log))
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+
+class _Slot:
+    """Counters and latency sketch for one time slice of a window."""
+
+    __slots__ = ('epoch', 'count', 'succeeded', 'failed', 'sketch')
+
+    def __init__(self, epoch: int, relative_accuracy: float):
+        self.epoch = epoch
+        self.count = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+
+class RollingWindow:
+    """Ring of fixed-width slots covering the last ``span`` seconds.
+
+    Recording touches only the current slot; a slot is reset lazily when
+    the ring wraps around to it. Reading merges the live slots.
+    """
+
+    def __init__(self, span: float, slots: int = 60, relative_accuracy: float = 0.01):
+        self.span = span
+        self.width = span / slots
+        self.relative_accuracy = relative_accuracy
+        self._slots = [None] * slots
+
+    def add(self, now: float, success: Optional[bool], latency: Optional[float]):
+        epoch = int(now // self.width)
+        index = epoch % len(self._slots)
+        slot = self._slots[index]
+        if slot is None or slot.epoch != epoch:
+            slot = self._slots[index] = _Slot(epoch, self.relative_accuracy)
+
+        slot.count += 1
+        if success is True:
+            slot.succeeded += 1
+        elif success is False:
+            slot.failed += 1
+        if latency is not None:
+            slot.sketch.add(latency)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        oldest = int(now // self.width) - len(self._slots) + 1
+        count = succeeded = failed = 0
+        sketch = QuantileSketch(self.relative_accuracy)
+
+        for slot in self._slots:
+            if slot is None or slot.epoch < oldest:
+                continue
+            count += slot.count
+            succeeded += slot.succeeded
+            failed += slot.failed
+            sketch.merge(slot.sketch)
+
+        finished = succeeded + failed
+        return {
+            'count': count,
+            'succeeded': succeeded,
+            'failed': failed,
+            'success_rate': succeeded / finished if finished else None,
+            'latency': {
+                'mean': sketch.total / sketch.count if sketch.count else None,
+                'p50': sketch.quantile(0.50),
+                'p90': sketch.quantile(0.90),
+                'p99': sketch.quantile(0.99),
+                'max': sketch.max if sketch.count else None
+            }
+        }
+
+
+class StatsAggregator:
+    """Operation counts, success rate and latency quantiles per rolling window.
+
+    Every event updates the overall series and one series per dimension
+    value (mode, chipset, operation type) in each window, so recording is
+    constant time regardless of history length.
+    """
+
+    # name -> (span seconds, slot count)
+    DEFAULT_WINDOWS = {
+        '1m': (60, 60),
+        '1h': (3600, 60),
+        '24h': (86400, 96),
+    }
+
+    DIMENSIONS = ('mode', 'chipset', 'operation_type')
+
+    def __init__(self, windows: Optional[Dict[str, Tuple[float, int]]] = None,
+                 relative_accuracy: float = 0.01, clock: Callable[[], float] = time.time):
+        self.windows = windows or self.DEFAULT_WINDOWS
+        self.relative_accuracy = relative_accuracy
+        self.clock = clock
+        self.totals = {'count': 0, 'succeeded': 0, 'failed': 0}
+        self._series: Dict[Tuple[str, Optional[str]], Dict[str, RollingWindow]] = {}
+
+    def record(self, success: Optional[bool], latency: Optional[float] = None,
+               timestamp: Optional[float] = None, **dimensions):
+        """Record one finished event, e.g. record(True, 12.3, mode='edl', chipset='qualcomm')."""
+        now = self.clock() if timestamp is None else timestamp
+
+        self.totals['count'] += 1
+        if success is True:
+            self.totals['succeeded'] += 1
+        elif success is False:
+            self.totals['failed'] += 1
+
+        self._add(('all', None), now, success, latency)
+        for dimension in self.DIMENSIONS:
+            value = dimensions.get(dimension)
+            if value is not None:
+                self._add((dimension, str(value)), now, success, latency)
+
+    def record_operation(self, device, operation_type: str, success: bool, duration: Optional[float]):
+        """Record a finished unlock operation for a device."""
+        self.record(
+            success, duration,
+            mode=device.mode.value,
+            chipset=device.chipset.value,
+            operation_type=operation_type
+        )
+
+    def snapshot(self, window: str = '1h', dimension: Optional[str] = None, value: Optional[str] = None) -> Dict[str, Any]:
+        """Stats for one window, overall or for one dimension value."""
+        key = ('all', None) if dimension is None else (dimension, str(value))
+        series = self._series.get(key)
+        if series is None:
+            return RollingWindow(*self.windows[window], self.relative_accuracy).snapshot(self.clock())
+        return series[window].snapshot(self.clock())
+
+    def breakdown(self, window: str = '1h', dimension: str = 'mode') -> Dict[str, Dict[str, Any]]:
+        """Stats for every seen value of a dimension, skipping empty ones."""
+        now = self.clock()
+        result = {}
+        for (name, value), series in self._series.items():
+            if name != dimension:
+                continue
+            snapshot = series[window].snapshot(now)
+            if snapshot['count']:
+                result[value] = snapshot
+        return result
+
+    def summary(self, windows: Iterable[str] = None) -> Dict[str, Any]:
+        """Overall stats for each window plus lifetime totals."""
+        return {
+            'totals': dict(self.totals),
+            'windows': {name: self.snapshot(name) for name in (windows or self.windows)}
+        }
+
+    def _add(self, key: Tuple[str, Optional[str]], now: float, success: Optional[bool], latency: Optional[float]):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {
+                name: RollingWindow(span, slots, self.relative_accuracy)
+                for name, (span, slots) in self.windows.items()
+            }
+        for window in series.values():
+            window.add(now, success, latency)
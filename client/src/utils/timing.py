@@ -0,0 +1,148 @@
+"""Timing analysis for saved operation logs."""
+
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Iterable
+
+
+def load_operation_logs(directory: str = "logs", pattern: str = "operation_*.json",
+                        journal_dir: str = None) -> List[Dict[str, Any]]:
+    """Load saved operation logs that carry span timing data.
+
+    Reads the operation journal (``<directory>/journal`` unless given) and
+    any per-operation JSON files left over from before the journal.
+    """
+    from .journal import OperationJournal
+
+    logs = []
+    seen = set()
+
+    journal = OperationJournal(journal_dir or str(Path(directory) / 'journal'))
+    for data in journal.scan():
+        seen.add(str(data.get('operation_id')))
+        if data.get('spans'):
+            logs.append(data)
+
+    for path in sorted(Path(directory).glob(pattern)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+
+        if data.get('spans') and str(data.get('operation_id')) not in seen:
+            logs.append(data)
+
+    return logs
+
+
+def chrome_trace_events(operation_log: Dict[str, Any], tid: int = 1, offset_us: float = 0.0) -> List[Dict[str, Any]]:
+    """Convert one operation log into Chrome trace events."""
+    events = [{
+        'name': 'thread_name',
+        'ph': 'M',
+        'pid': 1,
+        'tid': tid,
+        'args': {'name': str(operation_log.get('operation_id'))}
+    }]
+
+    for span in operation_log.get('spans', []):
+        events.append({
+            'name': span['name'],
+            'cat': 'step',
+            'ph': 'X',
+            'ts': offset_us + span['start'] * 1e6,
+            'dur': span['duration'] * 1e6,
+            'pid': 1,
+            'tid': tid,
+            'args': {'status': span.get('status'), 'parent': span.get('parent')}
+        })
+
+    # Steps that never open a span (skipped, resumed, ...) become instants
+    for step in operation_log.get('steps', []):
+        if step['status'] in ('started', 'completed', 'failed') or 'elapsed' not in step:
+            continue
+        events.append({
+            'name': f"{step['step']}:{step['status']}",
+            'cat': 'event',
+            'ph': 'i',
+            's': 't',
+            'ts': offset_us + step['elapsed'] * 1e6,
+            'pid': 1,
+            'tid': tid,
+            'args': {'details': step.get('details')}
+        })
+
+    return events
+
+
+def write_chrome_trace(operation_logs: Iterable[Dict[str, Any]], file_path: str):
+    """Write operation logs as a Chrome trace file, one track per operation.
+
+    Operations are placed on a shared timeline by their wall-clock start so
+    concurrent operations overlap in the viewer as they did in the run.
+    """
+    operation_logs = list(operation_logs)
+    origin = min((log.get('started_at') or 0 for log in operation_logs), default=0)
+
+    events = []
+    for tid, log in enumerate(operation_logs, 1):
+        offset_us = ((log.get('started_at') or origin) - origin) * 1e6
+        events.extend(chrome_trace_events(log, tid, offset_us))
+
+    trace_file = Path(file_path)
+    trace_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(trace_file, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize_stages(operation_logs: Iterable[Dict[str, Any]], sort_by: str = 'total') -> List[Dict[str, Any]]:
+    """Aggregate span durations by stage name across many operations."""
+    durations: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+
+    for log in operation_logs:
+        for span in log.get('spans', []):
+            durations.setdefault(span['name'], []).append(span['duration'])
+            if span.get('status') == 'failed':
+                failures[span['name']] = failures.get(span['name'], 0) + 1
+
+    summary = []
+    for name, values in durations.items():
+        values.sort()
+        total = sum(values)
+        summary.append({
+            'stage': name,
+            'count': len(values),
+            'failed': failures.get(name, 0),
+            'total': total,
+            'mean': total / len(values),
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'max': values[-1]
+        })
+
+    summary.sort(key=lambda row: row[sort_by], reverse=True)
+    return summary
+
+
+def format_stage_summary(summary: List[Dict[str, Any]], limit: int = 20) -> str:
+    """Render a stage summary as a plain text table."""
+    lines = [f"{'Stage':<40} {'Count':>6} {'Fail':>5} {'Total s':>9} {'Mean s':>8} {'p50 s':>8} {'p95 s':>8} {'Max s':>8}"]
+    lines.append('-' * len(lines[0]))
+
+    for row in summary[:limit]:
+        lines.append(
+            f"{row['stage'][:40]:<40} {row['count']:>6} {row['failed']:>5} {row['total']:>9.3f} "
+            f"{row['mean']:>8.3f} {row['p50']:>8.3f} {row['p95']:>8.3f} {row['max']:>8.3f}"
+        )
+
+    return '\n'.join(lines)
@@ -0,0 +1,167 @@
+"""Span tracing with W3C trace-context propagation to the server."""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+class Span:
+    """One timed unit of work within a trace."""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start', 'end', 'status', 'attributes')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.status = 'ok'
+        self.attributes = dict(attributes or {})
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value naming this span as the parent."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start,
+            'end': self.end,
+            'duration': self.duration,
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# The span running in this task; child spans and outgoing requests read it
+current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+
+class Tracer:
+    """Records spans and writes them out as a Chrome trace file.
+
+    Disabled until ``configure`` is given an output file (or recording is
+    enabled); until then ``span()`` costs one attribute check and no
+    headers are added.
+    """
+
+    # Long-running daemons keep only the most recent spans
+    MAX_SPANS = 100000
+
+    def __init__(self):
+        self.enabled = False
+        self.output_file: Optional[str] = None
+        self.finished = deque(maxlen=self.MAX_SPANS)
+        self._lock = threading.Lock()
+
+    def configure(self, output_file: Optional[str]):
+        self.output_file = output_file
+        self.enabled = self.enabled or bool(output_file)
+
+    def enable_recording(self):
+        """Record spans in memory for other consumers (e.g. the profiler) without an output file."""
+        self.enabled = True
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Run the enclosed code as a child of the current span (or a new trace)."""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        parent = current_span.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes
+        )
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.set_attribute('error', f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end = time.time()
+            current_span.reset(token)
+            with self._lock:
+                self.finished.append(span)
+
+    def headers(self) -> Dict[str, str]:
+        """Trace-context headers for an outgoing request from the current span."""
+        span = current_span.get()
+        if span is None or not self.enabled:
+            return {}
+        return {'traceparent': span.traceparent}
+
+    def export(self, file_path: Optional[str] = None):
+        """Write every finished span as Chrome trace events, one track per trace."""
+        file_path = file_path or self.output_file
+        if not file_path:
+            return
+
+        with self._lock:
+            spans = list(self.finished)
+
+        origin = min((span.start for span in spans), default=0)
+        tracks: Dict[str, int] = {}
+        events = []
+
+        for span in sorted(spans, key=lambda s: s.start):
+            if span.trace_id not in tracks:
+                tracks[span.trace_id] = len(tracks) + 1
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tracks[span.trace_id],
+                    'args': {'name': f"trace {span.trace_id[:8]}"}
+                })
+            events.append({
+                'name': span.name,
+                'cat': 'span',
+                'ph': 'X',
+                'ts': (span.start - origin) * 1e6,
+                'dur': (span.duration or 0) * 1e6,
+                'pid': 1,
+                'tid': tracks[span.trace_id],
+                'args': dict(span.attributes, trace_id=span.trace_id, span_id=span.span_id,
+                             parent_id=span.parent_id, status=span.status)
+            })
+
+        trace_file = Path(file_path)
+        trace_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_file, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+
+tracer = Tracer()
@@ -0,0 +1,151 @@
+"""Event-loop lag watchdog that captures the stack behind each stall."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Any, List, Optional, Tuple
+
+from .metrics import LOOP_LAG_SECONDS, LOOP_STALLS
+
+# Frames under this directory (outside installed packages) are the project's own code
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+
+
+def _is_project_frame(filename: str) -> bool:
+    return filename.startswith(PROJECT_ROOT) and 'site-packages' not in filename
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs a periodic callback.
+
+    A heartbeat scheduled on the loop records its own lateness. A separate
+    thread watches the heartbeat; once it is overdue by more than the
+    threshold, the loop thread is still inside whatever blocked it, so
+    that thread's stack is captured. When the loop recovers, the measured
+    lag is charged to the captured stack.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, logger=None, stack_depth: int = 12):
+        self.threshold = threshold
+        self.interval = interval
+        self.logger = logger
+        self.stack_depth = stack_depth
+
+        self.beats = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.offenders: Dict[str, Dict[str, Any]] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._last_beat = 0.0
+        # (formatted stack, call site) captured by the watchdog thread for the current stall
+        self._pending_stack: Optional[Tuple[List[str], str]] = None
+        self._captured_for: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start monitoring the running loop; call from inside it."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._schedule(self._last_beat)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _schedule(self, now: float):
+        self._handle = self._loop.call_later(self.interval, self._beat, now + self.interval)
+
+    def _beat(self, expected: float):
+        now = time.monotonic()
+        lag = max(0.0, now - expected)
+        self._last_beat = now
+        self.beats += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_LAG_SECONDS.observe(lag)
+
+        if lag >= self.threshold:
+            self._record_stall(lag)
+        self._schedule(now)
+
+    def _record_stall(self, lag: float):
+        LOOP_STALLS.inc()
+        unsampled = '<stall ended before it could be sampled>'
+        stack, key = self._pending_stack or ([unsampled], unsampled)
+        self._pending_stack = None
+
+        offender = self.offenders.get(key)
+        if offender is None:
+            offender = self.offenders[key] = {'location': key, 'count': 0, 'total_lag': 0.0, 'max_lag': 0.0, 'stack': stack}
+        offender['count'] += 1
+        offender['total_lag'] += lag
+        offender['max_lag'] = max(offender['max_lag'], lag)
+
+        if self.logger:
+            self.logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms at {key}")
+
+    def _watch(self):
+        check_every = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(check_every):
+            last_beat = self._last_beat
+            overdue = time.monotonic() - last_beat - self.interval
+            if overdue < self.threshold or self._captured_for == last_beat:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._captured_for = last_beat
+            entries = traceback.extract_stack(frame, limit=self.stack_depth)
+            stack = [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in entries]
+            self._pending_stack = (stack, self._call_site(entries, stack))
+
+    @staticmethod
+    def _call_site(entries, stack: List[str]) -> str:
+        """Group stalls by the innermost project frame plus the call that blocked.
+
+        The innermost frame alone is usually a stdlib primitive such as
+        time.sleep or select, shared by every caller that blocks on it.
+        """
+        for i in range(len(entries) - 1, -1, -1):
+            if _is_project_frame(entries[i].filename):
+                if i == len(entries) - 1:
+                    return stack[i]
+                return f"{stack[-1]} via {stack[i]}"
+        return stack[-1]
+
+    def report(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Worst offenders by total stalled time."""
+        return sorted(self.offenders.values(), key=lambda o: o['total_lag'], reverse=True)[:limit]
+
+    def format_report(self, limit: int = 10) -> str:
+        lines = [
+            f"Event loop lag: {self.beats} samples, mean {self.total_lag / self.beats * 1000 if self.beats else 0:.1f}ms, "
+            f"max {self.max_lag * 1000:.1f}ms, {sum(o['count'] for o in self.offenders.values())} stalls "
+            f">= {self.threshold * 1000:.0f}ms"
+        ]
+        for offender in self.report(limit):
+            lines.append(
+                f"  {offender['count']:>4}x total {offender['total_lag'] * 1000:>8.0f}ms "
+                f"max {offender['max_lag'] * 1000:>6.0f}ms  {offender['location']}"
+            )
+            for frame in reversed(offender['stack'][-4:-1]):
+                lines.append(f"        from {frame}")
+        return '\n'.join(lines)
@@ -0,0 +1,29 @@
+"""Tests for the queued logging pipeline."""
+
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.logger import setup_logger, shutdown_logging
+
+
+def test_async_json_keeps_exception_field(tmp_path):
+    log_file = tmp_path / 'client.log'
+    logger = setup_logger('DEBUG', use_color=False, log_file=str(log_file),
+                          async_output=True, log_format='json')
+    try:
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            logger.error('Step %s failed', 'unlock', exc_info=True)
+    finally:
+        shutdown_logging()
+        logging.getLogger('xiaomi_unlock').handlers.clear()
+
+    entry = json.loads(log_file.read_text(encoding='utf-8').splitlines()[-1])
+    assert entry['message'] == 'Step unlock failed'
+    assert 'Traceback' not in entry['message']
+    assert 'ValueError: boom' in entry['exception']
@@ -126,6 +126,12 @@ const migrations = [{
                 BEFORE UPDATE ON unlock_operations 
                 FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
         `
+    },
+    {
+        name: 'create_unlock_operations_sync_index',
+        sql: `
+            CREATE INDEX IF NOT EXISTS idx_unlock_operations_client_updated ON unlock_operations(client_id, updated_at, id);
+        `
     }
 ];
 
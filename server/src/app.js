@@ -32,7 +32,7 @@ app.use(cors({
         (process.env.ALLOWED_ORIGINS ? process.env.ALLOWED_ORIGINS.split(',') : false) : true,
     credentials: true,
     methods: ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-    allowedHeaders: ['Content-Type', 'Authorization', 'X-Client-ID', 'X-Timestamp', 'X-Signature'],
+    allowedHeaders: ['Content-Type', 'Authorization', 'X-Client-ID', 'X-Timestamp', 'X-Signature', 'traceparent', 'tracestate'],
     maxAge: 86400 // 24 hours
 }));
 
@@ -41,8 +41,8 @@ app.use(security.globalRateLimit());
 app.use('/api', security.apiRateLimit());
 app.use('/api/auth', security.authRateLimit());
 
-// Logging
-app.use(morgan('combined', { stream: { write: message => logger.info(message.trim()) } }));
+// Logging (with the client's W3C trace context so requests can be joined to client spans)
+app.use(morgan(':remote-addr - :remote-user [:date[clf]] ":method :url HTTP/:http-version" :status :res[content-length] ":referrer" ":user-agent" :response-time ms traceparent=:req[traceparent]', { stream: { write: message => logger.info(message.trim()) } }));
 
 // Body parsing
 app.use(express.json({ limit: '10mb' }));
@@ -151,6 +151,49 @@ class UnlockOperation {
         }
     }
 
+    static async getOperationsUpdatedSince(clientId = null, since = null, sinceId = 0, limit = 100) {
+        // Keyset pagination on (updated_at, id) so rows sharing a timestamp
+        // are neither skipped nor repeated across pages. The cursor is
+        // rendered with microseconds; a JS Date would truncate it.
+        let query = `
+            SELECT uo.*, d.serial_number, d.model, d.manufacturer,
+                   to_char(uo.updated_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"') AS sync_cursor
+            FROM unlock_operations uo
+            LEFT JOIN devices d ON uo.device_id = d.device_id
+        `;
+        const conditions = [];
+        const values = [];
+        let paramCount = 0;
+
+        if (clientId) {
+            paramCount++;
+            conditions.push(`uo.client_id = $${paramCount}`);
+            values.push(clientId);
+        }
+
+        if (since) {
+            paramCount += 2;
+            conditions.push(`(uo.updated_at, uo.id) > ($${paramCount - 1}::timestamptz, $${paramCount})`);
+            values.push(since, sinceId);
+        }
+
+        if (conditions.length > 0) {
+            query += ` WHERE ${conditions.join(' AND ')}`;
+        }
+
+        paramCount++;
+        query += ` ORDER BY uo.updated_at ASC, uo.id ASC LIMIT $${paramCount}`;
+        values.push(limit);
+
+        try {
+            const result = await database.query(query, values);
+            return result.rows;
+        } catch (error) {
+            logger.error('Error getting updated operations:', error);
+            throw error;
+        }
+    }
+
     static async cleanupOldOperations(daysOld = 30) {
         const query = `
             DELETE FROM unlock_operations 
@@ -255,7 +255,9 @@ router.get('/device/:deviceId', [
  */
 router.get('/', [
     query('limit').optional().isInt({ min: 1, max: 100 }).withMessage('Limit must be between 1 and 100'),
-    query('offset').optional().isInt({ min: 0 }).withMessage('Offset must be non-negative')
+    query('offset').optional().isInt({ min: 0 }).withMessage('Offset must be non-negative'),
+    query('since').optional().isISO8601().withMessage('Since must be an ISO 8601 timestamp'),
+    query('sinceId').optional().isInt({ min: 0 }).withMessage('Since ID must be non-negative')
 ], asyncHandler(async(req, res) => {
     const errors = validationResult(req);
     if (!errors.isEmpty()) {
@@ -264,11 +266,17 @@ router.get('/', [
 
     const limit = parseInt(req.query.limit) || 50;
     const offset = parseInt(req.query.offset) || 0;
+    const since = req.query.since || null;
+    const sinceId = parseInt(req.query.sinceId) || 0;
+    // Any since value (even the epoch) switches to incremental sync
+    const incremental = req.query.since !== undefined;
 
     try {
-        const operations = await UnlockOperation.getRecentOperations(req.clientId, limit, offset);
+        const operations = incremental ?
+            await UnlockOperation.getOperationsUpdatedSince(req.clientId, since, sinceId, limit) :
+            await UnlockOperation.getRecentOperations(req.clientId, limit, offset);
 
-        res.json({
+        const response = {
             success: true,
             operations: operations.map(op => ({
                 id: op.id,
@@ -277,6 +285,7 @@ router.get('/', [
                 status: op.status,
                 startedAt: op.started_at,
                 completedAt: op.completed_at,
+                updatedAt: op.updated_at,
                 errorMessage: op.error_message,
                 device: {
                     serialNumber: op.serial_number,
@@ -289,7 +298,16 @@ router.get('/', [
                 offset: offset,
                 count: operations.length
             }
-        });
+        };
+
+        if (incremental) {
+            const last = operations[operations.length - 1];
+            response.cursor = last ?
+                { since: last.sync_cursor, sinceId: last.id } :
+                { since: since, sinceId: sinceId };
+        }
+
+        res.json(response);
 
     } catch (error) {
         logger.error('Error getting operation history:', error);